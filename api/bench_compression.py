@@ -0,0 +1,69 @@
+#--------------------------------------------------------------------------------
+# Script Name: bench_compression.py
+# Description: Measures what response compression buys and costs for the
+#              API's bodies: the full transaction list, a 100-record page and
+#              the daily-volume aggregate. For identity, gzip and deflate at
+#              several levels it reports bytes on the wire, compression CPU
+#              time per body, and the transfer time on a slow mobile link.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 bench_compression.py [--data PATH] [--link-kbps 1000]
+#--------------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.normpath(os.path.join(BASE_DIR, '..')))
+from dsa import transaction_io
+from api import compression
+from api import store
+
+LEVELS = (1, 6, 9)
+
+def response_bodies(path):
+    """(label, serialized body) for the responses that are worth compressing"""
+    transactions = store.TransactionStore(transaction_io.iter_transactions_file(path))
+    records = list(transactions)
+    return [
+        ('list', json.dumps(records).encode()),
+        ('page of 100', json.dumps(records[:100]).encode()),
+        ('daily volume', json.dumps(transactions.stats.daily_volume()).encode()),
+    ]
+
+def cpu_ms(func, *args, repeats=5):
+    """Least CPU time of `repeats` calls, in milliseconds"""
+    best = None
+    for _ in range(repeats):
+        start = time.process_time()
+        func(*args)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Measure gzip/deflate savings and cost for API responses.')
+    arg_parser.add_argument('--data', default=os.path.join(BASE_DIR, '..', 'data', 'processed', 'transactions.json'))
+    arg_parser.add_argument('--link-kbps', type=float, default=1000,
+                            help='link speed used for the transfer-time column (kbit/s)')
+    args = arg_parser.parse_args()
+
+    print(f"{'response':>13} {'encoding':>10} {'bytes':>9} {'ratio':>6} {'cpu ms':>8} "
+          f"{'transfer ms @ ' + str(int(args.link_kbps)) + ' kbit/s':>26}")
+    for label, body in response_bodies(args.data):
+        rows = [('identity', body, 0.0)]
+        for encoding in compression.ENCODINGS:
+            for level in LEVELS:
+                compressed = compression.compress(body, encoding, level)
+                rows.append((f"{encoding}-{level}", compressed,
+                             cpu_ms(compression.compress, body, encoding, level)))
+        for name, data, ms in rows:
+            transfer_ms = len(data) * 8 / args.link_kbps
+            print(f"{label:>13} {name:>10} {len(data):>9} {len(body) / len(data):>6.1f} {ms:>8.2f} "
+                  f"{transfer_ms:>26.0f}")
+
+if __name__ == '__main__':
+    main()
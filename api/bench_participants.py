@@ -0,0 +1,104 @@
+#--------------------------------------------------------------------------------
+# Script Name: bench_participants.py
+# Description: Benchmarks account history lookups through the store's
+#              participant index against a linear filter, on synthetic
+#              transactions whose phone numbers follow a skewed popularity
+#              (a few busy merchants, many occasional users). Reports the
+#              lookup time for a busy, a typical and a rare phone number and
+#              the cost of keeping the index up to date on insert and delete.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 bench_participants.py [--sizes 10000 100000 1000000] [--queries N]
+#--------------------------------------------------------------------------------
+
+from datetime import datetime, timedelta
+from itertools import accumulate
+import argparse
+import os
+import random
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.normpath(os.path.join(BASE_DIR, '..')))
+from api import store
+from dsa import range_index
+
+START = datetime(2024, 1, 1)
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def synthetic_transactions(count):
+    """
+    Transactions within 2024 with one or two participants each, drawn from
+    count // 20 phone numbers with popularity falling off as 1 / rank
+    """
+    phones = [f"2507{rank:08d}" for rank in range(1, max(count // 20, 2) + 1)]
+    cum_weights = list(accumulate(1 / rank for rank in range(1, len(phones) + 1)))
+    for tid in range(1, count + 1):
+        when = START + timedelta(seconds=random.randrange(366 * 86400))
+        chosen = random.choices(phones, cum_weights=cum_weights, k=random.randint(1, 2))
+        yield {'TransactionID': tid, 'DateTime': when.strftime(DATETIME_FORMAT),
+               'BalanceAfterTransaction': float(random.randrange(100000)),
+               'Participants': [{'PhoneNumber': phone, 'UserID': int(phone[4:])} for phone in chosen]}
+
+def linear_filter(transactions, phone):
+    """The scan the index replaces: the phone's transactions in DateTime order"""
+    matches = [tx for tx in transactions
+               if any(participant.get('PhoneNumber') == phone for participant in tx['Participants'])]
+    return sorted(matches, key=lambda tx: (range_index.datetime_key(tx['DateTime']), tx['TransactionID']))
+
+def best_of(repeats, func, *args):
+    """Fastest of `repeats` calls in seconds, and the last result"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def bench_size(count, queries):
+    transactions = list(synthetic_transactions(count))
+    start = time.perf_counter()
+    indexed = store.TransactionStore(transactions)
+    build_seconds = time.perf_counter() - start
+    print(f"\n{count} transactions, store built in {build_seconds:.2f}s")
+    print(f"{'phone':>10} {'matches':>8} {'linear ms':>10} {'index ms':>9} {'speedup':>8}")
+
+    busy = f"2507{1:08d}"
+    typical = f"2507{max(count // 200, 1):08d}"
+    rare = f"2507{max(count // 20, 2):08d}"
+    for label, phone in (('busy', busy), ('typical', typical), ('rare', rare)):
+        linear_seconds, expected = best_of(3, linear_filter, transactions, phone)
+        index_seconds, found = best_of(queries, indexed.participant_transactions, 'PhoneNumber', phone)
+        assert found == expected, f"{label}: index and linear filter disagree"
+        print(f"{label:>10} {len(found):>8} {linear_seconds * 1000:>10.2f} {index_seconds * 1000:>9.3f} "
+              f"{linear_seconds / index_seconds:>7.0f}x")
+
+    # Incremental maintenance: add transactions for the busy phone, then delete them
+    new_ids = []
+    start = time.perf_counter()
+    for _ in range(queries * 10):
+        tx = indexed.add({'DateTime': START.strftime(DATETIME_FORMAT),
+                          'Participants': [{'PhoneNumber': busy, 'UserID': 1}]})
+        new_ids.append(tx['TransactionID'])
+    add_seconds = (time.perf_counter() - start) / len(new_ids)
+    start = time.perf_counter()
+    for tid in new_ids:
+        indexed.delete(tid)
+    delete_seconds = (time.perf_counter() - start) / len(new_ids)
+    print(f"{'add':>10} {len(new_ids):>8} {'':>10} {add_seconds * 1000:>9.3f}")
+    print(f"{'delete':>10} {len(new_ids):>8} {'':>10} {delete_seconds * 1000:>9.3f}")
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark the participant index against a linear filter.')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    arg_parser.add_argument('--queries', type=int, default=20,
+                            help='repeats per indexed lookup (add/delete count is 10x this)')
+    args = arg_parser.parse_args()
+    random.seed(0)
+    for count in args.sizes:
+        bench_size(count, args.queries)
+
+if __name__ == '__main__':
+    main()
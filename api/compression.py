@@ -0,0 +1,143 @@
+#--------------------------------------------------------------------------------
+# Script Name: compression.py
+# Description: Content-Encoding negotiation for REST API responses.
+#              Bodies of at least MIN_COMPRESS_SIZE bytes are sent gzip- or
+#              deflate-compressed when the client's Accept-Encoding allows
+#              it. CompressionStats counts the bytes before and after and the
+#              CPU time spent, so the saving can be checked against the cost.
+#              Streamed responses are compressed incrementally.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  from api import compression
+#         encoding = compression.negotiate(headers.get('Accept-Encoding'))
+#         body = stats.compress(body, encoding)
+#--------------------------------------------------------------------------------
+
+import gzip
+import threading
+import time
+import zlib
+
+# Encodings in order of preference when the client accepts several equally
+ENCODINGS = ('gzip', 'deflate')
+# Smaller bodies fit in a packet or two anyway; compressing them costs more than it saves
+MIN_COMPRESS_SIZE = 1024
+COMPRESS_LEVEL = 6
+
+def negotiate(accept_encoding):
+    """
+    The encoding from ENCODINGS to send a body with for this Accept-Encoding
+    header value, or None for identity. q-values are honoured and q=0
+    refuses an encoding; '*' stands for any encoding not listed.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+def compress(body, encoding, level=COMPRESS_LEVEL):
+    """body compressed with a negotiated encoding ('deflate' is the zlib format)"""
+    if encoding == 'gzip':
+        # mtime=0 keeps the output identical for identical bodies
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == 'deflate':
+        return zlib.compress(body, level)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+def compressobj(encoding, level=COMPRESS_LEVEL):
+    """Incremental compressor producing the same format as compress(body, encoding)"""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    # wbits 31 writes a gzip header and trailer, 15 the zlib ones
+    return zlib.compressobj(level, zlib.DEFLATED, 31 if encoding == 'gzip' else 15)
+
+class StreamCompressor:
+    """Compresses a streamed body piece by piece, adding the totals to stats on flush()"""
+
+    def __init__(self, stats, encoding):
+        self._stats = stats
+        self._compressor = compressobj(encoding, stats.level)
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._cpu_seconds = 0.0
+
+    def _timed(self, func, *args):
+        start = time.thread_time()
+        result = func(*args)
+        self._cpu_seconds += time.thread_time() - start
+        self._bytes_out += len(result)
+        return result
+
+    def compress(self, data):
+        self._bytes_in += len(data)
+        return self._timed(self._compressor.compress, data)
+
+    def flush(self):
+        result = self._timed(self._compressor.flush)
+        self._stats.record(self._bytes_in, self._bytes_out, self._cpu_seconds)
+        return result
+
+class CompressionStats:
+    """
+    Compresses bodies and keeps running totals: bodies compressed, bytes
+    in and out, CPU seconds spent, and compressed bodies reused from the
+    response cache. Safe to share between request threads.
+    """
+
+    def __init__(self, level=COMPRESS_LEVEL):
+        self.level = level
+        self._lock = threading.Lock()
+        self.compressed = 0
+        self.reused = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def compress(self, body, encoding):
+        start = time.thread_time()
+        result = compress(body, encoding, self.level)
+        self.record(len(body), len(result), time.thread_time() - start)
+        return result
+
+    def stream(self, encoding):
+        """A StreamCompressor for one streamed response, counted once it is flushed"""
+        return StreamCompressor(self, encoding)
+
+    def record(self, bytes_in, bytes_out, cpu_seconds):
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.cpu_seconds += cpu_seconds
+
+    def record_reuse(self):
+        with self._lock:
+            self.reused += 1
+
+    def summary(self):
+        """Totals as served by GET /stats/compression"""
+        with self._lock:
+            return {
+                'level': self.level,
+                'compressed': self.compressed,
+                'reused': self.reused,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'ratio': round(self.bytes_in / self.bytes_out, 2) if self.bytes_out else 0.0,
+                'cpu_ms': round(self.cpu_seconds * 1000, 2),
+            }
@@ -0,0 +1,224 @@
+#--------------------------------------------------------------------------------
+# Script Name: journal.py
+# Description: Append-only journal of API mutations.
+#              Each POST/PUT/DELETE is written as one compact JSON line and
+#              fsynced, either per write or once per group-commit window for
+#              all writes that arrived in it. A background compactor folds
+#              the journal into the main data file; at startup the journal is
+#              replayed on top of that file.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  from api import journal
+#         log = journal.Journal(path, sync='group')
+#         seq = log.append(journal.put_entry(tx)); log.wait_durable(seq)
+#--------------------------------------------------------------------------------
+
+import json
+import os
+import threading
+import time
+
+# fsync after every write, or once per window for every write in it
+SYNC_MODES = ('write', 'group')
+DEFAULT_GROUP_WINDOW = 0.005
+# Compact once the journal holds this many entries
+DEFAULT_COMPACT_ENTRIES = 1000
+DEFAULT_COMPACT_INTERVAL = 5.0
+
+def put_entry(tx):
+    """Journal entry storing tx under its TransactionID (POST and PUT)"""
+    return {'op': 'put', 'tx': tx}
+
+def delete_entry(tid):
+    """Journal entry removing a TransactionID (DELETE)"""
+    return {'op': 'delete', 'id': tid}
+
+def rotated_path(path):
+    """Where a journal is moved while it is being compacted"""
+    return path + '.compacting'
+
+def read_entries(path):
+    """
+    Yields the entries of a journal file. A partial last line, left by a
+    crash in the middle of an append, is ignored.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        lines = f.read().split(b'\n')
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            if i == len(lines) - 1:
+                return
+            raise
+
+def apply_entry(transactions, entry):
+    """Applies one journal entry to a TransactionStore"""
+    if entry['op'] == 'put':
+        transactions.put(entry['tx'])
+    elif entry['op'] == 'delete':
+        transactions.delete(entry['id'])
+    else:
+        raise ValueError(f"Unknown journal operation: {entry['op']!r}")
+
+def replay(transactions, path):
+    """
+    Re-applies a journal to transactions loaded from the main data file.
+    Entries from an interrupted compaction come first. Every entry sets or
+    removes a record by ID, so replaying entries already folded into the
+    data file is harmless. Returns the number of entries applied.
+    """
+    count = 0
+    for journal_path in (rotated_path(path), path):
+        for entry in read_entries(journal_path):
+            apply_entry(transactions, entry)
+            count += 1
+    return count
+
+class Journal:
+    """
+    Append-only journal file. append() returns a sequence number and
+    wait_durable(seq) returns once that entry is on disk.
+    """
+
+    def __init__(self, path, sync='write', group_window=DEFAULT_GROUP_WINDOW):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"sync must be one of {SYNC_MODES}")
+        self.path = path
+        self.sync = sync
+        self.group_window = group_window
+        # Entries not yet compacted, including any left from a previous run
+        self.entries = sum(1 for journal_path in (rotated_path(path), path)
+                           for _ in read_entries(journal_path))
+        self._file = None
+        self._written = 0
+        self._synced = 0
+        self._lock = threading.Lock()
+        self._synced_cond = threading.Condition(self._lock)
+        self._flusher = None
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'ab')
+        return self._file
+
+    def append(self, entry):
+        """Writes one entry and returns its sequence number"""
+        return self.append_many([entry])
+
+    def append_many(self, entries):
+        """
+        Writes several entries with one write (and, with sync='write', one
+        fsync) and returns the sequence number of the last
+        """
+        data = b''.join(json.dumps(entry, separators=(',', ':')).encode('utf-8') + b'\n'
+                        for entry in entries)
+        with self._lock:
+            f = self._open()
+            f.write(data)
+            f.flush()
+            self._written += len(entries)
+            self.entries += len(entries)
+            seq = self._written
+            if self.sync == 'write':
+                os.fsync(f.fileno())
+                self._synced = seq
+            elif self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                self._flusher.start()
+            self._synced_cond.notify_all()
+        return seq
+
+    def wait_durable(self, seq):
+        """Blocks until the entry with this sequence number has been fsynced"""
+        with self._synced_cond:
+            while self._synced < seq:
+                self._synced_cond.wait()
+
+    def _flush_loop(self):
+        # Group commit: once a write is pending, wait out the window so
+        # writes arriving meanwhile share a single fsync
+        while True:
+            with self._synced_cond:
+                while self._synced >= self._written:
+                    self._synced_cond.wait()
+            time.sleep(self.group_window)
+            with self._lock:
+                # rotate() may have synced and closed the file meanwhile
+                if self._synced < self._written:
+                    os.fsync(self._file.fileno())
+                    self._synced = self._written
+                    self._synced_cond.notify_all()
+
+    def rotate(self):
+        """
+        Moves the current journal aside for compaction; later appends go to a
+        fresh file. Callers hold the store's write lock so no write is in flight.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+                self._synced = self._written
+                self._synced_cond.notify_all()
+            if os.path.exists(self.path):
+                if os.path.exists(rotated_path(self.path)):
+                    # An earlier compaction never finished: keep its entries
+                    with open(self.path, 'rb') as src, open(rotated_path(self.path), 'ab') as dst:
+                        dst.write(src.read())
+                        dst.flush()
+                        os.fsync(dst.fileno())
+                    os.remove(self.path)
+                else:
+                    os.replace(self.path, rotated_path(self.path))
+            self.entries = 0
+
+    def finish_compaction(self):
+        """Drops the rotated journal once its entries are in the data file"""
+        try:
+            os.remove(rotated_path(self.path))
+        except FileNotFoundError:
+            pass
+
+class Compactor:
+    """
+    Background thread that calls compact() whenever the journal holds at
+    least max_entries entries, checking every interval seconds
+    """
+
+    def __init__(self, journal, compact, max_entries=DEFAULT_COMPACT_ENTRIES,
+                 interval=DEFAULT_COMPACT_INTERVAL):
+        self.journal = journal
+        self.compact = compact
+        self.max_entries = max_entries
+        self.interval = interval
+        self.compactions = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.journal.entries >= self.max_entries:
+                try:
+                    self.compact()
+                    self.compactions += 1
+                except OSError as err:
+                    # The journal still holds every change; retry next interval
+                    print(f"Journal compaction failed: {err}")
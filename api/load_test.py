@@ -0,0 +1,148 @@
+#--------------------------------------------------------------------------------
+# Script Name: load_test.py
+# Description: Load test for the REST API. Concurrent clients send GET
+#              /transactions/{id} requests, with every Nth request a full
+#              GET /transactions, and the script reports p50/p99 latency and
+#              requests/sec. Without --url it starts server.py itself in the
+#              chosen mode, so single and threaded serving can be compared.
+#              Only GETs are sent, so the data file is never modified.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 load_test.py [--mode threaded|single] [--clients 50]
+#         [--requests 2000] [--list-every 50] [--url http://host:port]
+#--------------------------------------------------------------------------------
+
+from urllib.parse import urlparse
+import argparse
+import base64
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AUTH_HEADER = 'Basic ' + base64.b64encode(b'admin:password').decode()
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def request(host, port, path):
+    """Sends one authenticated GET and returns (status, body bytes)"""
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    try:
+        conn.request('GET', path, headers={'Authorization': AUTH_HEADER})
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+def start_server(mode, port):
+    """Starts server.py in a subprocess and waits until it accepts connections"""
+    process = subprocess.Popen([sys.executable, os.path.join(BASE_DIR, 'server.py'),
+                                '--mode', mode, '--port', str(port)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"server.py did not start on port {port}")
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def run_load(host, port, ids, clients, total_requests, list_every):
+    """
+    Sends total_requests GETs from `clients` threads.
+    Returns (elapsed seconds, {'id': [latencies], 'list': [latencies]}, errors)
+    """
+    # Request i is a full list when i % list_every == 0, else a random ID
+    plan = [('list', '/transactions') if list_every and i % list_every == 0
+            else ('id', f'/transactions/{random.choice(ids)}') for i in range(1, total_requests + 1)]
+    latencies = {'id': [], 'list': []}
+    errors = []
+    lock = threading.Lock()
+    position = iter(range(total_requests))
+
+    def client():
+        while True:
+            with lock:
+                i = next(position, None)
+            if i is None:
+                return
+            kind, path = plan[i]
+            start = time.perf_counter()
+            try:
+                status, _ = request(host, port, path)
+            except OSError as err:
+                status = str(err)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies[kind].append(elapsed)
+                if status != 200:
+                    errors.append(status)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, errors
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Load test the transactions REST API.')
+    arg_parser.add_argument('--url', help='test a running server instead of starting one')
+    arg_parser.add_argument('--mode', choices=['threaded', 'single'], default='threaded')
+    arg_parser.add_argument('--clients', type=int, default=50)
+    arg_parser.add_argument('--requests', type=int, default=2000)
+    arg_parser.add_argument('--list-every', type=int, default=50,
+                            help='every Nth request is a full GET /transactions (0 for none)')
+    args = arg_parser.parse_args()
+
+    process = None
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        process = start_server(args.mode, port)
+    try:
+        status, body = request(host, port, '/transactions')
+        if status != 200:
+            raise RuntimeError(f"GET /transactions returned {status}")
+        ids = [tx['TransactionID'] for tx in json.loads(body)] or [1]
+        random.seed(0)
+        elapsed, latencies, errors = run_load(host, port, ids, args.clients, args.requests, args.list_every)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    target = args.url or f"server.py --mode {args.mode}"
+    print(f"{target}: {args.requests} requests from {args.clients} clients in {elapsed:.2f}s "
+          f"({args.requests / elapsed:.0f} req/s), {len(errors)} errors")
+    everything = sorted(latencies['id'] + latencies['list'])
+    rows = [('all', everything), ('by id', sorted(latencies['id'])), ('list', sorted(latencies['list']))]
+    print(f"{'requests':>9} {'count':>7} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, values in rows:
+        if values:
+            print(f"{name:>9} {len(values):>7} {percentile(values, 0.50) * 1000:>9.2f} "
+                  f"{percentile(values, 0.99) * 1000:>9.2f}")
+
+if __name__ == '__main__':
+    main()
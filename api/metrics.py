@@ -0,0 +1,139 @@
+#--------------------------------------------------------------------------------
+# Script Name: metrics.py
+# Description: Opt-in request metrics for the REST API (server.py --metrics):
+#              per-route latency histograms, request and response payload
+#              size histograms, response counts by status and in-flight
+#              requests, rendered in the Prometheus text exposition format
+#              for GET /metrics. Routes are path templates such as
+#              /transactions/{id}, so IDs and phone numbers do not each
+#              become a series.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  from api import metrics
+#         requests = metrics.RequestMetrics()
+#         requests.start('GET', route); ...; requests.finish('GET', route, 200, seconds, 0, len(body))
+#         text = requests.render()
+#--------------------------------------------------------------------------------
+
+from bisect import bisect_left
+import threading
+
+PREFIX = 'momo_'
+# Upper bounds (le) of the latency buckets, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the payload size buckets, in bytes
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def route_label(path_parts):
+    """The route template a parsed request path is counted under"""
+    if path_parts in (['transactions'], ['transactions', 'search'], ['transactions', 'batch'], ['metrics']):
+        return '/' + '/'.join(path_parts)
+    if len(path_parts) == 2 and path_parts[0] == 'transactions':
+        return '/transactions/{id}'
+    if len(path_parts) == 3 and path_parts[0] == 'users' and path_parts[2] == 'transactions':
+        return '/users/{phone}/transactions'
+    if len(path_parts) == 2 and path_parts[0] == 'stats':
+        return '/stats/{name}'
+    return 'other'
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def labels(**values):
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in values.items()) + '}'
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """Counts of observations per bucket (each value counted in the first bucket it fits), with sum and count"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # The last slot holds values above every bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, label_values):
+        """_bucket lines with cumulative counts, then _sum and _count"""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{labels(**label_values, le=format_value(bound))} {cumulative}")
+        lines.append(f"{name}_sum{labels(**label_values)} {format_value(self.sum)}")
+        lines.append(f"{name}_count{labels(**label_values)} {self.count}")
+        return lines
+
+class RequestMetrics:
+    """
+    Per (method, route) latency and payload histograms, responses by status
+    and requests in flight. Safe to share between request threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = {}
+        self.latency = {}
+        self.request_bytes = {}
+        self.response_bytes = {}
+        self.responses = {}
+
+    def start(self, method, route):
+        with self._lock:
+            key = (method, route)
+            self.in_flight[key] = self.in_flight.get(key, 0) + 1
+
+    def finish(self, method, route, status, seconds, request_bytes, response_bytes):
+        """Records a finished request; status is None if no response was sent"""
+        key = (method, route)
+        with self._lock:
+            self.in_flight[key] -= 1
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.request_bytes[key] = Histogram(SIZE_BUCKETS)
+                self.response_bytes[key] = Histogram(SIZE_BUCKETS)
+            self.latency[key].observe(seconds)
+            self.request_bytes[key].observe(request_bytes)
+            self.response_bytes[key].observe(response_bytes)
+            status_key = (method, route, 'none' if status is None else status)
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def render(self, gauges=()):
+        """
+        The metrics in the Prometheus text format, followed by gauges:
+        (name, type, help, value) for values kept elsewhere in the server
+        """
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        with self._lock:
+            family('http_requests_in_flight', 'gauge', 'Requests being served.')
+            for (method, route), count in sorted(self.in_flight.items()):
+                lines.append(f"{PREFIX}http_requests_in_flight{labels(method=method, route=route)} {count}")
+            family('http_responses_total', 'counter', 'Responses sent, by status code.')
+            for (method, route, status), count in sorted(self.responses.items(), key=str):
+                lines.append(f"{PREFIX}http_responses_total{labels(method=method, route=route, status=status)} "
+                             f"{count}")
+            for name, histograms, help_text in (
+                    ('http_request_duration_seconds', self.latency, 'Time from routing to the response being written.'),
+                    ('http_request_size_bytes', self.request_bytes, 'Request body size (Content-Length).'),
+                    ('http_response_size_bytes', self.response_bytes, 'Response body size as sent, after compression.')):
+                family(name, 'histogram', help_text)
+                for (method, route), histogram in sorted(histograms.items()):
+                    lines.extend(histogram.lines(PREFIX + name, {'method': method, 'route': route}))
+        for name, kind, help_text, value in gauges:
+            family(name, kind, help_text)
+            lines.append(f"{PREFIX}{name} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,134 @@
+#--------------------------------------------------------------------------------
+# Script Name: response_cache.py
+# Description: Cache of serialized GET responses for the REST API.
+#              Bodies of list and aggregate responses are kept as bytes,
+#              tagged with the TransactionStore version they were built from;
+#              every POST/PUT/DELETE bumps that version, so a stale entry is
+#              never served. The version also gives each response an ETag,
+#              letting polling clients revalidate with If-None-Match and get
+#              a 304 instead of the full body. Compressed bodies are kept on
+#              the entry too, so each is compressed once per store version;
+#              a streamed collection keeps only its compressed bodies.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  from api import response_cache
+#         cache = response_cache.ResponseCache()
+#         entry = cache.get(path, transactions.version)
+#--------------------------------------------------------------------------------
+
+from collections import OrderedDict
+import secrets
+import threading
+
+DEFAULT_MAX_ENTRIES = 64
+
+class CachedResponse:
+    """
+    Serialized body and extra headers of one response, built at version,
+    plus the body in each Content-Encoding it has been sent with
+    """
+
+    def __init__(self, version, etag, body, headers):
+        self.version = version
+        self.etag = etag
+        self.body = body
+        self.headers = headers
+        self._encoded = {}
+
+    def encoded(self, encoding, compress):
+        """
+        The body in encoding, made by compress(body, encoding) the first time
+        it is asked for. Returns (bytes, True if it was already made)
+        """
+        encoded = self._encoded.get(encoding)
+        if encoded is not None:
+            return encoded, True
+        # Two threads may both compress a new entry; either result is the same
+        encoded = self._encoded.setdefault(encoding, compress(self.body, encoding))
+        return encoded, False
+
+    def stored(self, encoding):
+        """The body in encoding if it has been made, else None"""
+        return self._encoded.get(encoding)
+
+    def keep(self, encoding, encoded):
+        """Stores the body in encoding, made by the caller (a streamed response has no body)"""
+        self._encoded.setdefault(encoding, encoded)
+
+def strip_weak(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value lists etag (or is *), compared weakly"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or strip_weak(candidate) == strip_weak(etag):
+            return True
+    return False
+
+class ResponseCache:
+    """
+    Least recently used cache of CachedResponse by request path, holding
+    at most max_entries. Safe to share between request threads.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # Versions restart at 0 with every process, so ETags carry a
+        # per-process token to keep them from matching an earlier run's
+        self._token = secrets.token_hex(4)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def etag(self, version):
+        """
+        ETag of every response built at this store version. It is weak, as
+        the gzip, deflate and identity bodies of a response share it
+        """
+        return f'W/"{self._token}-{version}"'
+
+    def get(self, key, version):
+        """The cached response for key if it was built at version, else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, body, headers=None):
+        """Caches a serialized body built at version and returns its entry"""
+        entry = CachedResponse(version, self.etag(version), body, headers or {})
+        with self._lock:
+            current = self._entries.get(key)
+            # A slower request may finish after a newer body was cached
+            if current is None or current.version <= version:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def summary(self):
+        """Hit/miss counts, 304s sent and hit rate, as served by GET /stats/cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -7,41 +7,305 @@
 # Author: Janviere Munezero
 # Author: Monica Dhieu (modified for CORS support and changed port 8080 to 8090)
 # Date:   2025-09-28 (modified 2025-11-06)
-# Usage:  python3 server.py
+# Usage:  python3 server.py [--mode threaded|single] [--storage json|sqlite|mysql]
+#         [--sqlite-path PATH] [--sync write|group] [--group-window-ms MS]
+#         [--compact-every N] [--metrics]
 #--------------------------------------------------------------------------------
 
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
 import json
 import base64
-from urllib.parse import urlparse
+from datetime import datetime
+from itertools import islice
+from urllib.parse import urlparse, parse_qs, unquote
+import argparse
+import functools
+import time
+import threading
 
 # Path to JSON file that stores transaction data
+# (an .ndjson/.jsonl path is read and written as newline-delimited JSON)
 import os
+import sys
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_FILE = os.path.join(BASE_DIR, '..', 'data', 'processed', 'transactions.json')
 DATA_FILE = os.path.normpath(DATA_FILE)
 
+# Make the project root importable when run as a script from api/
+sys.path.insert(0, os.path.normpath(os.path.join(BASE_DIR, '..')))
+from dsa import transaction_io
+from dsa import snapshot
+from dsa import text_index
+from database import storage
+from api import store
+from api import journal
+from api import stats
+from api import response_cache
+from api import compression
+from api import metrics
+
+# Columnar snapshot written by parse_xml.py --snapshot, used at startup
+# when it is at least as new as DATA_FILE
+SNAPSHOT_FILE = snapshot.path_for(DATA_FILE)
+
+# Append-only journal of POST/PUT/DELETE changes not yet folded into DATA_FILE
+JOURNAL_FILE = os.path.splitext(DATA_FILE)[0] + '.journal'
+
+# Listen backlog for the servers below; socketserver's default of 5 makes
+# bursts of concurrent clients wait on TCP connect retries
+REQUEST_QUEUE_SIZE = 128
+
+class SingleHTTPServer(HTTPServer):
+    # Serves one request at a time.
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+class ThreadedHTTPServer(ThreadingHTTPServer):
+    # Serves each request on its own thread, so a slow full-list GET
+    # does not hold up other clients.
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+# A full GET /transactions over more records than this is streamed in
+# batches rather than serialized whole and kept in the response cache
+STREAM_MIN_RECORDS = 10000
+STREAM_BATCH_SIZE = 500
+# Response cache key of a streamed collection's compressed bodies; no
+# request path has a fragment, so it cannot clash with a cached response
+STREAM_CACHE_KEY = '/transactions#stream'
+
+# Most items accepted by one POST or DELETE /transactions/batch request
+MAX_BATCH_SIZE = 10000
+
+# Server classes run() can pick by name
+SERVER_MODES = {'threaded': ThreadedHTTPServer, 'single': SingleHTTPServer}
 
 # Authentication credentials
 USERNAME = 'admin'
 PASSWORD = 'password'
 
-def load_transactions():
-    # Load the list of transactions from the JSON file.
-    # If the file is missing or error occurs, returns empty list.
+def snapshot_is_current():
+    # True if the snapshot exists and the data file has not been written since.
+    try:
+        snapshot_mtime = os.path.getmtime(SNAPSHOT_FILE)
+    except OSError:
+        return False
+    try:
+        return snapshot_mtime >= os.path.getmtime(DATA_FILE)
+    except OSError:
+        return True
+
+def load_data_file():
+    # Load the data file into a TransactionStore indexed by TransactionID,
+    # memory-mapping the columnar snapshot when it is current (records are
+    # then built lazily on access), otherwise from the JSON or NDJSON file.
+    # If the file is missing or error occurs, returns an empty store.
+    if snapshot_is_current():
+        try:
+            return store.TransactionStore.from_snapshot(snapshot.SnapshotTable(SNAPSHOT_FILE))
+        except (OSError, ValueError):
+            pass
     try:
-        with open(DATA_FILE, 'r') as f:
-            return json.load(f)
+        return store.TransactionStore(transaction_io.iter_transactions_file(DATA_FILE))
     except Exception:
-        return []
+        return store.TransactionStore()
+
+def load_transactions():
+    # Load the data file, then replay the changes journaled since it was written.
+    transactions = load_data_file()
+    journal.replay(transactions, JOURNAL_FILE)
+    return transactions
 
 def save_transactions(transactions):
-    # Save the updated list of transactions back to the JSON file.
-    with open(DATA_FILE, 'w') as f:
-        json.dump(transactions, f, indent=4)
+    # Save the transactions to the data file, keeping its format (NDJSON or
+    # indented JSON array). Written to a temporary file and renamed into
+    # place, so a crash mid-write leaves the previous file intact.
+    tmp_file = DATA_FILE + '.tmp'
+    if transaction_io.is_ndjson_path(DATA_FILE):
+        transaction_io.write_ndjson(transactions, tmp_file)
+    else:
+        with open(tmp_file, 'w') as f:
+            json.dump(list(transactions), f, indent=4)
+    with open(tmp_file, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_file, DATA_FILE)
+
+def compact_transactions():
+    # Fold the journal into the data file. Under the write lock the current
+    # records are copied and the journal is moved aside; the data file (and
+    # the columnar snapshot, if one is kept) is then rewritten while requests
+    # continue, and the old journal is dropped.
+    with transactions.lock.write():
+        records = list(transactions)
+        transaction_journal.rotate()
+    save_transactions(records)
+    if os.path.exists(SNAPSHOT_FILE):
+        try:
+            snapshot.write_snapshot(records, SNAPSHOT_FILE)
+        except (TypeError, ValueError):
+            # A record the columnar format cannot hold; the snapshot is now
+            # older than the data file and is ignored at startup
+            pass
+    transaction_journal.finish_compaction()
 
 # Load transactions into memory for fast access during runtime.
+# Handlers hold transactions.lock.read() while reading it and
+# transactions.lock.write() while changing it and journaling the change.
 transactions = load_transactions()
+# Journal every change is appended to under the write lock; handlers then
+# wait for the entry to be durable before responding. run() replaces it
+# with one using its sync settings.
+transaction_journal = journal.Journal(JOURNAL_FILE)
+# Serialized list and /stats responses, keyed by request path and tagged with
+# the store version; see TransactionHandler.send_cached_json.
+cached_responses = response_cache.ResponseCache()
+# gzip/deflate totals for responses compressed per Accept-Encoding
+compression_stats = compression.CompressionStats()
+# Per-route latency, payload sizes and in-flight counts served at GET /metrics;
+# None unless run() is asked to collect them (server.py --metrics).
+request_metrics = None
+
+# GET /transactions query parameters: equality filters, and range filters
+# given as (low parameter, high parameter)
+EQUALITY_PARAMS = {'type': 'TransactionType', 'currency': 'Currency'}
+RANGE_PARAMS = {'Amount': ('min_amount', 'max_amount'), 'DateTime': ('start', 'end')}
+
+def parse_datetime_param(name, value, end_of_day):
+    # Accept 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' and return the stored format;
+    # a bare end date covers that whole day.
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD) or date and time") from None
+    if end_of_day and len(value) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59)
+    return parsed.strftime(storage.DATETIME_FORMAT)
+
+def parse_int_param(name, value, minimum=0):
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    if number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return number
+
+def parse_query(query_string):
+    # Parse GET /transactions query parameters into a dict with the filters
+    # for TransactionStore.select (equals, ranges, after), the page (offset,
+    # limit) and the fields to return (None for all).
+    # Raises ValueError for a malformed value.
+    params = {name: values[-1] for name, values in parse_qs(query_string).items()}
+    equals = {field: params[name] for name, field in EQUALITY_PARAMS.items() if name in params}
+    ranges = {}
+    for field, (low_name, high_name) in RANGE_PARAMS.items():
+        low, high = params.get(low_name), params.get(high_name)
+        if field == 'Amount':
+            try:
+                low = None if low is None else float(low)
+                high = None if high is None else float(high)
+            except ValueError:
+                raise ValueError(f"{low_name} and {high_name} must be numbers") from None
+        else:
+            low = None if low is None else parse_datetime_param(low_name, low, False)
+            high = None if high is None else parse_datetime_param(high_name, high, True)
+        if low is not None or high is not None:
+            ranges[field] = (low, high)
+    fields = None
+    if 'fields' in params:
+        fields = [field for field in params['fields'].split(',') if field]
+        if not fields:
+            raise ValueError("fields must name at least one field")
+    return {
+        'equals': equals,
+        'ranges': ranges,
+        'after': parse_int_param('after', params['after']) if 'after' in params else None,
+        'offset': parse_int_param('offset', params['offset']) if 'offset' in params else 0,
+        'limit': parse_int_param('limit', params['limit'], 1) if 'limit' in params else None,
+        'fields': fields,
+    }
+
+def parse_search_query(query_string):
+    # Parse GET /transactions/search parameters: parse_query()'s filters and
+    # paging plus 'terms', the words of q that every match must contain.
+    query = parse_query(query_string)
+    params = {name: values[-1] for name, values in parse_qs(query_string).items()}
+    query['terms'] = text_index.query_terms(params.get('q', ''))
+    if not query['terms']:
+        raise ValueError("q must contain at least one word")
+    return query
+
+# GET /stats/{name} -> stats.TransactionStats method answering it
+STATS_VIEWS = {'daily-volume': 'daily_volume', 'amount-buckets': 'amount_buckets', 'types': 'types'}
+
+def parse_stats_query(query_string):
+    # Parse the start/end parameters of the /stats endpoints into inclusive
+    # 'YYYY-MM-DD' days (None when not given). Raises ValueError if malformed.
+    params = {name: values[-1] for name, values in parse_qs(query_string).items()}
+    days = []
+    for name in ('start', 'end'):
+        if name not in params:
+            days.append(None)
+            continue
+        try:
+            days.append(datetime.fromisoformat(params[name]).strftime('%Y-%m-%d'))
+        except ValueError:
+            raise ValueError(f"{name} must be a date (YYYY-MM-DD)") from None
+    return days
+
+def account_timeline(phone, records):
+    # GET /users/{phone}/transactions body: the user's transactions in
+    # DateTime order and the BalanceAfterTransaction series they carry.
+    balances = [{'TransactionID': tx['TransactionID'], 'DateTime': tx.get('DateTime'),
+                 'BalanceAfterTransaction': tx['BalanceAfterTransaction']}
+                for tx in records if tx.get('BalanceAfterTransaction') is not None]
+    return {'PhoneNumber': phone, 'count': len(records), 'transactions': records, 'balance': balances}
+
+def project(tx, fields):
+    # Keep only the requested fields of a transaction.
+    return {field: tx[field] for field in fields if field in tx}
+
+def instrumented(handle):
+    # Wrap a do_* method so that, while request_metrics is collected, each
+    # request is counted in flight under its route, then its latency,
+    # Content-Length, response body size and status are recorded.
+    @functools.wraps(handle)
+    def wrapper(self):
+        collector = request_metrics
+        if collector is None:
+            return handle(self)
+        route = metrics.route_label(self.parse_path())
+        self.response_status = None
+        self.response_bytes = 0
+        collector.start(self.command, route)
+        start = time.perf_counter()
+        try:
+            return handle(self)
+        finally:
+            try:
+                request_bytes = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                request_bytes = 0
+            collector.finish(self.command, route, self.response_status, time.perf_counter() - start,
+                             request_bytes, self.response_bytes)
+    return wrapper
+
+def server_gauges():
+    # Totals kept by the store, response cache and compression, exported
+    # at GET /metrics next to the request metrics.
+    cache = cached_responses.summary()
+    compressed = compression_stats.summary()
+    gauges = [
+        ('response_cache_hits_total', 'counter', 'Responses served from the response cache.', cache['hits']),
+        ('response_cache_misses_total', 'counter', 'Response cache lookups that had to build the body.',
+         cache['misses']),
+        ('response_cache_not_modified_total', 'counter', '304 Not Modified responses sent.', cache['not_modified']),
+        ('compression_bytes_in_total', 'counter', 'Response bytes before compression.', compressed['bytes_in']),
+        ('compression_bytes_out_total', 'counter', 'Response bytes after compression.', compressed['bytes_out']),
+        ('compression_cpu_seconds_total', 'counter', 'CPU time spent compressing responses.',
+         compressed['cpu_ms'] / 1000),
+    ]
+    with transactions.lock.read():
+        gauges.append(('transactions', 'gauge', 'Transactions in the in-memory store.', len(transactions)))
+    return gauges
 
 class AuthHandlerMixin:
     # Mixin class providing authentication support.
@@ -80,19 +344,195 @@ class TransactionHandler(AuthHandlerMixin, BaseHTTPRequestHandler):
     # Request handler for implementing RESTful transaction endpoints with 
     # Basic Authentication and CORS.
 
-    def send_json_response(self, code, data):
-        # Send JSON response with HTTP status code and data object.
-        self.send_response(code)
+    # Status and body bytes of the response being sent, for request_metrics
+    response_status = None
+    response_bytes = 0
 
-        # Required headers for CORS allowing frontend access
-        self.send_header('Content-type', 'application/json')
+    def send_response(self, code, message=None):
+        # Send the status line, remembering the status for request_metrics.
+        self.response_status = code
+        super().send_response(code, message)
+
+    def send_json_response(self, code, data, headers=None):
+        # Send JSON response with HTTP status code, data object and any extra headers.
+        self.send_body(code, json.dumps(data).encode(), headers)
+
+    def send_cors_headers(self, headers=None):
+        # Required headers for CORS allowing frontend access, plus any extra
+        # headers, which are exposed to the frontend too
         self.send_header('Access-Control-Allow-Origin', '*')  # Allow all origins
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Authorization, Content-Type')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if headers:
+            self.send_header('Access-Control-Expose-Headers', ', '.join(headers))
+
+    def send_body(self, code, body, headers=None, cached=None):
+        # Send an already serialized JSON body with HTTP status code and extra
+        # headers. Bodies of at least compression.MIN_COMPRESS_SIZE bytes are
+        # gzip/deflate-compressed if Accept-Encoding allows; for a cached
+        # response (a response_cache.CachedResponse) the compressed bytes are
+        # kept on the entry and reused. Responses with an ETag always carry
+        # Vary, as the 304s revalidating them do.
+        encoding = None
+        compressible = len(body) >= compression.MIN_COMPRESS_SIZE
+        if compressible:
+            encoding = compression.negotiate(self.headers.get('Accept-Encoding'))
+        if encoding is not None:
+            if cached is not None:
+                body, reused = cached.encoded(encoding, compression_stats.compress)
+                if reused:
+                    compression_stats.record_reuse()
+            else:
+                body = compression_stats.compress(body, encoding)
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if compressible or (headers and 'ETag' in headers):
+            self.send_header('Vary', 'Accept-Encoding')
+        if encoding is not None:
+            self.send_header('Content-Encoding', encoding)
+        self.send_cors_headers(headers)
+        self.end_headers()
+
+        self.wfile.write(body)
+        self.response_bytes += len(body)
+
+    def send_not_modified_if_current(self, etag):
+        # Answer 304 if the request's If-None-Match holds etag; True if sent.
+        # It carries the ETag and Vary headers the 200 would have.
+        if not response_cache.etag_matches(self.headers.get('If-None-Match'), etag):
+            return False
+        cached_responses.record_not_modified()
+        self.send_response(304)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_cors_headers({'ETag': etag, 'Cache-Control': 'no-cache'})
+        self.end_headers()
+        return True
+
+    def send_json_stream(self, records, headers=None, cached=None):
+        # Send a JSON array of records serialized STREAM_BATCH_SIZE at a time,
+        # each batch written (and compressed, if Accept-Encoding allows) as
+        # soon as it is ready, so memory per request stays at about one batch
+        # and the first bytes go out at once. HTTP/1.1 clients get chunked
+        # transfer encoding; for HTTP/1.0 the body ends when the connection
+        # closes. The connection is closed after the response either way.
+        # With cached (a response_cache.CachedResponse for the store version
+        # records were taken at), the compressed body is kept on the entry
+        # as it is written, and later requests in the same encoding are sent
+        # those bytes instead of compressing the records again.
+        chunked = self.request_version == 'HTTP/1.1'
+        encoding = compression.negotiate(self.headers.get('Accept-Encoding'))
+        stored = None if encoding is None or cached is None else cached.stored(encoding)
+        if chunked:
+            # Only this connection's status line; it is closed afterwards
+            self.protocol_version = 'HTTP/1.1'
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Connection', 'close')
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding is not None:
+            self.send_header('Content-Encoding', encoding)
+        self.send_cors_headers(headers)
         self.end_headers()
 
-        self.wfile.write(json.dumps(data).encode())
+        def write(data):
+            if not data:
+                return
+            self.response_bytes += len(data)
+            if chunked:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            else:
+                self.wfile.write(data)
+        if stored is not None:
+            compression_stats.record_reuse()
+            write(stored)
+        elif encoding is None:
+            for piece in transaction_io.iter_json_array(records, STREAM_BATCH_SIZE):
+                write(piece.encode())
+        else:
+            compressor = compression_stats.stream(encoding)
+            kept = [] if cached is not None else None
+            for piece in transaction_io.iter_json_array(records, STREAM_BATCH_SIZE):
+                data = compressor.compress(piece.encode())
+                write(data)
+                if kept is not None:
+                    kept.append(data)
+            data = compressor.flush()
+            write(data)
+            if kept is not None:
+                kept.append(data)
+                cached.keep(encoding, b''.join(kept))
+        if chunked:
+            self.wfile.write(b'0\r\n\r\n')
+
+    def send_collection(self):
+        # GET /transactions without a query. Large collections are streamed
+        # (with an ETag, so revalidation still gets a 304), their compressed
+        # bodies cached per store version under STREAM_CACHE_KEY; smaller
+        # ones go through the response cache.
+        pool = self.storage_pool()
+        if pool is not None:
+            with pool.connection() as conn:
+                records = storage.fetch_transactions(conn)
+            self.send_json_stream(records)
+            return
+        with transactions.lock.read():
+            version = transactions.version
+            streamed = len(transactions) > STREAM_MIN_RECORDS
+            records = transactions.detach() if streamed else None
+        if not streamed:
+            self.send_cached_json(lambda: (self.get_all_transactions(), {}))
+            return
+        etag = cached_responses.etag(version)
+        if self.send_not_modified_if_current(etag):
+            return
+        cached = cached_responses.get(STREAM_CACHE_KEY, version)
+        if cached is None:
+            cached = cached_responses.put(STREAM_CACHE_KEY, version, None)
+        self.send_json_stream(records, {'ETag': etag, 'Cache-Control': 'no-cache'}, cached)
+
+    def send_cached_json(self, build):
+        # Send a GET response that depends only on the in-memory store.
+        # build() returns (data, extra headers). The serialized body is cached
+        # by request path under the store version read before building; a
+        # write during the build then only makes the entry look stale. A
+        # request whose If-None-Match holds the current ETag gets a 304.
+        if self.storage_pool() is not None:
+            # The database can change without the API knowing; never cache
+            data, headers = build()
+            self.send_json_response(200, data, headers)
+            return
+        version = transactions.version
+        if self.send_not_modified_if_current(cached_responses.etag(version)):
+            return
+        entry = cached_responses.get(self.path, version)
+        if entry is None:
+            data, headers = build()
+            entry = cached_responses.put(self.path, version, json.dumps(data).encode(), headers)
+        self.send_body(200, entry.body, dict(entry.headers, **{'ETag': entry.etag, 'Cache-Control': 'no-cache'}),
+                       cached=entry)
+
+    def send_metrics(self):
+        # GET /metrics: request_metrics and server_gauges() in the Prometheus
+        # text format, or 404 when the server runs without --metrics.
+        if request_metrics is None:
+            self.send_json_response(404, {"error": "Metrics are not collected; start the server with --metrics"})
+            return
+        body = request_metrics.render(server_gauges()).encode()
+        self.send_response(200)
+        self.send_header('Content-type', metrics.CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_cors_headers()
+        self.end_headers()
+        self.wfile.write(body)
+        self.response_bytes += len(body)
 
+    @instrumented
     def do_OPTIONS(self):
         # Handle preflight CORS OPTIONS request
         self.send_response(200)
@@ -108,22 +548,127 @@ class TransactionHandler(AuthHandlerMixin, BaseHTTPRequestHandler):
         path_parts = parsed.path.strip('/').split('/')
         return path_parts
 
+    def storage_pool(self):
+        # Connection pool GETs are served from, or None to serve the
+        # in-memory store (see run(storage_backend=...)).
+        return getattr(self.server, 'storage_pool', None)
+
+    def reject_if_read_only(self):
+        # Writes go through the data file; with a database backend the API
+        # is read-only and the database is filled by database/load_db.py.
+        if self.storage_pool() is None:
+            return False
+        self.send_json_response(405, {"error": "Read-only storage backend; load data with database/load_db.py"})
+        return True
+
     def get_transaction_by_id(self, tid):
         # Return transaction dict with matching TransactionID, or None if not found.
-        for tx in transactions:
-            if tx.get('TransactionID') == tid:
-                return tx
-        return None
+        pool = self.storage_pool()
+        if pool is not None:
+            with pool.connection() as conn:
+                return storage.fetch_transaction(conn, tid)
+        with transactions.lock.read():
+            return transactions.get(tid)
+
+    def get_all_transactions(self):
+        # Return a list of all transactions. The read lock is only held while
+        # copying references; records are replaced rather than changed in
+        # place, so serializing the copy needs no lock.
+        pool = self.storage_pool()
+        if pool is not None:
+            with pool.connection() as conn:
+                return storage.fetch_transactions(conn)
+        with transactions.lock.read():
+            return list(transactions)
+
+    def query_transactions(self, query):
+        # Return one page of transactions matching a parse_query() result,
+        # plus the cursor for the next page (None when this is the last).
+        # One extra match is fetched to tell whether another page follows.
+        limit = query['limit']
+        pool = self.storage_pool()
+        if pool is not None:
+            with pool.connection() as conn:
+                page = storage.select_transactions(
+                    conn, query['equals'], query['ranges'], query['after'],
+                    None if limit is None else limit + 1, query['offset'], query.get('terms'))
+        else:
+            with transactions.lock.read():
+                matches = transactions.select(query['equals'], query['ranges'], query['after'],
+                                              query.get('terms'))
+                stop = None if limit is None else query['offset'] + limit + 1
+                page = list(islice(matches, query['offset'], stop))
+        next_cursor = None
+        if limit is not None and len(page) > limit:
+            page = page[:limit]
+            next_cursor = page[-1]['TransactionID']
+        if query['fields'] is not None:
+            page = [project(tx, query['fields']) for tx in page]
+        return page, next_cursor
+
+    def get_stats(self, view, start, end):
+        # Return one dashboard aggregate (a STATS_VIEWS method name) for the
+        # inclusive day range. The in-memory store keeps them up to date on
+        # every write; a database backend aggregates them with a GROUP BY.
+        pool = self.storage_pool()
+        if pool is not None:
+            with pool.connection() as conn:
+                rows = storage.group_transactions(
+                    conn, [upper for _, upper in stats.AMOUNT_BUCKETS], start, end)
+            totals = stats.TransactionStats()
+            for row in rows:
+                totals.add_group(*row)
+            return getattr(totals, view)()
+        with transactions.lock.read():
+            return getattr(transactions.stats, view)(start, end)
+
+    def get_user_transactions(self, phone):
+        # Return the transactions a PhoneNumber takes part in, oldest first,
+        # from the store's participant index or with a join on the database.
+        pool = self.storage_pool()
+        if pool is not None:
+            with pool.connection() as conn:
+                return storage.user_transactions(conn, phone)
+        with transactions.lock.read():
+            return transactions.participant_transactions('PhoneNumber', phone)
 
+    @instrumented
     def do_GET(self):
         # Handle GET requests:
         # 'GET /transactions' returns list of all transactions.
+        # 'GET /transactions?type=...&limit=...' returns the matching page
+        # (see parse_query), with an X-Next-Cursor header if more follow.
+        # 'GET /transactions/search?q=...' returns the transactions whose
+        # MessageText or ReferenceNumber holds every word of q, paged and
+        # filtered the same way. Words match whole: part of a TxId finds nothing.
         # 'GET /transactions/{id}' returns specific transaction by ID.
+        # 'GET /users/{phone}/transactions' returns that user's transactions
+        # in DateTime order with their BalanceAfterTransaction series.
+        # 'GET /stats/{daily-volume|amount-buckets|types}?start=&end=' returns
+        # the dashboard aggregates.
+        # 'GET /stats/cache' returns the response cache's hit/miss counts and
+        # 'GET /stats/compression' the bytes saved by compression and its CPU cost.
+        # 'GET /metrics' returns the request metrics (server.py --metrics).
+        # List and /stats responses carry an ETag (see send_cached_json).
         if not self.authenticate():
             return
         path_parts = self.parse_path()
-        if len(path_parts) == 1 and path_parts[0] == 'transactions':
-            self.send_json_response(200, transactions)
+        query_string = urlparse(self.path).query
+        if path_parts in (['transactions'], ['transactions', 'search']):
+            search = len(path_parts) == 2
+            if not query_string and not search:
+                self.send_collection()
+                return
+            try:
+                query = parse_search_query(query_string) if search else parse_query(query_string)
+            except ValueError as e:
+                self.send_json_response(400, {"error": "Invalid query parameter", "details": str(e)})
+                return
+
+            def build_page():
+                page, next_cursor = self.query_transactions(query)
+                return page, {} if next_cursor is None else {'X-Next-Cursor': str(next_cursor)}
+            self.send_cached_json(build_page)
         elif len(path_parts) == 2 and path_parts[0] == 'transactions':
             try:
                 tid = int(path_parts[1])
@@ -135,35 +680,66 @@ class TransactionHandler(AuthHandlerMixin, BaseHTTPRequestHandler):
                 self.send_json_response(200, tx)
             else:
                 self.send_json_response(404, {"error": "Transaction not found"})
+        elif len(path_parts) == 3 and path_parts[0] == 'users' and path_parts[2] == 'transactions':
+            phone = unquote(path_parts[1])
+
+            def build_timeline():
+                records = self.get_user_transactions(phone)
+                return account_timeline(phone, records), {}
+            self.send_cached_json(build_timeline)
+        elif len(path_parts) == 2 and path_parts[0] == 'stats' and path_parts[1] in STATS_VIEWS:
+            try:
+                start, end = parse_stats_query(query_string)
+            except ValueError as e:
+                self.send_json_response(400, {"error": "Invalid query parameter", "details": str(e)})
+                return
+            view = STATS_VIEWS[path_parts[1]]
+            self.send_cached_json(lambda: (self.get_stats(view, start, end), {}))
+        elif path_parts == ['stats', 'cache']:
+            self.send_json_response(200, cached_responses.summary())
+        elif path_parts == ['stats', 'compression']:
+            self.send_json_response(200, compression_stats.summary())
+        elif path_parts == ['metrics']:
+            self.send_metrics()
         else:
             self.send_json_response(404, {"error": "Endpoint not found"})
 
+    @instrumented
     def do_POST(self):
         # Handle POST requests:
         # 'POST /transactions with JSON body' creates new transaction.
+        # 'POST /transactions/batch' creates many (see create_batch).
         if not self.authenticate():
             return
+        if self.reject_if_read_only():
+            return
         path_parts = self.parse_path()
-        if len(path_parts) == 1 and path_parts[0] == 'transactions':
+        if path_parts == ['transactions', 'batch']:
+            self.create_batch()
+        elif len(path_parts) == 1 and path_parts[0] == 'transactions':
             content_length = int(self.headers.get('Content-Length', 0))
             post_data = self.rfile.read(content_length)
             try:
                 new_tx = json.loads(post_data)
-                # Automatically assign new TransactionID if missing.
-                new_tx['TransactionID'] = max((tx['TransactionID'] for tx in transactions), default=0) + 1
-                transactions.append(new_tx)
-                save_transactions(transactions)
+                # Automatically assign new TransactionID (running max + 1).
+                with transactions.lock.write():
+                    transactions.add(new_tx)
+                    seq = transaction_journal.append(journal.put_entry(new_tx))
+                transaction_journal.wait_durable(seq)
                 self.send_json_response(201, new_tx)
             except Exception as e:
                 self.send_json_response(400, {"error": "Invalid JSON data", "details": str(e)})
         else:
             self.send_json_response(404, {"error": "Endpoint not found"})
 
+    @instrumented
     def do_PUT(self):
         # Handle PUT requests:
         # 'PUT /transactions/{id} with JSON body' updates existing transaction.
         if not self.authenticate():
             return
+        if self.reject_if_read_only():
+            return
         path_parts = self.parse_path()
         if len(path_parts) == 2 and path_parts[0] == 'transactions':
             try:
@@ -171,52 +747,195 @@ class TransactionHandler(AuthHandlerMixin, BaseHTTPRequestHandler):
             except ValueError:
                 self.send_json_response(400, {"error": "Invalid transaction ID"})
                 return
-            idx = next((i for i, tx in enumerate(transactions) if tx.get('TransactionID') == tid), None)
-            if idx is None:
+            with transactions.lock.read():
+                found = tid in transactions
+            if not found:
                 self.send_json_response(404, {"error": "Transaction not found"})
                 return
             content_length = int(self.headers.get('Content-Length', 0))
             put_data = self.rfile.read(content_length)
             try:
                 updated_tx = json.loads(put_data)
-                updated_tx['TransactionID'] = tid  # keep ID consistent
-                transactions[idx] = updated_tx
-                save_transactions(transactions)
+                with transactions.lock.write():
+                    # keeps ID consistent; None if deleted meanwhile
+                    found = transactions.replace(tid, updated_tx) is not None
+                    if found:
+                        seq = transaction_journal.append(journal.put_entry(updated_tx))
+                if not found:
+                    self.send_json_response(404, {"error": "Transaction not found"})
+                    return
+                transaction_journal.wait_durable(seq)
                 self.send_json_response(200, updated_tx)
             except Exception as e:
                 self.send_json_response(400, {"error": "Invalid JSON data", "details": str(e)})
         else:
             self.send_json_response(404, {"error": "Endpoint not found"})
 
+    def read_batch(self):
+        # Read a JSON array request body for the batch endpoints. Returns the
+        # list, or None after sending a 400/413 response.
+        content_length = int(self.headers.get('Content-Length', 0))
+        try:
+            items = json.loads(self.rfile.read(content_length))
+        except ValueError as e:
+            self.send_json_response(400, {"error": "Invalid JSON data", "details": str(e)})
+            return None
+        if not isinstance(items, list):
+            self.send_json_response(400, {"error": "Expected a JSON array"})
+            return None
+        if len(items) > MAX_BATCH_SIZE:
+            self.send_json_response(413, {"error": f"At most {MAX_BATCH_SIZE} items per batch"})
+            return None
+        return items
+
+    def send_batch_results(self, results, success_status):
+        # Send per-item results: success_status if every item succeeded, 207
+        # if only some did, 400 if none did.
+        succeeded = sum(1 for result in results if result['status'] == success_status)
+        if succeeded == len(results):
+            code = success_status
+        else:
+            code = 207 if succeeded else 400
+        self.send_json_response(code, {"succeeded": succeeded, "failed": len(results) - succeeded,
+                                       "results": results})
+
+    def create_batch(self):
+        # 'POST /transactions/batch' with a JSON array of transactions. All of
+        # them are added under one write lock, taking consecutive new IDs, and
+        # journaled with one write and fsync. Items that are not valid
+        # transactions are reported by index and the rest are still created.
+        items = self.read_batch()
+        if items is None:
+            return
+        results = []
+        entries = []
+        with transactions.lock.write():
+            for index, new_tx in enumerate(items):
+                if not isinstance(new_tx, dict):
+                    results.append({"index": index, "status": 400, "error": "Expected a JSON object"})
+                    continue
+                try:
+                    transactions.add(new_tx)
+                except (TypeError, ValueError) as e:
+                    results.append({"index": index, "status": 400, "error": str(e)})
+                    continue
+                results.append({"index": index, "status": 201, "transaction": new_tx})
+                entries.append(journal.put_entry(new_tx))
+            if entries:
+                seq = transaction_journal.append_many(entries)
+        if entries:
+            transaction_journal.wait_durable(seq)
+        self.send_batch_results(results, 201)
+
+    def delete_batch(self):
+        # 'DELETE /transactions/batch' with a JSON array of TransactionIDs,
+        # deleted under one write lock and journaled with one write and fsync.
+        # IDs that are invalid or not found are reported by index.
+        items = self.read_batch()
+        if items is None:
+            return
+        results = []
+        entries = []
+        with transactions.lock.write():
+            for index, tid in enumerate(items):
+                if not isinstance(tid, int) or isinstance(tid, bool):
+                    results.append({"index": index, "status": 400, "error": "Invalid transaction ID"})
+                elif transactions.delete(tid) is None:
+                    results.append({"index": index, "status": 404, "id": tid, "error": "Transaction not found"})
+                else:
+                    results.append({"index": index, "status": 200, "id": tid})
+                    entries.append(journal.delete_entry(tid))
+            if entries:
+                seq = transaction_journal.append_many(entries)
+        if entries:
+            transaction_journal.wait_durable(seq)
+        self.send_batch_results(results, 200)
+
+    @instrumented
     def do_DELETE(self):
         # Handle DELETE requests:
         # 'DELETE /transactions/{id}' deletes a transaction.
+        # 'DELETE /transactions/batch' deletes many (see delete_batch).
         if not self.authenticate():
             return
+        if self.reject_if_read_only():
+            return
         path_parts = self.parse_path()
-        if len(path_parts) == 2 and path_parts[0] == 'transactions':
+        if path_parts == ['transactions', 'batch']:
+            self.delete_batch()
+        elif len(path_parts) == 2 and path_parts[0] == 'transactions':
             try:
                 tid = int(path_parts[1])
             except ValueError:
                 self.send_json_response(400, {"error": "Invalid transaction ID"})
                 return
-            idx = next((i for i, tx in enumerate(transactions) if tx.get('TransactionID') == tid), None)
-            if idx is None:
+            with transactions.lock.write():
+                deleted_tx = transactions.delete(tid)
+                if deleted_tx is not None:
+                    seq = transaction_journal.append(journal.delete_entry(tid))
+            if deleted_tx is None:
                 self.send_json_response(404, {"error": "Transaction not found"})
                 return
-            deleted_tx = transactions.pop(idx)
-            save_transactions(transactions)
+            transaction_journal.wait_durable(seq)
             self.send_json_response(200, {"message": "Transaction deleted", "transaction": deleted_tx})
         else:
             self.send_json_response(404, {"error": "Endpoint not found"})
 
-def run(server_class=HTTPServer, handler_class=TransactionHandler, port=8090):
+def run(server_class=None, handler_class=TransactionHandler, port=8090, storage_backend=None, mode='threaded',
+        sync='write', group_window=journal.DEFAULT_GROUP_WINDOW, compact_every=journal.DEFAULT_COMPACT_ENTRIES,
+        collect_metrics=False):
     # Set up and run the server on specified port.
+    # mode picks the server class from SERVER_MODES unless server_class is given.
+    # With a storage backend (database.storage.SQLiteBackend or MySQLBackend)
+    # GET requests are answered by indexed queries against that database.
+    # Changes are journaled and fsynced per write (sync='write') or once per
+    # group_window seconds (sync='group'); a background thread folds the
+    # journal into the data file once it holds compact_every entries.
+    # With collect_metrics, per-route request metrics are served at GET /metrics.
+    global transaction_journal, request_metrics
+    transaction_journal = journal.Journal(JOURNAL_FILE, sync, group_window)
+    if collect_metrics:
+        request_metrics = metrics.RequestMetrics()
+    journal.Compactor(transaction_journal, compact_transactions, compact_every).start()
+    # A store opened from the snapshot builds its query indexes while serving
+    threading.Thread(target=transactions.build_indexes, daemon=True).start()
+    if server_class is None:
+        server_class = SERVER_MODES[mode]
     server_address = ('', port)
     httpd = server_class(server_address, handler_class)
-    print(f"Server started at http://localhost:{port}")
+    if storage_backend is not None:
+        httpd.storage_pool = storage.ConnectionPool(storage_backend)
+        print(f"Serving transactions from {storage_backend.describe()}")
+    print(f"Server started at http://localhost:{port} ({server_class.__name__})")
     httpd.serve_forever()
 
+def parse_args(argv):
+    # Parse command line options selecting where transactions are served from.
+    arg_parser = argparse.ArgumentParser(description='MoMo transactions REST API.')
+    arg_parser.add_argument('--port', type=int, default=8090)
+    arg_parser.add_argument('--mode', choices=sorted(SERVER_MODES), default='threaded',
+                            help='serve requests concurrently on threads, or one at a time')
+    arg_parser.add_argument('--storage', choices=['json'] + sorted(storage.BACKENDS), default='json',
+                            help='serve from the processed JSON file (read-write) or a database (read-only)')
+    arg_parser.add_argument('--sqlite-path', default=storage.DEFAULT_SQLITE_PATH,
+                            help='database file for --storage sqlite')
+    arg_parser.add_argument('--sync', choices=journal.SYNC_MODES, default='write',
+                            help='fsync the journal after every write, or once per group-commit window')
+    arg_parser.add_argument('--group-window-ms', type=float, default=journal.DEFAULT_GROUP_WINDOW * 1000,
+                            help='group-commit window for --sync group')
+    arg_parser.add_argument('--compact-every', type=int, default=journal.DEFAULT_COMPACT_ENTRIES,
+                            help='fold the journal into the data file once it holds this many entries')
+    arg_parser.add_argument('--metrics', action='store_true',
+                            help='collect per-route latency, payload size and in-flight metrics, served at GET /metrics')
+    return arg_parser.parse_args(argv)
+
 if __name__ == '__main__':
-    run()
+    args = parse_args(sys.argv[1:])
+    backend = None
+    if args.storage == 'sqlite':
+        backend = storage.SQLiteBackend(args.sqlite_path)
+    elif args.storage == 'mysql':
+        backend = storage.MySQLBackend()
+    run(port=args.port, storage_backend=backend, mode=args.mode, sync=args.sync,
+        group_window=args.group_window_ms / 1000, compact_every=args.compact_every, collect_metrics=args.metrics)
 
@@ -0,0 +1,127 @@
+#--------------------------------------------------------------------------------
+# Script Name: stats.py
+# Description: Dashboard aggregates for the REST API: transactions per day,
+#              counts per amount bucket and per transaction type. Totals are
+#              kept per day and adjusted as transactions are added, replaced
+#              and deleted, so a /stats request sums a few hundred days
+#              instead of re-reading every transaction.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  from api import stats
+#         totals = stats.TransactionStats()
+#         totals.add(*stats.record_keys(tx))
+#         totals.daily_volume('2024-05-01', '2024-05-31')
+#--------------------------------------------------------------------------------
+
+from datetime import datetime, timezone
+
+from dsa import range_index
+
+# (label, inclusive upper bound) of the dashboard's amount buckets; None is unbounded
+AMOUNT_BUCKETS = (
+    ('0-5,000', 5000),
+    ('5,001-10,000', 10000),
+    ('10,001-20,000', 20000),
+    ('20,001-50,000', 50000),
+    ('50,001+', None),
+)
+
+def amount_bucket(amount):
+    """Index into AMOUNT_BUCKETS for an amount, or None if it has no amount"""
+    if amount is None:
+        return None
+    for i, (_, upper) in enumerate(AMOUNT_BUCKETS):
+        if upper is None or amount <= upper:
+            return i
+
+def record_keys(tx):
+    """
+    (day, TransactionType, amount) a transaction is counted under: day is
+    'YYYY-MM-DD', or None without a valid DateTime; amount is None when
+    missing or not a number
+    """
+    date_time = tx.get('DateTime')
+    day = date_time[:10] if range_index.datetime_key(date_time) is not None else None
+    return day, tx.get('TransactionType'), range_index.amount_key(tx.get('Amount'))
+
+def epoch_day(epoch):
+    """'YYYY-MM-DD' for epoch seconds (as stored in the snapshot)"""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%d')
+
+class DayTotals:
+    """Count, amount total and per-bucket and per-type counts of one day"""
+
+    def __init__(self):
+        self.count = 0
+        self.amount = 0.0
+        self.buckets = [0] * len(AMOUNT_BUCKETS)
+        self.types = {}
+
+    def is_empty(self):
+        return self.count == 0
+
+class TransactionStats:
+    """
+    Running aggregates keyed by day. add() and remove() take the keys from
+    record_keys(); add_group() applies a pre-aggregated group, as returned
+    by a database GROUP BY.
+    """
+
+    def __init__(self):
+        # 'YYYY-MM-DD' (or None for no DateTime) -> DayTotals
+        self._days = {}
+
+    def add_group(self, day, tx_type, bucket, count, amount):
+        totals = self._days.get(day)
+        if totals is None:
+            totals = self._days[day] = DayTotals()
+        totals.count += count
+        totals.amount += amount
+        if bucket is not None:
+            totals.buckets[bucket] += count
+        type_count = totals.types.get(tx_type, 0) + count
+        if type_count:
+            totals.types[tx_type] = type_count
+        else:
+            del totals.types[tx_type]
+        if totals.is_empty():
+            del self._days[day]
+
+    def add(self, day, tx_type, amount):
+        self.add_group(day, tx_type, amount_bucket(amount), 1, amount or 0.0)
+
+    def remove(self, day, tx_type, amount):
+        self.add_group(day, tx_type, amount_bucket(amount), -1, -(amount or 0.0))
+
+    def _days_in(self, start=None, end=None):
+        # DayTotals of the days within the inclusive 'YYYY-MM-DD' bounds;
+        # transactions without a date only count when no bound is given
+        for day, totals in self._days.items():
+            if day is None:
+                if start is None and end is None:
+                    yield day, totals
+            elif (start is None or day >= start) and (end is None or day <= end):
+                yield day, totals
+
+    def daily_volume(self, start=None, end=None):
+        """[{'date', 'count', 'amount'}] per day with transactions, in date order"""
+        days = sorted((day, totals) for day, totals in self._days_in(start, end) if day is not None)
+        return [{'date': day, 'count': totals.count, 'amount': round(totals.amount, 2)}
+                for day, totals in days]
+
+    def amount_buckets(self, start=None, end=None):
+        """[{'bucket', 'count'}] in AMOUNT_BUCKETS order (transactions with an amount)"""
+        counts = [0] * len(AMOUNT_BUCKETS)
+        for _, totals in self._days_in(start, end):
+            for i, count in enumerate(totals.buckets):
+                counts[i] += count
+        return [{'bucket': label, 'count': count} for (label, _), count in zip(AMOUNT_BUCKETS, counts)]
+
+    def types(self, start=None, end=None):
+        """[{'type', 'count'}] per TransactionType, most frequent first (ties by name)"""
+        counts = {}
+        for _, totals in self._days_in(start, end):
+            for tx_type, count in totals.types.items():
+                counts[tx_type] = counts.get(tx_type, 0) + count
+        return [{'type': tx_type, 'count': count}
+                for tx_type, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))]
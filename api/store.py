@@ -0,0 +1,579 @@
+#--------------------------------------------------------------------------------
+# Script Name: store.py
+# Description: In-memory transaction store for the REST API.
+#              Keeps an insertion-ordered TransactionID -> record index and a
+#              running maximum ID, so lookups, updates, deletes and new-ID
+#              assignment cost O(1) instead of scanning the whole list.
+#              A reader/writer lock lets concurrent requests read together
+#              while writes get exclusive access. Equality indexes over
+#              TransactionType and Currency, and sorted indexes over Amount
+#              and DateTime, answer filtered and range queries without
+#              scanning every record; stats.TransactionStats keeps the
+#              dashboard aggregates up to date the same way. An inverted
+#              index over MessageText and ReferenceNumber answers word
+#              searches, and a posting index from each participant's
+#              PhoneNumber and UserID to their transactions answers
+#              per-account history requests. A store opened from a snapshot
+#              starts with only its ID index; build_indexes() builds the
+#              rest, and queries scan the records until it has.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  from api import store
+#         transactions = store.TransactionStore(records)
+#--------------------------------------------------------------------------------
+
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+import math
+import threading
+
+from api import stats
+from dsa import range_index
+from dsa import snapshot
+from dsa import text_index
+
+# Fields with an equality index (value -> IDs), usable as query filters
+EQUALITY_FIELDS = ('TransactionType', 'Currency')
+# Fields with a sorted index (range_index.SortedIndex), usable as range filters
+RANGE_FIELDS = ('Amount', 'DateTime')
+# Participant fields with a posting index (value -> IDs of their transactions)
+PARTICIPANT_FIELDS = ('PhoneNumber', 'UserID')
+# Index group -> the attribute holding it. from_snapshot() leaves every
+# group unbuilt; build_indexes() builds them in this order, cheapest first
+INDEX_GROUPS = {
+    'stats': '_stats',
+    'equality': '_by_value',
+    'range': '_by_range',
+    'participants': '_by_participant',
+    'text': '_text',
+}
+
+class ReadWriteLock:
+    """
+    Many readers or one writer. Waiting writers block new readers, so a
+    steady stream of GETs cannot starve POST/PUT/DELETE
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+class SortedIdSet:
+    """
+    Set of TransactionIDs iterable in ascending order from any starting ID.
+    IDs are kept in a sorted list; removed IDs stay there until they make up
+    half of it, so adding the next-highest ID and removing any ID are O(1)
+    amortized, and seeking to a cursor is a binary search.
+    """
+
+    def __init__(self, ids=()):
+        self._live = set(ids)
+        self._sorted = sorted(self._live)
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, tid):
+        return tid in self._live
+
+    def add(self, tid):
+        if tid in self._live:
+            return
+        self._live.add(tid)
+        if not self._sorted or tid > self._sorted[-1]:
+            self._sorted.append(tid)
+            return
+        # The ID may still be in the list from before it was removed
+        i = bisect_left(self._sorted, tid)
+        if i == len(self._sorted) or self._sorted[i] != tid:
+            self._sorted.insert(i, tid)
+
+    def discard(self, tid):
+        if tid not in self._live:
+            return
+        self._live.discard(tid)
+        if len(self._sorted) > 2 * len(self._live) + 16:
+            self._sorted = [i for i in self._sorted if i in self._live]
+
+    def iter_from(self, after=None):
+        """Yields the IDs greater than after (all IDs if None) in ascending order"""
+        start = 0 if after is None else bisect_right(self._sorted, after)
+        for i in range(start, len(self._sorted)):
+            tid = self._sorted[i]
+            if tid in self._live:
+                yield tid
+
+class TransactionStore:
+    """
+    Transactions indexed by TransactionID, iterated in insertion order.
+    Records loaded from a snapshot are held as row numbers and built from
+    the memory-mapped table when accessed. Callers sharing a store between
+    threads hold lock.read() or lock.write() around each access.
+    """
+
+    def __init__(self, transactions=(), table=None):
+        self.lock = ReadWriteLock()
+        # TransactionID -> record dict, or row number in table
+        self._records = {}
+        self._table = table
+        self.max_id = 0
+        # Incremented by every change, so cached responses can tell they are stale
+        self.version = 0
+        # Every TransactionID, for ID-ordered queries and cursors
+        self._ids = SortedIdSet()
+        # field -> value -> SortedIdSet of the transactions holding it
+        self._by_value = {field: {} for field in EQUALITY_FIELDS}
+        # field -> SortedIndex of (key, TransactionID); DateTime keys are epoch seconds
+        self._by_range = {field: range_index.SortedIndex() for field in RANGE_FIELDS}
+        # Per-day aggregates served by the /stats endpoints
+        self._stats = stats.TransactionStats()
+        # Word -> TransactionIDs over text_index.TEXT_FIELDS
+        self._text = text_index.InvertedIndex()
+        # field -> participant value -> SortedIndex of (DateTime key, TransactionID)
+        # of their transactions; see _timeline_key
+        self._by_participant = {field: {} for field in PARTICIPANT_FIELDS}
+        # INDEX_GROUPS not kept up to date yet; writes leave them alone
+        self._unbuilt = set()
+        # IDs written while build_indexes() builds a group from a copy of the records
+        self._touched = None
+        self._build_lock = threading.Lock()
+        for tx in transactions:
+            self._load(tx)
+
+    @classmethod
+    def from_snapshot(cls, table):
+        """
+        Indexes a snapshot.SnapshotTable by its TransactionID column without
+        building records. The other indexes are left to build_indexes().
+        """
+        store = cls(table=table)
+        ids = table.column('TransactionID')
+        store._records = dict(zip(ids, range(len(ids))))
+        store.max_id = max(ids, default=0)
+        store._ids = SortedIdSet(ids)
+        store._unbuilt = set(INDEX_GROUPS)
+        return store
+
+    def build_indexes(self):
+        """
+        Builds the index groups from_snapshot() left out, one at a time, and
+        returns once all are in place. Meant to run in a background thread:
+        the records are copied under the read lock, each group is built from
+        the copy without holding the lock, and the writes made meanwhile are
+        applied to it under the write lock as it is put in place.
+        """
+        with self._build_lock:
+            for group, attribute in INDEX_GROUPS.items():
+                if group not in self._unbuilt:
+                    continue
+                with self.lock.read():
+                    items = list(self._records.items())
+                    self._touched = set()
+                index = self._build_index(group, items)
+                with self.lock.write():
+                    setattr(self, attribute, index)
+                    self._unbuilt.discard(group)
+                    copied = dict(items) if self._touched else {}
+                    for tid in self._touched:
+                        if tid in copied:
+                            self._unindex(tid, self._index_keys(copied[tid], (group,)))
+                        if tid in self._records:
+                            self._index(tid, self._index_keys(self._records[tid], (group,)))
+                    self._touched = None
+
+    def _build_index(self, group, items):
+        # A new index of one group over (TransactionID, stored value) pairs
+        if group == 'stats':
+            index = stats.TransactionStats()
+            for _, value in items:
+                index.add(*self._stats_keys(value))
+            return index
+        if group == 'text':
+            return text_index.InvertedIndex((tid, self._tokens(value)) for tid, value in items)
+        entries = {}
+        for tid, value in items:
+            keys = self._index_keys(value, (group,))[group]
+            if group == 'equality':
+                for field, key in keys:
+                    entries.setdefault((field, key), []).append(tid)
+            elif group == 'range':
+                for field, key in keys:
+                    if key is not None:
+                        entries.setdefault(field, []).append((key, tid))
+            else:
+                participants, timeline = keys
+                for key in participants:
+                    entries.setdefault(key, []).append((timeline, tid))
+        if group == 'range':
+            return {field: range_index.SortedIndex(entries.get(field, ())) for field in RANGE_FIELDS}
+        index = {field: {} for field in (EQUALITY_FIELDS if group == 'equality' else PARTICIPANT_FIELDS)}
+        for (field, key), values in entries.items():
+            index[field][key] = SortedIdSet(values) if group == 'equality' else range_index.SortedIndex(values)
+        return index
+
+    def _current(self, group):
+        # The index of group, built from the records now if build_indexes() has not put it in place
+        if group in self._unbuilt:
+            return self._build_index(group, self._records.items())
+        return getattr(self, INDEX_GROUPS[group])
+
+    @property
+    def stats(self):
+        """stats.TransactionStats of the stored transactions"""
+        return self._current('stats')
+
+    def _load(self, tx):
+        # Records read from the data file keep their IDs; one without an ID gets the next free one
+        tid = tx.get('TransactionID')
+        if tid is None:
+            tid = tx['TransactionID'] = self.max_id + 1
+        self._store(tid, tx)
+
+    def _resolve(self, value):
+        return self._table[value] if isinstance(value, int) else value
+
+    def _field(self, value, field):
+        # One field of a stored record; snapshot rows are read from the column
+        if isinstance(value, int):
+            return self._table.dictionary(field)[self._table.column(field)[value]]
+        return value.get(field)
+
+    @staticmethod
+    def _column_key(field):
+        # Index key for a snapshot column value: NaN / NULL_EPOCH are missing
+        if field == 'Amount':
+            return lambda value: None if math.isnan(value) else value
+        return lambda value: None if value == snapshot.NULL_EPOCH else value
+
+    def _range_key(self, value, field):
+        # Index key of one field of a stored record
+        if isinstance(value, int):
+            return self._column_key(field)(self._table.column(field)[value])
+        return range_index.KEY_FUNCTIONS[field](value.get(field))
+
+    def _store(self, tid, tx):
+        # Stores tx under tid, moving it between index entries if it replaces a record.
+        # Every index key of both records is computed first, so a record that
+        # cannot be indexed raises before anything changes
+        groups = [group for group in INDEX_GROUPS if group not in self._unbuilt]
+        keys = self._index_keys(tx, groups)
+        old = self._records.get(tid)
+        if old is not None:
+            old_keys = self._index_keys(old, groups)
+            # Only the words that differ from the old record's move
+            if 'text' in keys:
+                old_keys['text'], keys['text'] = old_keys['text'] - keys['text'], keys['text'] - old_keys['text']
+            self._unindex(tid, old_keys)
+        self._records[tid] = tx
+        self.version += 1
+        self.max_id = max(self.max_id, tid)
+        self._ids.add(tid)
+        if self._touched is not None:
+            self._touched.add(tid)
+        self._index(tid, keys)
+
+    def _index_keys(self, value, groups=tuple(INDEX_GROUPS)):
+        # The keys a stored record (dict or snapshot row) is indexed under in
+        # each of groups. Equality values are hashed even when that group is
+        # not asked for, so an unhashable one raises TypeError
+        equality = [(field, self._field(value, field)) for field in EQUALITY_FIELDS]
+        for _, key in equality:
+            hash(key)
+        ranges = [(field, self._range_key(value, field)) for field in RANGE_FIELDS]
+        keys = {}
+        if 'equality' in groups:
+            keys['equality'] = equality
+        if 'range' in groups:
+            keys['range'] = ranges
+        if 'participants' in groups:
+            keys['participants'] = (self._participant_keys(value), self._timeline_key(dict(ranges)['DateTime']))
+        if 'text' in groups:
+            keys['text'] = self._tokens(value)
+        if 'stats' in groups:
+            keys['stats'] = self._stats_keys(value)
+        return keys
+
+    def _index(self, tid, keys):
+        # Adds tid to the entries of _index_keys()
+        for field, key in keys.get('equality', ()):
+            self._by_value[field].setdefault(key, SortedIdSet()).add(tid)
+        for field, key in keys.get('range', ()):
+            if key is not None:
+                self._by_range[field].add(key, tid)
+        if 'participants' in keys:
+            participants, timeline = keys['participants']
+            for field, value in participants:
+                self._by_participant[field].setdefault(value, range_index.SortedIndex()).add(timeline, tid)
+        if 'text' in keys:
+            self._text.add(tid, keys['text'])
+        if 'stats' in keys:
+            self._stats.add(*keys['stats'])
+
+    def _unindex(self, tid, keys):
+        # Removes tid from the entries of _index_keys()
+        for field, key in keys.get('equality', ()):
+            index = self._by_value[field]
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(tid)
+                if not ids:
+                    del index[key]
+        for field, key in keys.get('range', ()):
+            if key is not None:
+                self._by_range[field].remove(key, tid)
+        if 'participants' in keys:
+            participants, timeline = keys['participants']
+            for field, value in participants:
+                index = self._by_participant[field]
+                entries = index.get(value)
+                if entries is not None:
+                    entries.remove(timeline, tid)
+                    if not entries:
+                        del index[value]
+        if 'text' in keys:
+            self._text.remove(tid, keys['text'])
+        if 'stats' in keys:
+            self._stats.remove(*keys['stats'])
+
+    def _stats_keys(self, value):
+        # stats.record_keys() of a stored record, read from the columns for a snapshot row
+        if not isinstance(value, int):
+            return stats.record_keys(value)
+        epoch = self._range_key(value, 'DateTime')
+        day = None if epoch is None else stats.epoch_day(epoch)
+        return day, self._field(value, 'TransactionType'), self._range_key(value, 'Amount')
+
+    def _participant_keys(self, value):
+        # (field, value) pairs of a stored record's participants; values that
+        # are not strings or integers are left out of the index
+        if isinstance(value, int):
+            participants = self._table.heap_value('Participants', value)
+        else:
+            participants = value.get('Participants')
+        keys = set()
+        if isinstance(participants, list):
+            for participant in participants:
+                if not isinstance(participant, dict):
+                    continue
+                for field in PARTICIPANT_FIELDS:
+                    key = participant.get(field)
+                    if isinstance(key, (str, int)) and not isinstance(key, bool):
+                        keys.add((field, key))
+        return keys
+
+    @staticmethod
+    def _timeline_key(epoch):
+        # Participant index key: DateTime epoch seconds, undated transactions last
+        return math.inf if epoch is None else epoch
+
+    def _tokens(self, value):
+        # text_index.record_tokens() of a stored record, read from the heap for a snapshot row
+        if not isinstance(value, int):
+            return text_index.record_tokens(value)
+        tokens = set()
+        for field in text_index.TEXT_FIELDS:
+            tokens.update(text_index.tokenize(self._table.heap_value(field, value)))
+        return frozenset(tokens)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        for value in self._records.values():
+            yield self._resolve(value)
+
+    def detach(self):
+        """
+        Iterator over the current transactions that can be consumed after the
+        lock is released. Only references are copied under the lock; records
+        held as snapshot rows are built as the iterator reaches them.
+        """
+        values = list(self._records.values())
+        return (self._resolve(value) for value in values)
+
+    def __contains__(self, tid):
+        return tid in self._records
+
+    def get(self, tid):
+        """Returns the transaction with this TransactionID, or None"""
+        value = self._records.get(tid)
+        return None if value is None else self._resolve(value)
+
+    def put(self, tx):
+        """
+        Stores tx under its own TransactionID, replacing any record with that
+        ID in place (used when replaying the journal). Returns tx.
+        """
+        self._store(tx['TransactionID'], tx)
+        return tx
+
+    def add(self, tx):
+        """Assigns the next TransactionID to tx, appends it and returns it"""
+        tx['TransactionID'] = self.max_id + 1
+        self._store(tx['TransactionID'], tx)
+        return tx
+
+    def replace(self, tid, tx):
+        """
+        Replaces the transaction with this ID in place, keeping its position.
+        Returns the stored record, or None if there is no such transaction.
+        """
+        if tid not in self._records:
+            return None
+        tx['TransactionID'] = tid
+        self._store(tid, tx)
+        return tx
+
+    def delete(self, tid):
+        """Removes and returns the transaction with this ID, or None"""
+        if tid not in self._records:
+            return None
+        keys = self._index_keys(self._records[tid], [group for group in INDEX_GROUPS if group not in self._unbuilt])
+        value = self._records.pop(tid)
+        self.version += 1
+        self._unindex(tid, keys)
+        self._ids.discard(tid)
+        if self._touched is not None:
+            self._touched.add(tid)
+        removed = self._resolve(value)
+        # Keep max_id equal to the largest remaining ID, so the next new
+        # transaction gets max + 1 as before. IDs are usually dense, so
+        # stepping down finds it at once; a wide gap falls back to a scan
+        if tid == self.max_id:
+            for _ in range(len(self._records)):
+                self.max_id -= 1
+                if self.max_id in self._records:
+                    break
+            else:
+                self.max_id = max(self._records, default=0)
+        return removed
+
+    def range_ids(self, field, low=None, high=None):
+        """
+        TransactionIDs whose field lies within the inclusive bounds, in key
+        order, from the sorted index: O(log n + k). Bounds are given in
+        record units ('YYYY-MM-DD HH:MM:SS' strings for DateTime).
+        """
+        low, high = self._range_bounds(field, low, high)
+        return self._current('range')[field].range(low, high)
+
+    def participant_transactions(self, field, value):
+        """
+        Transactions with a participant whose field (PARTICIPANT_FIELDS) is
+        value, oldest DateTime first (ties by ID, undated ones last). The
+        posting index is kept in that order, so this is O(log n + k).
+        """
+        timeline = self._current('participants')[field].get(value)
+        if timeline is None:
+            return []
+        return [self._resolve(self._records[tid]) for tid in timeline.range()]
+
+    def _range_bounds(self, field, low, high):
+        key = range_index.KEY_FUNCTIONS[field]
+        bounds = []
+        for bound in (low, high):
+            if bound is not None and key(bound) is None:
+                raise ValueError(f"Invalid {field} bound: {bound!r}")
+            bounds.append(None if bound is None else key(bound))
+        return bounds
+
+    def select(self, equals=None, ranges=None, after=None, terms=None):
+        """
+        Yields the transactions matching every filter in TransactionID order.
+        equals maps EQUALITY_FIELDS to a value; ranges maps RANGE_FIELDS to
+        inclusive (low, high) bounds in record units, either of which may be
+        None. The smallest candidate set among the matching equality entries
+        and the index ranges is walked and the other filters are checked per
+        record. Only IDs greater than after are returned, for keyset paging.
+        terms (from text_index.query_terms) keeps the records whose text
+        holds every term; the inverted index's matches are walked then.
+        """
+        equals = equals or {}
+        ranges = {field: self._range_bounds(field, low, high)
+                  for field, (low, high) in (ranges or {}).items()}
+        if terms is not None:
+            if 'text' in self._unbuilt:
+                # No index yet: check the words of every record
+                terms = set(terms)
+                ids = (tid for tid in self._ids.iter_from(after)
+                       if terms and terms <= self._tokens(self._records[tid]))
+            else:
+                ids = self._text.search(terms, after)
+            yield from self._filter(ids, equals, ranges)
+            return
+        candidates = self._ids
+        range_field = None
+        # Filters whose index is not built yet are only checked per record
+        if 'equality' not in self._unbuilt:
+            for field, value in equals.items():
+                if field not in self._by_value:
+                    continue
+                ids = self._by_value[field].get(value)
+                if ids is None:
+                    return
+                if len(ids) < len(candidates):
+                    candidates = ids
+        size = len(candidates)
+        if 'range' not in self._unbuilt:
+            for field, (low, high) in ranges.items():
+                count = self._by_range[field].count(low, high)
+                if count < size:
+                    range_field, size = field, count
+        if range_field is not None:
+            # Range matches come in key order; sort the k IDs for ID order
+            low, high = ranges[range_field]
+            ids = sorted(tid for tid in self._by_range[range_field].range(low, high)
+                         if after is None or tid > after)
+        else:
+            ids = candidates.iter_from(after)
+        yield from self._filter(ids, equals, ranges)
+
+    def _filter(self, ids, equals, ranges):
+        # The records of ids that match every equality and range filter. The
+        # filters are checked on the index keys, so a snapshot row is only
+        # built once it matches
+        for tid in ids:
+            value = self._records[tid]
+            if any(self._field(value, field) != expected for field, expected in equals.items()):
+                continue
+            if not all(in_range(self._range_key(value, field), low, high)
+                       for field, (low, high) in ranges.items()):
+                continue
+            yield self._resolve(value)
+
+def in_range(key, low, high):
+    """True if an index key lies within the inclusive bounds (None means unbounded)"""
+    if key is None:
+        return False
+    return (low is None or key >= low) and (high is None or key <= high)
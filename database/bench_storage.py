@@ -0,0 +1,94 @@
+#--------------------------------------------------------------------------------
+# Script Name: bench_storage.py
+# Description: Compares the storage backends: bulk-load throughput and the
+#              GET queries the API issues (one transaction by ID, and the
+#              full collection). SQLite runs in a temporary file; MySQL is
+#              only benchmarked with --mysql and loads into the DB_CONFIG
+#              database, so point that at a scratch database.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 bench_storage.py [--records N] [--lookups N] [--mysql]
+#--------------------------------------------------------------------------------
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+from dsa import transaction_io
+from database import load_db
+from database import storage
+
+def scaled_transactions(source_json, records):
+    """
+    Yields `records` loadable transactions by cycling the processed sample.
+    Each copy gets a distinct ReferenceNumber and MessageText, so the
+    idempotent loader does not deduplicate the copies away.
+    """
+    sample = list(load_db.drop_incomplete(transaction_io.iter_transactions_file(source_json), []))
+    for i in range(records):
+        tx = dict(sample[i % len(sample)])
+        tx['TransactionID'] = i + 1
+        if tx.get('ReferenceNumber'):
+            tx['ReferenceNumber'] = f"{tx['ReferenceNumber']}-{i}"
+        tx['MessageText'] = f"{tx['MessageText']} #{i}"
+        yield tx
+
+def bench_backend(backend, transactions, lookups, batch_size):
+    """Returns (load seconds, seconds per ID lookup, seconds for the full list)"""
+    conn = backend.connect()
+    start = time.perf_counter()
+    loaded, _, _ = load_db.bulk_load(conn, transactions, batch_size)
+    load_seconds = time.perf_counter() - start
+    assert loaded == len(transactions), f"{backend.name} loaded {loaded} of {len(transactions)}"
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(TransactionID), MAX(TransactionID) FROM Transaction")
+    low, high = cursor.fetchone()
+    cursor.close()
+    ids = [random.randint(low, high) for _ in range(lookups)]
+    start = time.perf_counter()
+    for tid in ids:
+        storage.fetch_transaction(conn, tid)
+    lookup_seconds = (time.perf_counter() - start) / lookups
+
+    start = time.perf_counter()
+    storage.fetch_transactions(conn)
+    list_seconds = time.perf_counter() - start
+    conn.close()
+    return load_seconds, lookup_seconds, list_seconds
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark the MySQL and SQLite storage backends.')
+    arg_parser.add_argument('--source', default='../data/processed/transactions.json')
+    arg_parser.add_argument('--records', type=int, default=20000)
+    arg_parser.add_argument('--lookups', type=int, default=1000)
+    arg_parser.add_argument('--batch-size', type=int, default=load_db.DEFAULT_BATCH_SIZE)
+    arg_parser.add_argument('--mysql', action='store_true',
+                            help='also benchmark MySQL (writes into the DB_CONFIG database)')
+    args = arg_parser.parse_args()
+
+    random.seed(0)
+    transactions = list(scaled_transactions(args.source, args.records))
+    print(f"Records: {len(transactions)}, lookups: {args.lookups}")
+    print(f"{'backend':>8} {'load s':>8} {'rows/s':>9} {'by ID ms':>9} {'list s':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backends = [storage.SQLiteBackend(os.path.join(tmp_dir, 'bench.sqlite3'))]
+        if args.mysql:
+            backends.append(storage.MySQLBackend(load_db.DB_CONFIG))
+        for backend in backends:
+            try:
+                load_seconds, lookup_seconds, list_seconds = bench_backend(
+                    backend, transactions, args.lookups, args.batch_size)
+            except storage.StorageError as err:
+                print(f"{backend.name:>8} skipped: {err}")
+                continue
+            print(f"{backend.name:>8} {load_seconds:>8.2f} {len(transactions) / load_seconds:>9.0f} "
+                  f"{lookup_seconds * 1000:>9.3f} {list_seconds:>8.3f}")
+
+if __name__ == '__main__':
+    main()
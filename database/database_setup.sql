@@ -53,6 +53,7 @@ CREATE TABLE Transaction (
     Status ENUM('confirmed', 'failed', 'pending') NOT NULL COMMENT 'Transaction status',
     MessageText TEXT COMMENT 'Full original SMS message content',
     CategoryID INT COMMENT 'Category for transaction',
+    ContentHash CHAR(64) COMMENT 'SHA-256 of the transaction content, set by the loader when ReferenceNumber is NULL',
     FOREIGN KEY (CategoryID) REFERENCES TransactionCategory(CategoryID)
 ) COMMENT='Mobile money transaction records';
 
@@ -67,6 +68,11 @@ INSERT INTO Transaction (TransactionType, Amount, Currency, DateTime, ReferenceN
 -- Index date and time for query performance
 CREATE INDEX idx_transaction_datetime ON Transaction(DateTime);
 
+-- Unique keys the loader deduplicates on, so reloading the same data adds no rows
+-- (NULLs are not compared, so each transaction sets exactly one of the two)
+CREATE UNIQUE INDEX uq_transaction_reference ON Transaction(ReferenceNumber);
+CREATE UNIQUE INDEX uq_transaction_contenthash ON Transaction(ContentHash);
+
 
 -- Participants(Transaction) Table
 CREATE TABLE TransactionParticipant (
@@ -78,6 +84,11 @@ CREATE TABLE TransactionParticipant (
     FOREIGN KEY (UserID) REFERENCES User(UserID)
 ) COMMENT='Participants involved in each transaction';
 
+-- Index participants by transaction for fetching a transaction's participants
+CREATE INDEX idx_participant_transaction ON TransactionParticipant(TransactionID);
+-- Index participants by user for fetching a user's transactions
+CREATE INDEX idx_participant_user ON TransactionParticipant(UserID);
+
 -- Insert sample data into TransactionParticipant
 INSERT INTO TransactionParticipant (TransactionID, UserID, Role) VALUES
 (1, 4, 'sender'),
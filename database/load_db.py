@@ -1,38 +1,62 @@
 #--------------------------------------------------------------------------------
 # Script Name: load_db.py
-# Description: Loads parsed transaction JSON data into MySQL database
+# Description: Loads parsed transaction JSON (or NDJSON) data into the MySQL
+#              database, or an embedded SQLite database with --backend sqlite
 # Author: Monica Dhieu
 # Date:   2025-09-27
-# Usage:  python3 load_db.py [input_json_path]
+# Usage:  python3 load_db.py [input_json_path] [--bulk] [--batch-size N]
+#         [--backend mysql|sqlite] [--sqlite-path PATH]
+#         [--category-cache-size N] [--user-cache-size N] [--metrics [--metrics-log PATH] [--metrics-db]]
 #--------------------------------------------------------------------------------
 
-import mysql.connector
-from mysql.connector import errorcode
+from collections import OrderedDict
+from itertools import islice
+import argparse
+import hashlib
 import json
 import sys
+import os
+import time
 
-# Connection credentials
-DB_CONFIG = {
-    'user': 'your_user',
-    'password': 'your_password',
-    'host': 'localhost',
-    'database': 'momo_db',
-    'raise_on_warnings': True
-}
-
-def connect_db():
-    """Connects to MySQL database"""
+# Make the project root importable when run as a script from database/
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+from dsa import transaction_io
+from dsa import etl_metrics
+from database import storage
+
+# Transactions per executemany/commit in bulk mode
+DEFAULT_BATCH_SIZE = 1000
+# Default LRU cache sizes for CategoryName -> CategoryID and PhoneNumber -> UserID
+DEFAULT_CATEGORY_CACHE_SIZE = 256
+DEFAULT_USER_CACHE_SIZE = 100000
+# Fields the Transaction table declares NOT NULL
+REQUIRED_FIELDS = ('TransactionType', 'Amount', 'Currency', 'DateTime', 'Status')
+# Stages timed with --metrics
+ETL_STAGES = ('read', 'resolve', 'insert', 'commit')
+# Fields hashed to identify a transaction that has no ReferenceNumber
+CONTENT_HASH_FIELDS = ('TransactionType', 'Amount', 'Currency', 'DateTime',
+                       'BalanceAfterTransaction', 'Status', 'MessageText')
+
+# Rows whose unique key (ReferenceNumber or ContentHash) is already stored
+# are skipped rather than failing the statement (INSERT OR IGNORE on SQLite),
+# so a transaction another session stores after filter_new() is not duplicated
+INSERT_TRANSACTION = """INSERT IGNORE INTO Transaction 
+    (TransactionType, Amount, Currency, DateTime, ReferenceNumber, BalanceAfterTransaction, Status, MessageText, CategoryID, ContentHash)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)"""
+
+# Connection credentials for the default MySQL backend
+DB_CONFIG = storage.MYSQL_CONFIG
+
+def connect_db(backend=None):
+    """Connects to the storage backend (the MySQL database by default)"""
+    if backend is None:
+        backend = storage.MySQLBackend(DB_CONFIG)
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        print("Connected to MySQL database")
+        conn = backend.connect()
+        print(f"Connected to {backend.describe()}")
         return conn
-    except mysql.connector.Error as err:
-        if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
-            print("Access denied: check your username or password")
-        elif err.errno == errorcode.ER_BAD_DB_ERROR:
-            print("Database does not exist")
-        else:
-            print(err)
+    except storage.StorageError as err:
+        print(err)
         sys.exit(1)
 
 def load_json(json_path):
@@ -40,69 +64,431 @@ def load_json(json_path):
     with open(json_path, 'r') as f:
         return json.load(f)
 
-def get_or_create_category(cursor, category_name):
-    """Fetchees CategoryID or creates if not exists"""
+def iter_json(json_path):
+    """Yields transactions from a JSON array or NDJSON file one at a time"""
+    return transaction_io.iter_transactions_file(json_path)
+
+class LRUCache:
+    """
+    Size-bounded lookup cache (key -> database ID) that evicts the least
+    recently used entry and counts hits and misses
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Returns the cached ID for key, or None on a miss"""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores key -> value, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def warm(self, rows):
+        """Fills the cache from (key, value) rows until it is full, without counting lookups"""
+        for key, value in rows:
+            if len(self.entries) >= self.maxsize:
+                break
+            self.entries[key] = value
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), {len(self)}/{self.maxsize} entries"
+
+def warm_caches(conn, category_cache, user_cache):
+    """Preloads the category and user caches from the existing tables"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT CategoryName, CategoryID FROM TransactionCategory")
+    category_cache.warm(cursor.fetchall())
+    # Most recently created users first, they are the likeliest to recur
+    cursor.execute("SELECT PhoneNumber, UserID FROM User ORDER BY UserID DESC LIMIT %s", (user_cache.maxsize,))
+    user_cache.warm(cursor.fetchall())
+    cursor.close()
+
+def get_or_create_category(cursor, category_name, cache=None):
+    """Fetchees CategoryID or creates if not exists, consulting cache first"""
+    if cache is not None:
+        category_id = cache.get(category_name)
+        if category_id is not None:
+            return category_id
     cursor.execute("SELECT CategoryID FROM TransactionCategory WHERE CategoryName = %s", (category_name,))
     result = cursor.fetchone()
     if result:
-        return result[0]
-    # Insert new transaction category
-    cursor.execute(
-        "INSERT INTO TransactionCategory (CategoryName) VALUES (%s)", (category_name,)
-    )
-    return cursor.lastrowid
-
-def get_or_create_user(cursor, user):
-    """Fetches UserID or inserts new user by PhoneNumber"""
+        category_id = result[0]
+    else:
+        # Insert new transaction category
+        cursor.execute(
+            "INSERT INTO TransactionCategory (CategoryName) VALUES (%s)", (category_name,)
+        )
+        category_id = cursor.lastrowid
+    if cache is not None:
+        cache.put(category_name, category_id)
+    return category_id
+
+def get_or_create_user(cursor, user, cache=None):
+    """Fetches UserID or inserts new user by PhoneNumber, consulting cache first"""
+    if cache is not None:
+        user_id = cache.get(user['PhoneNumber'])
+        if user_id is not None:
+            return user_id
     cursor.execute("SELECT UserID FROM User WHERE PhoneNumber = %s", (user['PhoneNumber'],))
     result = cursor.fetchone()
     if result:
-        return result[0]
-    cursor.execute(
-        "INSERT INTO User (PhoneNumber, Name, UserType) VALUES (%s, %s, %s)",
-        (user['PhoneNumber'], user.get('Name',''), user['UserType'])
-    )
-    return cursor.lastrowid
+        user_id = result[0]
+    else:
+        cursor.execute(
+            "INSERT INTO User (PhoneNumber, Name, UserType) VALUES (%s, %s, %s)",
+            (user['PhoneNumber'], user.get('Name',''), user['UserType'])
+        )
+        user_id = cursor.lastrowid
+    if cache is not None:
+        cache.put(user['PhoneNumber'], user_id)
+    return user_id
+
+def drop_incomplete(transactions, rejected):
+    """
+    Yields the transactions that have every REQUIRED_FIELDS value, appending
+    the TransactionIDs of the others (e.g. OTP messages without an amount) to rejected
+    """
+    for tx in transactions:
+        if all(tx.get(field) is not None for field in REQUIRED_FIELDS):
+            yield tx
+        else:
+            rejected.append(tx.get('TransactionID'))
+
+def content_hash(transaction):
+    """Returns the SHA-256 hex digest of a transaction's content fields"""
+    content = json.dumps([transaction.get(field) for field in CONTENT_HASH_FIELDS], separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def dedup_key(transaction):
+    """
+    Returns the unique key a transaction is stored under:
+    ('ReferenceNumber', value), or ('ContentHash', digest) when it has no reference
+    """
+    if transaction.get('ReferenceNumber'):
+        return ('ReferenceNumber', transaction['ReferenceNumber'])
+    return ('ContentHash', content_hash(transaction))
+
+def transaction_row(transaction, category_id):
+    """Returns the Transaction column values for one transaction"""
+    key_column, key = dedup_key(transaction)
+    return (transaction['TransactionType'], transaction['Amount'], transaction['Currency'], transaction['DateTime'],
+            transaction.get('ReferenceNumber') or None, transaction['BalanceAfterTransaction'],
+            transaction['Status'], transaction['MessageText'], category_id,
+            key if key_column == 'ContentHash' else None)
 
 def insert_transaction(cursor, transaction, category_id):
-    """Inserts a transaction"""
-    cursor.execute(
-        """INSERT INTO Transaction 
-        (TransactionType, Amount, Currency, DateTime, ReferenceNumber, BalanceAfterTransaction, Status, MessageText, CategoryID)
-        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)""",
-        (transaction['TransactionType'], transaction['Amount'], transaction['Currency'], transaction['DateTime'],
-         transaction.get('ReferenceNumber'), transaction['BalanceAfterTransaction'],
-         transaction['Status'], transaction['MessageText'], category_id)
-    )
-    return cursor.lastrowid
-
-def insert_participants(cursor, transaction_id, participants):
+    """
+    Inserts a transaction and returns its TransactionID, or None if one
+    with the same unique key was stored first
+    """
+    return insert_transaction_row(cursor, transaction_row(transaction, category_id))
+
+def insert_transaction_row(cursor, row):
+    """Inserts one transaction_row(); returns the new TransactionID, or None if it was ignored"""
+    cursor.execute(INSERT_TRANSACTION, row)
+    return cursor.lastrowid if cursor.rowcount == 1 else None
+
+def insert_participants(cursor, transaction_id, participants, user_cache=None):
     """Inserts transaction participants with role"""
     for p in participants:
-        user_id = get_or_create_user(cursor, p)
+        user_id = get_or_create_user(cursor, p, user_cache)
         cursor.execute(
             "INSERT INTO TransactionParticipant (TransactionID, UserID, Role) VALUES (%s, %s, %s)",
             (transaction_id, user_id, p['UserType'])
         )
 
-def main():
-    # Fix path to avoid file-not-found errors
-    input_json = sys.argv[1] if len(sys.argv) > 1 else '../data/processed/transactions.json'
-    transactions = load_json(input_json)
-
-    conn = connect_db()
-    cursor = conn.cursor()
+def placeholders(count):
+    """Returns '%s,%s,...' for an IN (...) list of count values"""
+    return ','.join(['%s'] * count)
 
+def filter_new(cursor, transactions):
+    """
+    Returns the transactions whose unique key is not yet in the Transaction
+    table, keeping the first of any duplicates among them. Existing keys
+    are looked up with one indexed SELECT per key column
+    """
+    keyed = {}
     for tx in transactions:
-        category_id = get_or_create_category(cursor, tx['TransactionType'])
-        transaction_id = insert_transaction(cursor, tx, category_id)
-        insert_participants(cursor, transaction_id, tx.get('Participants', []))
-        conn.commit()
+        keyed.setdefault(dedup_key(tx), tx)
+    for key_column in ('ReferenceNumber', 'ContentHash'):
+        keys = [key for column, key in keyed if column == key_column]
+        if not keys:
+            continue
+        cursor.execute(
+            f"SELECT {key_column} FROM Transaction WHERE {key_column} IN ({placeholders(len(keys))})", keys
+        )
+        for (key,) in cursor.fetchall():
+            del keyed[(key_column, key)]
+    return list(keyed.values())
 
+def resolve_categories(cursor, category_names, cache):
+    """
+    Returns CategoryName -> CategoryID for every name in category_names.
+    Names not in cache are fetched with one SELECT and the still missing
+    ones inserted in bulk; everything found is added to cache
+    """
+    category_ids = {}
+    missing = []
+    for name in dict.fromkeys(category_names):
+        category_id = cache.get(name)
+        if category_id is None:
+            missing.append(name)
+        else:
+            category_ids[name] = category_id
+    if missing:
+        cursor.execute(
+            f"SELECT CategoryName, CategoryID FROM TransactionCategory WHERE CategoryName IN ({placeholders(len(missing))})",
+            missing
+        )
+        category_ids.update(cursor.fetchall())
+        new_names = [name for name in missing if name not in category_ids]
+        if new_names:
+            cursor.executemany("INSERT INTO TransactionCategory (CategoryName) VALUES (%s)",
+                               [(name,) for name in new_names])
+            cursor.execute(
+                f"SELECT CategoryName, CategoryID FROM TransactionCategory WHERE CategoryName IN ({placeholders(len(new_names))})",
+                new_names
+            )
+            category_ids.update(cursor.fetchall())
+        for name in missing:
+            cache.put(name, category_ids[name])
+    return category_ids
+
+def resolve_users(cursor, participants, cache):
+    """
+    Returns PhoneNumber -> UserID for every participant. Phones not in
+    cache are fetched with one SELECT and missing users inserted in bulk.
+    As in get_or_create_user, a new user takes the Name and UserType of
+    its first occurrence
+    """
+    user_ids = {}
+    missing = {}
+    for p in participants:
+        phone = p['PhoneNumber']
+        if phone in user_ids or phone in missing:
+            continue
+        user_id = cache.get(phone)
+        if user_id is None:
+            missing[phone] = p
+        else:
+            user_ids[phone] = user_id
+    if missing:
+        phones = list(missing)
+        cursor.execute(
+            f"SELECT PhoneNumber, UserID FROM User WHERE PhoneNumber IN ({placeholders(len(phones))})", phones
+        )
+        user_ids.update(cursor.fetchall())
+        new_users = [p for phone, p in missing.items() if phone not in user_ids]
+        if new_users:
+            cursor.executemany(
+                "INSERT INTO User (PhoneNumber, Name, UserType) VALUES (%s, %s, %s)",
+                [(p['PhoneNumber'], p.get('Name', ''), p['UserType']) for p in new_users]
+            )
+            new_phones = [p['PhoneNumber'] for p in new_users]
+            cursor.execute(
+                f"SELECT PhoneNumber, UserID FROM User WHERE PhoneNumber IN ({placeholders(len(new_phones))})",
+                new_phones
+            )
+            user_ids.update(cursor.fetchall())
+        for phone in phones:
+            cache.put(phone, user_ids[phone])
+    return user_ids
+
+def insert_transaction_batch(cursor, batch, category_ids):
+    """
+    Inserts a batch of transactions with one multi-row INSERT and returns
+    their new TransactionIDs in batch order. A transaction stored by another
+    session since filter_new() looked is ignored and gets None, so its
+    participants are not linked to any row. Which rows were ignored cannot
+    be told from a multi-row INSERT, so the batch is then rolled back to
+    before it and inserted one row at a time
+    """
+    rows = [transaction_row(tx, category_ids[tx['TransactionType']]) for tx in batch]
+    cursor.execute("SAVEPOINT transaction_batch")
+    cursor.executemany(INSERT_TRANSACTION, rows)
+    if cursor.rowcount != len(batch):
+        cursor.execute("ROLLBACK TO SAVEPOINT transaction_batch")
+        return [insert_transaction_row(cursor, row) for row in rows]
+    # A multi-row INSERT reports the first generated ID; the rest follow it
+    # consecutively as long as no other session inserts concurrently
+    first_id = cursor.lastrowid
+    transaction_ids = list(range(first_id, first_id + len(batch)))
+    cursor.execute("SELECT COUNT(*) FROM Transaction WHERE TransactionID BETWEEN %s AND %s",
+                   (transaction_ids[0], transaction_ids[-1]))
+    if cursor.fetchone()[0] != len(batch):
+        raise RuntimeError("Generated TransactionIDs are not consecutive; "
+                           "run the bulk load without concurrent writers")
+    return transaction_ids
+
+def bulk_load(conn, transactions, batch_size=DEFAULT_BATCH_SIZE, category_cache=None, user_cache=None,
+              timer=None):
+    """
+    Loads transactions in batches: categories and users are resolved per
+    batch in bulk (cache misses only), transactions and participants go in
+    with executemany, and each batch is committed once. Transactions that
+    are already stored are skipped, so an interrupted load can be rerun.
+    With a timer (etl_metrics.StageTimer), reading the input, the existing
+    key and ID lookups, the inserts and the commits are timed as 'read',
+    'resolve', 'insert' and 'commit'.
+    Returns (transactions loaded, participants loaded, transactions skipped)
+    """
+    if category_cache is None:
+        category_cache = LRUCache(DEFAULT_CATEGORY_CACHE_SIZE)
+    if user_cache is None:
+        user_cache = LRUCache(DEFAULT_USER_CACHE_SIZE)
+    cursor = conn.cursor()
+    tx_count = participant_count = skipped = 0
+    transactions = iter(transactions)
+    while True:
+        with etl_metrics.stage(timer, 'read'):
+            batch = list(islice(transactions, batch_size))
+        if timer is not None:
+            timer.count('read', len(batch))
+        if not batch:
+            break
+        with etl_metrics.stage(timer, 'resolve', len(batch)):
+            new_batch = filter_new(cursor, batch)
+            skipped += len(batch) - len(new_batch)
+            batch = new_batch
+            if batch:
+                participants = [p for tx in batch for p in tx.get('Participants', [])]
+                category_ids = resolve_categories(cursor, [tx['TransactionType'] for tx in batch], category_cache)
+                user_ids = resolve_users(cursor, participants, user_cache)
+        if not batch:
+            continue
+        with etl_metrics.stage(timer, 'insert', len(batch)):
+            transaction_ids = insert_transaction_batch(cursor, batch, category_ids)
+            participant_rows = [
+                (transaction_id, user_ids[p['PhoneNumber']], p['UserType'])
+                for transaction_id, tx in zip(transaction_ids, batch) if transaction_id is not None
+                for p in tx.get('Participants', [])
+            ]
+            if participant_rows:
+                cursor.executemany(
+                    "INSERT INTO TransactionParticipant (TransactionID, UserID, Role) VALUES (%s, %s, %s)",
+                    participant_rows
+                )
+        with etl_metrics.stage(timer, 'commit', len(batch)):
+            conn.commit()
+        inserted = sum(1 for transaction_id in transaction_ids if transaction_id is not None)
+        skipped += len(batch) - inserted
+        tx_count += inserted
+        participant_count += len(participant_rows)
     cursor.close()
+    return tx_count, participant_count, skipped
+
+def parse_args(argv):
+    """Parses command line arguments"""
+    arg_parser = argparse.ArgumentParser(description='Load parsed transactions into the transaction database.')
+    # Fix path to avoid file-not-found errors
+    arg_parser.add_argument('input_json', nargs='?', default='../data/processed/transactions.json')
+    arg_parser.add_argument('--backend', choices=sorted(storage.BACKENDS), default='mysql',
+                            help='storage backend to load into')
+    arg_parser.add_argument('--sqlite-path', default=storage.DEFAULT_SQLITE_PATH,
+                            help='database file for the sqlite backend (created from database_setup.sql)')
+    arg_parser.add_argument('--bulk', action='store_true',
+                            help='resolve lookups in bulk and insert with executemany, committing per batch')
+    arg_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='transactions per batch in bulk mode')
+    arg_parser.add_argument('--category-cache-size', type=int, default=DEFAULT_CATEGORY_CACHE_SIZE,
+                            help='max CategoryName -> CategoryID entries kept in memory')
+    arg_parser.add_argument('--user-cache-size', type=int, default=DEFAULT_USER_CACHE_SIZE,
+                            help='max PhoneNumber -> UserID entries kept in memory')
+    arg_parser.add_argument('--metrics', action='store_true',
+                            help='time the read, resolve, insert and commit stages and append the results to the ETL log')
+    arg_parser.add_argument('--metrics-log', default=etl_metrics.LOG_PATH,
+                            help='ETL log the --metrics results are appended to')
+    arg_parser.add_argument('--metrics-db', action='store_true',
+                            help='with --metrics, also write the results to the SystemLog table')
+    return arg_parser.parse_args(argv)
+
+def main():
+    args = parse_args(sys.argv[1:])
+    timer = etl_metrics.StageTimer('load_db', ETL_STAGES) if args.metrics else None
+    rejected = []
+    transactions = drop_incomplete(iter_json(args.input_json), rejected)
+
+    if args.backend == 'sqlite':
+        backend = storage.SQLiteBackend(args.sqlite_path)
+    else:
+        backend = storage.MySQLBackend(DB_CONFIG)
+    conn = connect_db(backend)
+    category_cache = LRUCache(args.category_cache_size)
+    user_cache = LRUCache(args.user_cache_size)
+    warm_caches(conn, category_cache, user_cache)
+    start = time.perf_counter()
+
+    if args.bulk:
+        tx_count, participant_count, skipped = bulk_load(conn, transactions, args.batch_size,
+                                                         category_cache, user_cache, timer)
+    else:
+        cursor = conn.cursor()
+        tx_count = participant_count = skipped = 0
+        for tx in etl_metrics.timed(timer, 'read', transactions):
+            with etl_metrics.stage(timer, 'resolve', 1):
+                # Skip transactions loaded by an earlier (possibly interrupted) run
+                is_new = bool(filter_new(cursor, [tx]))
+                if is_new:
+                    category_id = get_or_create_category(cursor, tx['TransactionType'], category_cache)
+            if not is_new:
+                skipped += 1
+                continue
+            # Participants' users are looked up or created as they are inserted
+            with etl_metrics.stage(timer, 'insert', 1):
+                transaction_id = insert_transaction(cursor, tx, category_id)
+                if transaction_id is not None:
+                    insert_participants(cursor, transaction_id, tx.get('Participants', []), user_cache)
+            with etl_metrics.stage(timer, 'commit', 1):
+                conn.commit()
+            if transaction_id is None:
+                # Stored by another session after filter_new() looked
+                skipped += 1
+                continue
+            tx_count += 1
+            participant_count += len(tx.get('Participants', []))
+        cursor.close()
+
+    elapsed = time.perf_counter() - start
+    if timer is not None:
+        timer.write_log(args.metrics_log)
+        if args.metrics_db:
+            timer.write_system_log(conn)
     conn.close()
-    print("Finished loading transactions into MySQL database.")
+    rows = tx_count + participant_count
+    print(f"Finished loading transactions into {backend.describe()}.")
+    print(f"Loaded {tx_count} transactions and {participant_count} participants in {elapsed:.2f}s "
+          f"({rows / elapsed if elapsed else 0:.0f} rows/sec).")
+    print(f"Skipped {skipped} transactions already in the database.")
+    if rejected:
+        print(f"Rejected {len(rejected)} transactions missing one of {', '.join(REQUIRED_FIELDS)} "
+              f"(TransactionIDs {', '.join(map(str, rejected[:10]))}{', ...' if len(rejected) > 10 else ''}).")
+    print(f"Category cache: {category_cache.summary()}")
+    print(f"User cache: {user_cache.summary()}")
+    if timer is not None:
+        print(f"Stage timings appended to {args.metrics_log}{' and SystemLog' if args.metrics_db else ''}:")
+        for message in timer.messages():
+            print(f"  {message}")
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,426 @@
+#--------------------------------------------------------------------------------
+# Script Name: storage.py
+# Description: Storage backends for the transaction database.
+#              MySQLBackend connects with mysql.connector; SQLiteBackend is an
+#              embedded database file created from database_setup.sql (tables
+#              and indexes translated to SQLite). Both hand out DB-API
+#              connections that accept the same %s-style queries, and share
+#              the read queries the API serves GET requests with.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  from database import storage
+#         conn = storage.SQLiteBackend('momo.sqlite3').connect()
+#         storage.fetch_transaction(conn, 1)
+#--------------------------------------------------------------------------------
+
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+import os
+import re
+import sqlite3
+import threading
+
+from dsa import text_index
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_FILE = os.path.join(BASE_DIR, 'database_setup.sql')
+DEFAULT_SQLITE_PATH = os.path.normpath(os.path.join(BASE_DIR, '..', 'data', 'momo.sqlite3'))
+
+# Connection credentials for the MySQL backend
+MYSQL_CONFIG = {
+    'user': 'your_user',
+    'password': 'your_password',
+    'host': 'localhost',
+    'database': 'momo_db',
+    'raise_on_warnings': True
+}
+
+# Transaction columns in the key order of the processed JSON records
+TRANSACTION_COLUMNS = ('TransactionID', 'TransactionType', 'Amount', 'Currency', 'DateTime',
+                       'ReferenceNumber', 'BalanceAfterTransaction', 'Status', 'MessageText')
+# DECIMAL columns, returned as floats like in the processed JSON
+# (SQLite's NUMERIC affinity hands back whole amounts as int)
+DECIMAL_COLUMNS = ('Amount', 'BalanceAfterTransaction')
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+# IDs per IN (...) list when fetching query results (older SQLite allows 999 parameters)
+SELECT_CHUNK_SIZE = 500
+
+# Single-quoted SQL string literal ('' escapes a quote)
+STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+# 'Transaction' is a keyword in SQLite, so the table name has to be quoted
+TRANSACTION_TABLE = re.compile(r'\bTransaction\b')
+# MySQL's INSERT IGNORE is spelled INSERT OR IGNORE in SQLite
+INSERT_IGNORE = re.compile(r'^(\s*INSERT)\s+IGNORE\b', re.IGNORECASE)
+# MySQL column definitions SQLite spells differently
+TABLE_COMMENT = re.compile(r"\s+COMMENT\s*=?\s*'(?:[^']|'')*'")
+ENUM_TYPE = re.compile(r"\bENUM\s*\((?:\s*'(?:[^']|'')*'\s*,?)*\s*\)")
+AUTO_INCREMENT_KEY = re.compile(r'\bINT PRIMARY KEY AUTO_INCREMENT\b')
+
+class StorageError(Exception):
+    """Raised when a storage backend cannot be opened"""
+
+def translate_sqlite(query):
+    """
+    Rewrites a MySQL-flavoured query for SQLite: %s placeholders become ?,
+    the Transaction table name is quoted and INSERT IGNORE becomes INSERT OR
+    IGNORE. String literals are left alone
+    """
+    parts = STRING_LITERAL.split(INSERT_IGNORE.sub(r'\1 OR IGNORE', query))
+    for i in range(0, len(parts), 2):
+        parts[i] = TRANSACTION_TABLE.sub('"Transaction"', parts[i].replace('%s', '?'))
+    return ''.join(parts)
+
+def split_statements(script):
+    """Splits a SQL script on the semicolons outside string literals"""
+    statements = []
+    current = []
+    for i, part in enumerate(STRING_LITERAL.split(script)):
+        if i % 2:
+            current.append(part)
+            continue
+        pieces = part.split(';')
+        for piece in pieces[:-1]:
+            current.append(piece)
+            statements.append(''.join(current).strip())
+            current = []
+        current.append(pieces[-1])
+    statements.append(''.join(current).strip())
+    return [statement for statement in statements if statement]
+
+def sqlite_schema(script, sample_data=False):
+    """
+    Translates the MySQL schema script to SQLite statements: comments are
+    dropped, AUTO_INCREMENT keys become INTEGER PRIMARY KEY AUTOINCREMENT
+    and ENUM columns become TEXT. INSERTs are kept only with sample_data
+    """
+    script = '\n'.join(line for line in script.splitlines() if not line.lstrip().startswith('--'))
+    script = TABLE_COMMENT.sub('', script)
+    statements = []
+    for statement in split_statements(script):
+        if statement.upper().startswith('INSERT') and not sample_data:
+            continue
+        statement = ENUM_TYPE.sub('TEXT', statement)
+        parts = STRING_LITERAL.split(statement)
+        for i in range(0, len(parts), 2):
+            part = AUTO_INCREMENT_KEY.sub('INTEGER PRIMARY KEY AUTOINCREMENT', parts[i])
+            parts[i] = TRANSACTION_TABLE.sub('"Transaction"', part)
+        statements.append(''.join(parts))
+    return statements
+
+class SQLiteCursor:
+    """DB-API cursor over sqlite3 that accepts the MySQL-style queries load_db issues"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.lastrowid = None
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, params=()):
+        self._cursor.execute(translate_sqlite(query), tuple(params))
+        self.lastrowid = self._cursor.lastrowid
+
+    def executemany(self, query, rows):
+        rows = [tuple(row) for row in rows]
+        self._cursor.executemany(translate_sqlite(query), rows)
+        if rows and query.lstrip().upper().startswith('INSERT'):
+            # Match MySQL, which reports the first ID of a multi-row INSERT
+            last_id = self._cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+            self.lastrowid = last_id - len(rows) + 1
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+class SQLiteConnection:
+    """Wraps a sqlite3 connection so its cursors translate MySQL-style queries"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+class MySQLBackend:
+    """MySQL server reached through mysql.connector"""
+    name = 'mysql'
+
+    def __init__(self, config=None):
+        self.config = MYSQL_CONFIG if config is None else config
+
+    def describe(self):
+        return f"MySQL database {self.config.get('database')} on {self.config.get('host')}"
+
+    def connect(self):
+        # Imported here so the SQLite backend works without mysql-connector installed
+        import mysql.connector
+        from mysql.connector import errorcode
+        try:
+            return mysql.connector.connect(**self.config)
+        except mysql.connector.Error as err:
+            if err.errno == errorcode.ER_ACCESS_DENIED_ERROR:
+                raise StorageError("Access denied: check your username or password") from err
+            if err.errno == errorcode.ER_BAD_DB_ERROR:
+                raise StorageError("Database does not exist") from err
+            raise StorageError(str(err)) from err
+
+class SQLiteBackend:
+    """
+    Embedded SQLite database file. The schema from database_setup.sql is
+    created on first connect; sample_data also inserts its sample rows
+    """
+    name = 'sqlite'
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, sample_data=False):
+        self.path = path
+        self.sample_data = sample_data
+
+    def describe(self):
+        return f"SQLite database {self.path}"
+
+    def connect(self):
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        try:
+            # ConnectionPool may hand the connection to other threads, one at a time
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA foreign_keys = ON')
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Transaction'").fetchone()
+            if not exists:
+                with open(SCHEMA_FILE, 'r', encoding='utf-8') as f:
+                    statements = sqlite_schema(f.read(), self.sample_data)
+                with conn:
+                    for statement in statements:
+                        conn.execute(statement)
+        except (OSError, sqlite3.Error) as err:
+            raise StorageError(f"Cannot open {self.path}: {err}") from err
+        return SQLiteConnection(conn)
+
+class ConnectionPool:
+    """
+    Reuses a backend's connections across threads. A connection is used by
+    one thread at a time and a new one is opened when all are in use
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self.backend.connect()
+        try:
+            yield conn
+        finally:
+            # End the read transaction so the next user sees newly loaded rows
+            conn.rollback()
+            with self._lock:
+                self._idle.append(conn)
+
+BACKENDS = {'mysql': MySQLBackend, 'sqlite': SQLiteBackend}
+
+def get_backend(name, **options):
+    """Returns the backend registered under name ('mysql' or 'sqlite')"""
+    try:
+        return BACKENDS[name](**options)
+    except KeyError:
+        raise StorageError(f"Unknown storage backend: {name}") from None
+
+def column_value(value):
+    """Converts MySQL DECIMAL/DATETIME values to the JSON record types"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    return value
+
+def fetch_participants(cursor, transaction_ids=None):
+    """
+    Returns TransactionID -> participant dicts (as in the processed JSON),
+    for the given IDs or for every transaction when transaction_ids is None
+    """
+    query = """SELECT tp.TransactionID, u.Name, u.PhoneNumber, tp.Role, u.UserID
+        FROM TransactionParticipant tp JOIN User u ON u.UserID = tp.UserID"""
+    params = ()
+    if transaction_ids is not None:
+        query += f" WHERE tp.TransactionID IN ({','.join(['%s'] * len(transaction_ids))})"
+        params = tuple(transaction_ids)
+    cursor.execute(query + " ORDER BY tp.ParticipantID", params)
+    participants = {}
+    for transaction_id, name, phone, role, user_id in cursor.fetchall():
+        participants.setdefault(transaction_id, []).append(
+            {'Name': name, 'PhoneNumber': phone, 'UserType': role, 'UserID': user_id})
+    return participants
+
+def fetch_transactions(conn, transaction_ids=None):
+    """
+    Returns transactions as processed-JSON dicts in TransactionID order:
+    all of them, or those with the given IDs (primary key lookups)
+    """
+    if transaction_ids is not None and not transaction_ids:
+        return []
+    query = f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM Transaction"
+    params = ()
+    if transaction_ids is not None:
+        query += f" WHERE TransactionID IN ({','.join(['%s'] * len(transaction_ids))})"
+        params = tuple(transaction_ids)
+    cursor = conn.cursor()
+    cursor.execute(query + " ORDER BY TransactionID", params)
+    transactions = [dict(zip(TRANSACTION_COLUMNS, map(column_value, row))) for row in cursor.fetchall()]
+    participants = fetch_participants(cursor, transaction_ids)
+    cursor.close()
+    for tx in transactions:
+        for column in DECIMAL_COLUMNS:
+            if tx[column] is not None:
+                tx[column] = float(tx[column])
+        tx['Participants'] = participants.get(tx['TransactionID'], [])
+    return transactions
+
+def select_transactions(conn, equals=None, ranges=None, after=None, limit=None, offset=0, terms=None):
+    """
+    Returns the transactions matching the filters of TransactionStore.select
+    (column equality, inclusive (low, high) ranges, an after-ID cursor and
+    search terms) in TransactionID order, skipping offset rows and returning
+    at most limit. Column names are put into the SQL as given, so callers
+    pass fixed names. Terms (from text_index.query_terms) must be whole
+    tokens of MessageText or ReferenceNumber, as in the inverted index:
+    LIKE narrows the rows to those containing each term, and the tokens
+    of the fetched rows are checked here, with paging applied after that.
+    No index serves LIKE '%term%', so a search scans every row the other
+    filters leave
+    """
+    conditions = []
+    params = []
+    for column, value in (equals or {}).items():
+        conditions.append(f"{column} = %s")
+        params.append(value)
+    for column, (low, high) in (ranges or {}).items():
+        if low is not None:
+            conditions.append(f"{column} >= %s")
+            params.append(low)
+        if high is not None:
+            conditions.append(f"{column} <= %s")
+            params.append(high)
+    for term in terms or ():
+        # SQLite's LIKE ignores case for ASCII letters only; other terms are
+        # left to the token check
+        if term.isascii():
+            conditions.append("(MessageText LIKE %s OR ReferenceNumber LIKE %s)")
+            params += [f"%{term}%"] * 2
+    if after is not None:
+        conditions.append("TransactionID > %s")
+        params.append(after)
+    query = "SELECT TransactionID FROM Transaction"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY TransactionID"
+    if not terms and (limit is not None or offset):
+        # MySQL has no OFFSET without LIMIT; the largest BIGINT stands in for "all"
+        query += " LIMIT %s OFFSET %s"
+        params += [2 ** 63 - 1 if limit is None else limit, offset]
+    cursor = conn.cursor()
+    cursor.execute(query, tuple(params))
+    ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    # Rows are fetched by primary key, a bounded number of IDs per query
+    transactions = []
+    if not terms:
+        for start in range(0, len(ids), SELECT_CHUNK_SIZE):
+            transactions += fetch_transactions(conn, ids[start:start + SELECT_CHUNK_SIZE])
+        return transactions
+    terms = frozenset(terms)
+    for start in range(0, len(ids), SELECT_CHUNK_SIZE):
+        for tx in fetch_transactions(conn, ids[start:start + SELECT_CHUNK_SIZE]):
+            if not terms <= text_index.record_tokens(tx):
+                continue
+            if offset:
+                offset -= 1
+                continue
+            transactions.append(tx)
+            if len(transactions) == limit:
+                return transactions
+    return transactions
+
+def user_transactions(conn, phone):
+    """
+    Returns the transactions in which the user with this PhoneNumber takes
+    part, oldest DateTime first (ties by TransactionID). Undated ones come
+    last, as in the in-memory participant index; both MySQL and SQLite
+    would otherwise sort NULL first
+    """
+    cursor = conn.cursor()
+    cursor.execute("""SELECT DISTINCT t.TransactionID, t.DateTime FROM Transaction t
+        JOIN TransactionParticipant tp ON tp.TransactionID = t.TransactionID
+        JOIN User u ON u.UserID = tp.UserID
+        WHERE u.PhoneNumber = %s ORDER BY t.DateTime IS NULL, t.DateTime, t.TransactionID""", (phone,))
+    ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    by_id = {}
+    for start in range(0, len(ids), SELECT_CHUNK_SIZE):
+        for tx in fetch_transactions(conn, ids[start:start + SELECT_CHUNK_SIZE]):
+            by_id[tx['TransactionID']] = tx
+    return [by_id[tid] for tid in ids]
+
+def group_transactions(conn, bucket_bounds, start=None, end=None):
+    """
+    Aggregates transactions with a GROUP BY for the /stats endpoints.
+    bucket_bounds are the inclusive upper amounts of the amount buckets
+    (None for the last, unbounded one); start and end are 'YYYY-MM-DD'.
+    Returns (day, TransactionType, bucket index, count, amount total) rows
+    """
+    cases = []
+    params = []
+    for i, upper in enumerate(bucket_bounds):
+        if upper is None:
+            cases.append(f"ELSE {i}")
+            break
+        cases.append(f"WHEN Amount <= %s THEN {i}")
+        params.append(upper)
+    query = (f"SELECT DATE(DateTime), TransactionType, CASE WHEN Amount IS NULL THEN NULL "
+             f"{' '.join(cases)} END, COUNT(*), COALESCE(SUM(Amount), 0) FROM Transaction")
+    conditions = []
+    if start is not None:
+        conditions.append("DateTime >= %s")
+        params.append(f"{start} 00:00:00")
+    if end is not None:
+        conditions.append("DateTime <= %s")
+        params.append(f"{end} 23:59:59")
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    cursor = conn.cursor()
+    cursor.execute(query + " GROUP BY 1, 2, 3", tuple(params))
+    rows = [(None if day is None else str(day), tx_type, bucket, count, float(amount))
+            for day, tx_type, bucket, count, amount in cursor.fetchall()]
+    cursor.close()
+    return rows
+
+def fetch_transaction(conn, transaction_id):
+    """Returns one transaction by TransactionID, or None if not found"""
+    found = fetch_transactions(conn, [transaction_id])
+    return found[0] if found else None
@@ -0,0 +1,195 @@
+#--------------------------------------------------------------------------------
+# Script Name: bench_etl.py
+# Description: End-to-end benchmark of the ETL pipeline on a generated SMS
+#              export (generate_sms_xml.py) of 1M-50M messages. Each stage
+#              runs in a fresh interpreter and reports wall time,
+#              messages/sec and peak RSS:
+#              generate: write the seeded XML export
+#              parse:    parse_xml.load_transactions (--parser tree) or the
+#                        streaming iter_transactions (--parser stream)
+#              write:    save_transactions_file (indented JSON or NDJSON)
+#              load:     load_db's bulk load of the output into SQLite, the
+#                        stand-in for MySQL
+#              With --parser stream, parse and write run interleaved in one
+#              process; the time spent producing records is counted as
+#              parse and the rest as write, and both share one peak RSS.
+#              The load stage reads a JSON array whole, so use --format
+#              ndjson for exports of tens of millions of messages.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 bench_etl.py [--messages 1000000] [--seed 0] [--parser stream|tree]
+#         [--format json|ndjson] [--workers N] [--workdir DIR] [--output results.json]
+#--------------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+from dsa import generate_sms_xml
+from dsa import parse_xml
+from database import load_db
+from database import storage
+
+class TimedIterator:
+    """Wraps an iterator, adding up the time spent producing its items"""
+
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self.seconds = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            return next(self._iterator)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB (VmHWM on Linux, as in bench_formats.py)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def stage_result(stage, items, seconds, rss_kb, path=None):
+    return {
+        'stage': stage,
+        'items': items,
+        'seconds': round(seconds, 3),
+        'per_second': round(items / seconds) if seconds else 0,
+        'peak_rss_mb': round(rss_kb / 1024, 1),
+        'output_mb': round(os.path.getsize(path) / 1e6, 1) if path and os.path.exists(path) else None,
+    }
+
+def run_generate(args, paths):
+    start = time.perf_counter()
+    written = generate_sms_xml.write_sms_xml(paths['xml'], args.messages, args.seed, args.users)
+    return [stage_result('generate', written, time.perf_counter() - start, peak_rss_kb(), paths['xml'])]
+
+def run_extract(args, paths):
+    """The parse and write stages, in the way the chosen --parser runs them"""
+    if args.parser == 'tree':
+        start = time.perf_counter()
+        transactions = parse_xml.load_transactions(paths['xml'], workers=args.workers)
+        parse_seconds = time.perf_counter() - start
+        parse_rss = peak_rss_kb()
+        start = time.perf_counter()
+        written = parse_xml.save_transactions_file(transactions, paths['output'])
+        write_seconds = time.perf_counter() - start
+        return [stage_result('parse', len(transactions), parse_seconds, parse_rss),
+                stage_result('write', written, write_seconds, peak_rss_kb(), paths['output'])]
+    transactions = TimedIterator(parse_xml.iter_transactions(paths['xml'], workers=args.workers))
+    start = time.perf_counter()
+    written = parse_xml.save_transactions_file(transactions, paths['output'])
+    total_seconds = time.perf_counter() - start
+    rss = peak_rss_kb()
+    return [stage_result('parse', written, transactions.seconds, rss),
+            stage_result('write', written, total_seconds - transactions.seconds, rss, paths['output'])]
+
+def run_load(args, paths):
+    """load_db.main's --bulk --backend sqlite path, into a new database file"""
+    if os.path.exists(paths['sqlite']):
+        os.remove(paths['sqlite'])
+    rejected = []
+    start = time.perf_counter()
+    conn = storage.SQLiteBackend(paths['sqlite']).connect()
+    transactions = load_db.drop_incomplete(load_db.iter_json(paths['output']), rejected)
+    tx_count, participant_count, skipped = load_db.bulk_load(conn, transactions, args.batch_size)
+    conn.close()
+    result = stage_result('load', tx_count + len(rejected) + skipped, time.perf_counter() - start,
+                          peak_rss_kb(), paths['sqlite'])
+    result.update(loaded=tx_count, participants=participant_count, skipped=skipped, rejected=len(rejected))
+    return [result]
+
+RUNNERS = {'generate': run_generate, 'extract': run_extract, 'load': run_load}
+
+def run_in_process(runner, argv):
+    """Runs one stage group in a fresh interpreter and returns its results"""
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), *argv, '--run', runner],
+                            check=True, capture_output=True, text=True).stdout
+    # Results are the last line; the pipeline's own progress messages come before
+    return json.loads(output.strip().splitlines()[-1])
+
+def stage_paths(args, workdir):
+    extension = '.ndjson' if args.format == 'ndjson' else '.json'
+    return {
+        'xml': os.path.join(workdir, f"sms_{args.messages}_{args.seed}_{args.users or 'default'}.xml"),
+        'output': os.path.join(workdir, f"transactions_{args.messages}{extension}"),
+        'sqlite': os.path.join(workdir, f"transactions_{args.messages}.db"),
+    }
+
+def print_results(results):
+    print(f"{'stage':>9} {'items':>10} {'seconds':>9} {'items/sec':>10} {'peak RSS MB':>12} {'output MB':>10}")
+    for result in results:
+        output_mb = '' if result['output_mb'] is None else f"{result['output_mb']:.1f}"
+        print(f"{result['stage']:>9} {result['items']:>10} {result['seconds']:>9.2f} {result['per_second']:>10} "
+              f"{result['peak_rss_mb']:>12.1f} {output_mb:>10}")
+    total = sum(result['seconds'] for result in results if result['stage'] != 'generate')
+    print(f"ETL wall time (parse + write + load): {total:.2f}s")
+
+def parse_args(argv):
+    arg_parser = argparse.ArgumentParser(description='Benchmark the ETL pipeline end to end on generated data.')
+    arg_parser.add_argument('--messages', type=int, default=generate_sms_xml.DEFAULT_MESSAGES)
+    arg_parser.add_argument('--seed', type=int, default=generate_sms_xml.DEFAULT_SEED)
+    arg_parser.add_argument('--users', type=int, help='distinct counterparties in the generated export')
+    arg_parser.add_argument('--parser', choices=['stream', 'tree'], default='stream',
+                            help='iter_transactions (constant memory) or load_transactions (whole tree in memory)')
+    arg_parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                            help='processed output written by the write stage')
+    arg_parser.add_argument('--workers', type=int, default=1, help='extraction processes in the parse stage')
+    arg_parser.add_argument('--batch-size', type=int, default=load_db.DEFAULT_BATCH_SIZE,
+                            help='transactions per batch in the load stage')
+    arg_parser.add_argument('--workdir', help='keep the generated files here (default: a temporary directory); '
+                                              'an existing export for the same size, seed and users is reused')
+    arg_parser.add_argument('--output', help='also write the results as JSON to this path')
+    arg_parser.add_argument('--run', choices=sorted(RUNNERS), help=argparse.SUPPRESS)
+    return arg_parser.parse_args(argv)
+
+def run_stages(args, argv, workdir):
+    paths = stage_paths(args, workdir)
+    results = []
+    if os.path.exists(paths['xml']):
+        print(f"Reusing {paths['xml']}")
+    else:
+        results += run_in_process('generate', argv)
+    results += run_in_process('extract', argv)
+    results += run_in_process('load', argv)
+    return results
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+    if args.run:
+        workdir = args.workdir
+        print(json.dumps(RUNNERS[args.run](args, stage_paths(args, workdir))))
+        return
+
+    print(f"Messages: {args.messages}, seed {args.seed}, parser {args.parser}, output {args.format}, "
+          f"workers {args.workers}, {os.cpu_count()} CPUs")
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        results = run_stages(args, argv, args.workdir)
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            results = run_stages(args, [*argv, '--workdir', workdir], workdir)
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'messages': args.messages, 'seed': args.seed, 'parser': args.parser,
+                       'format': args.format, 'workers': args.workers, 'results': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#--------------------------------------------------------------------------------
+# Script Name: bench_formats.py
+# Description: Compares processed-output formats: the indented JSON array
+#              written by save_transactions_json, compact NDJSON, and the
+#              columnar binary snapshot. Reports file size, write time, and
+#              the load time and peak RSS of a fresh process opening the file
+#              the way the API server does at startup.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 bench_formats.py [--records N]
+#--------------------------------------------------------------------------------
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+from dsa import parse_xml
+from dsa import snapshot
+from dsa import transaction_io
+from api import store
+
+def scaled_transactions(source_json, records):
+    """
+    Yields `records` transactions by cycling the processed sample,
+    renumbering TransactionID so every record is distinct.
+    """
+    sample = transaction_io.load_transactions_file(source_json)
+    for i in range(records):
+        tx = dict(sample[i % len(sample)])
+        tx['TransactionID'] = i + 1
+        yield tx
+
+def time_call(func, *args):
+    """Returns (seconds, result) for one call."""
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def peak_rss_kb():
+    """
+    Peak resident set size of this process in KB. Uses VmHWM on Linux,
+    since ru_maxrss also counts the parent's memory from before exec.
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def load_in_process(fmt, path):
+    """
+    Opens path into a TransactionStore as the server would and builds the
+    first and last record. Prints '<seconds> <peak RSS in KB> <records>'.
+    Run in a fresh process.
+    """
+    start = time.perf_counter()
+    if fmt == 'snapshot':
+        transactions = store.TransactionStore.from_snapshot(snapshot.SnapshotTable(path))
+    else:
+        transactions = store.TransactionStore(transaction_io.iter_transactions_file(path))
+    if transactions:
+        transactions.get(1), transactions.get(transactions.max_id)
+    seconds = time.perf_counter() - start
+    print(seconds, peak_rss_kb(), len(transactions))
+
+def measure_startup(fmt, path):
+    """Returns (seconds, peak RSS MB, records) from a fresh interpreter."""
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--load', fmt, path],
+                            check=True, capture_output=True, text=True).stdout.split()
+    return float(output[0]), int(output[1]) / 1024, int(output[2])
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark processed transaction file formats.')
+    arg_parser.add_argument('--source', default='../data/processed/transactions.json')
+    arg_parser.add_argument('--records', type=int, default=100000)
+    arg_parser.add_argument('--load', nargs=2, metavar=('FORMAT', 'PATH'), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.load:
+        load_in_process(*args.load)
+        return
+
+    transactions = list(scaled_transactions(args.source, args.records))
+    print(f"Records: {len(transactions)}")
+    print(f"{'format':>9} {'size MB':>9} {'write s':>9} {'startup s':>10} {'RSS MB':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cases = (
+            ('json', os.path.join(tmp_dir, 'transactions.json'), parse_xml.save_transactions_json),
+            ('ndjson', os.path.join(tmp_dir, 'transactions.ndjson'), transaction_io.write_ndjson),
+            ('snapshot', os.path.join(tmp_dir, 'transactions.snapshot'), snapshot.write_snapshot),
+        )
+        for name, path, writer in cases:
+            write_seconds, _ = time_call(writer, transactions, path)
+            startup_seconds, rss_mb, loaded = measure_startup(name, path)
+            assert loaded == len(transactions)
+            print(f"{name:>9} {os.path.getsize(path) / 1e6:>9.2f} {write_seconds:>9.3f} "
+                  f"{startup_seconds:>10.4f} {rss_mb:>8.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+#--------------------------------------------------------------------------------
+# Script Name: bench_lookup.py
+# Description: Benchmark harness for transaction lookup structures, grown out
+#              of compare_dsa_search.py. Each strategy (linear scan, dict,
+#              sorted array + bisect, the sorted range index, and the API's
+#              TransactionStore) is built over synthetic transactions of each
+#              requested size and timed on point lookups by TransactionID and
+#              on Amount/DateTime range queries. Every measurement is repeated
+#              and summarized (median, min, max, stdev), the memory each
+#              structure holds is recorded with tracemalloc, and results are
+#              written as JSON. Given an earlier results file with --baseline,
+#              measurements whose fastest run got slower than --max-regression
+#              allows are reported and the exit status is 1, for a
+#              pre-release check.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 bench_lookup.py [--sizes 1000 10000 100000 1000000] [--strategies dict store]
+#         [--repeats 7] [--output results.json] [--baseline previous.json] [--max-regression 0.25]
+#--------------------------------------------------------------------------------
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.normpath(os.path.join(BASE_DIR, '..')))
+from dsa import compare_dsa_search
+from dsa import range_index
+from api import store
+
+START = datetime(2024, 1, 1)
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Linear scans take O(n) per query; larger datasets skip them unless asked
+LINEAR_MAX_SIZE = 1000000
+# Shortest timed run; quick queries are repeated within a run to reach it
+MIN_RUN_SECONDS = 0.02
+
+# (label, field, low, high): record-unit bounds, as the API takes them
+RANGE_QUERIES = (
+    ('1 day', 'DateTime', '2024-04-10 00:00:00', '2024-04-10 23:59:59'),
+    ('30 days', 'DateTime', '2024-04-10 00:00:00', '2024-05-09 23:59:59'),
+    ('20,001-50,000', 'Amount', 20001.0, 50000.0),
+)
+
+def synthetic_transactions(count, seed=0):
+    """Transactions with a DateTime within 2024 and a log-uniform Amount, the same for a seed"""
+    rng = random.Random(seed)
+    for tid in range(1, count + 1):
+        when = START + timedelta(seconds=rng.randrange(366 * 86400))
+        yield {'TransactionID': tid, 'Amount': float(round(10 ** rng.uniform(2, 6))),
+               'DateTime': when.strftime(DATETIME_FORMAT)}
+
+def index_bounds(field, low, high):
+    # Record-unit bounds as range_index keys (epoch seconds for DateTime)
+    key = range_index.KEY_FUNCTIONS[field]
+    return key(low), key(high)
+
+class LookupStrategy:
+    """
+    A lookup structure under test. build() indexes the transactions;
+    point() returns the transaction with an ID (or None) and range() the
+    sorted IDs whose field lies within inclusive record-unit bounds.
+    Strategies without range support set supports_range to False.
+    """
+    name = None
+    supports_point = True
+    supports_range = True
+    # Largest dataset the strategy runs on by default (None for no limit)
+    max_size = None
+
+    def build(self, transactions):
+        raise NotImplementedError
+
+    def point(self, tid):
+        raise NotImplementedError
+
+    def range(self, field, low, high):
+        raise NotImplementedError
+
+class LinearStrategy(LookupStrategy):
+    """compare_dsa_search's list scan, and range_index's linear filter"""
+    name = 'linear'
+    max_size = LINEAR_MAX_SIZE
+
+    def build(self, transactions):
+        self.transactions = transactions
+
+    def point(self, tid):
+        return compare_dsa_search.linear_search(self.transactions, tid)
+
+    def range(self, field, low, high):
+        return sorted(range_index.linear_filter(self.transactions, field, *index_bounds(field, low, high)))
+
+class DictStrategy(LookupStrategy):
+    """compare_dsa_search's TransactionID -> record dict (no ordered access)"""
+    name = 'dict'
+    supports_range = False
+
+    def build(self, transactions):
+        self.by_id = compare_dsa_search.build_transaction_dict(transactions)
+
+    def point(self, tid):
+        return compare_dsa_search.dict_lookup(self.by_id, tid)
+
+class SortedArrayStrategy(LookupStrategy):
+    """Parallel sorted lists searched with bisect: IDs for points, (key, ID) per range field"""
+    name = 'sorted-array'
+
+    def build(self, transactions):
+        ordered = sorted(transactions, key=lambda tx: tx['TransactionID'])
+        self.ids = [tx['TransactionID'] for tx in ordered]
+        self.records = ordered
+        self.keys = {}
+        self.key_ids = {}
+        for field, key in range_index.KEY_FUNCTIONS.items():
+            pairs = sorted((key(tx.get(field)), tx['TransactionID']) for tx in transactions
+                           if key(tx.get(field)) is not None)
+            self.keys[field] = [pair[0] for pair in pairs]
+            self.key_ids[field] = [pair[1] for pair in pairs]
+
+    def point(self, tid):
+        i = bisect_left(self.ids, tid)
+        return self.records[i] if i < len(self.ids) and self.ids[i] == tid else None
+
+    def range(self, field, low, high):
+        low, high = index_bounds(field, low, high)
+        keys = self.keys[field]
+        return sorted(self.key_ids[field][bisect_left(keys, low):bisect_right(keys, high)])
+
+class RangeIndexStrategy(LookupStrategy):
+    """range_index.SortedIndex per range field (ranges only)"""
+    name = 'range-index'
+    supports_point = False
+
+    def build(self, transactions):
+        self.indexes = {field: range_index.SortedIndex((key(tx.get(field)), tx['TransactionID'])
+                                                       for tx in transactions if key(tx.get(field)) is not None)
+                        for field, key in range_index.KEY_FUNCTIONS.items()}
+
+    def range(self, field, low, high):
+        return sorted(self.indexes[field].range(*index_bounds(field, low, high)))
+
+class StoreStrategy(LookupStrategy):
+    """api/store.py's TransactionStore, as the REST API queries it"""
+    name = 'store'
+
+    def build(self, transactions):
+        self.store = store.TransactionStore(transactions)
+
+    def point(self, tid):
+        return self.store.get(tid)
+
+    def range(self, field, low, high):
+        return sorted(self.store.range_ids(field, low, high))
+
+# Strategies by name; register() adds others
+STRATEGIES = {}
+
+def register(strategy_class):
+    """Makes a LookupStrategy subclass available by its name (usable as a decorator)"""
+    STRATEGIES[strategy_class.name] = strategy_class
+    return strategy_class
+
+for strategy_class in (LinearStrategy, DictStrategy, SortedArrayStrategy, RangeIndexStrategy, StoreStrategy):
+    register(strategy_class)
+
+def summarize(samples):
+    """Statistics of per-query times in seconds, reported in microseconds"""
+    to_us = lambda seconds: round(seconds * 1e6, 3)
+    return {
+        'median_us': to_us(statistics.median(samples)),
+        'min_us': to_us(min(samples)),
+        'max_us': to_us(max(samples)),
+        'stdev_us': to_us(statistics.stdev(samples)) if len(samples) > 1 else 0.0,
+        'runs': len(samples),
+    }
+
+def time_runs(func, queries, repeats):
+    """
+    Per-query seconds of each of `repeats` runs. Each run makes as many
+    passes over the queries as it takes to last MIN_RUN_SECONDS, so fast
+    lookups are not drowned in timer noise; finding that count warms up.
+    """
+    def run(passes):
+        start = time.perf_counter()
+        for _ in range(passes):
+            for query in queries:
+                func(*query)
+        return time.perf_counter() - start
+
+    passes = 1
+    while run(passes) < MIN_RUN_SECONDS:
+        passes *= 2
+    return [run(passes) / (passes * len(queries)) for _ in range(repeats)]
+
+def measure_build(strategy, transactions):
+    """(seconds, bytes still allocated by the structure) to build a strategy"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    strategy.build(transactions)
+    seconds = time.perf_counter() - start
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return seconds, retained
+
+def run_size(size, strategy_names, repeats, point_queries, seed, include_large_linear=False):
+    """Result rows of every strategy for one dataset size"""
+    transactions = list(synthetic_transactions(size, seed))
+    rng = random.Random(seed + size)
+    point_ids = [(rng.randint(1, size),) for _ in range(point_queries)]
+    expected_ranges = None
+    rows = []
+    for name in strategy_names:
+        strategy = STRATEGIES[name]()
+        if strategy.max_size is not None and size > strategy.max_size and not include_large_linear:
+            print(f"{name:>13} {size:>9} skipped (above {strategy.max_size} records)")
+            continue
+        build_seconds, memory_bytes = measure_build(strategy, transactions)
+        row = {'strategy': name, 'size': size, 'build_seconds': round(build_seconds, 4),
+               'memory_bytes': memory_bytes, 'queries': {}}
+        if strategy.supports_point:
+            assert all(strategy.point(tid)['TransactionID'] == tid for (tid,) in point_ids), f"{name}: wrong record"
+            row['queries']['point'] = summarize(time_runs(strategy.point, point_ids, repeats))
+        if strategy.supports_range:
+            results = [strategy.range(field, low, high) for _, field, low, high in RANGE_QUERIES]
+            if expected_ranges is None:
+                expected_ranges = results
+            assert results == expected_ranges, f"{name}: range results differ from the other strategies"
+            for (label, field, low, high), matches in zip(RANGE_QUERIES, results):
+                stats = summarize(time_runs(strategy.range, [(field, low, high)], repeats))
+                stats['matches'] = len(matches)
+                row['queries'][f"range {label}"] = stats
+        rows.append(row)
+        print_row(row)
+    return rows
+
+def print_row(row):
+    timings = ', '.join(f"{query} {stats['median_us']:.2f}us" for query, stats in row['queries'].items())
+    print(f"{row['strategy']:>13} {row['size']:>9} build {row['build_seconds']:.3f}s "
+          f"mem {row['memory_bytes'] / 2 ** 20:.1f}MB  {timings}")
+
+def compare(results, baseline, max_regression):
+    """
+    (strategy, size, query, baseline time, current time) for every
+    measurement present in both result sets whose fastest run grew by more
+    than max_regression (0.25 = 25% slower). The fastest run is compared
+    as other load on the machine only ever adds time.
+    """
+    previous = {(row['strategy'], row['size'], query): stats['min_us']
+                for row in baseline['results'] for query, stats in row['queries'].items()}
+    regressions = []
+    for row in results['results']:
+        for query, stats in row['queries'].items():
+            before = previous.get((row['strategy'], row['size'], query))
+            if before and stats['min_us'] > before * (1 + max_regression):
+                regressions.append((row['strategy'], row['size'], query, before, stats['min_us']))
+    return regressions
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Benchmark transaction lookup structures.')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000],
+                            help='dataset sizes (up to 10000000)')
+    arg_parser.add_argument('--strategies', nargs='+', choices=sorted(STRATEGIES), default=list(STRATEGIES))
+    arg_parser.add_argument('--repeats', type=int, default=7, help='timed runs per measurement')
+    arg_parser.add_argument('--point-queries', type=int, default=200, help='random IDs looked up per run')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--include-large-linear', action='store_true',
+                            help=f'run linear scans above {LINEAR_MAX_SIZE} records too')
+    arg_parser.add_argument('--output', help='write results as JSON to this path')
+    arg_parser.add_argument('--baseline', help='results JSON of an earlier run to check for regressions')
+    arg_parser.add_argument('--max-regression', type=float, default=0.25,
+                            help='allowed slowdown against the baseline (0.25 = 25%%)')
+    args = arg_parser.parse_args(argv)
+
+    results = {
+        'created': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'repeats': args.repeats, 'point_queries': args.point_queries, 'seed': args.seed},
+        'results': [],
+    }
+    for size in args.sizes:
+        results['results'] += run_size(size, args.strategies, args.repeats, args.point_queries,
+                                       args.seed, args.include_large_linear)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        for strategy, size, query, before, after in regressions:
+            print(f"REGRESSION {strategy} {size} {query}: {before:.2f}us -> {after:.2f}us")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.max_regression:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+#--------------------------------------------------------------------------------
+# Script Name: bench_parse_xml.py
+# Description: Benchmarks parse_xml.py extraction throughput.
+#              parallel:   scales the sample SMS export up to a target message
+#                          count and times the serial pipeline against the
+#                          multi-process pipeline for each worker count.
+#              classifier: messages/sec of the original uncompiled extractors
+#                          against the precompiled single-lowercase ones.
+#              Both modes check that outputs are identical.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 bench_parse_xml.py [parallel|classifier] [--messages N] [--workers 1 2 4 8]
+#--------------------------------------------------------------------------------
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+import parse_xml
+
+def legacy_extract_transaction_info(body):
+    """
+    Pre-compilation extract_transaction_info, kept as the "before" baseline.
+    """
+    transaction = {}
+    # Improve regex to:
+    # match amount with commas and currency (e.g., "1,000 RWF")
+    amount_match = re.search(r'([\d,]+) (\w{3})', body)
+    if amount_match:
+        # Remove commas before float conversion
+        # Check for empty string to prevent ValueError
+        amount_str = amount_match.group(1).replace(',', '')
+        if amount_str:
+            transaction['Amount'] = float(amount_str)
+        else:
+            transaction['Amount'] = None
+        transaction['Currency'] = amount_match.group(2)
+    if 'received' in body.lower():
+        transaction['TransactionType'] = 'deposit'
+    elif 'payment' in body.lower():
+        transaction['TransactionType'] = 'payment'
+    elif 'transferred' in body.lower():
+        transaction['TransactionType'] = 'transfer'
+    elif 'withdrawal' in body.lower():
+        transaction['TransactionType'] = 'withdrawal'
+    else:
+        transaction['TransactionType'] = 'other'
+    # Extract datetime from SMS body text
+    dt_match = re.search(r'at (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})', body)
+    transaction['DateTime'] = dt_match.group(1) if dt_match else None
+    # Extract reference number from SMS body text
+    ref_match = re.search(r'(Financial Transaction Id:|TxId:)\s*([\d]+)', body)
+    transaction['ReferenceNumber'] = ref_match.group(2) if ref_match else None
+    # Extract balance after transaction and converting to float safely
+    bal_match = re.search(r'new balance:?([\d,]+) (\w{3})', body.lower())
+    transaction['BalanceAfterTransaction'] = float(bal_match.group(1).replace(',', '')) if bal_match else None
+    transaction['Status'] = 'confirmed'  # Default
+    transaction['MessageText'] = body.replace("'", "''") if body else ''
+    return transaction
+
+def legacy_extract_users(body):
+    """
+    Pre-compilation extract_users, kept as the "before" baseline.
+    """
+    users = []
+
+    # Improve regex to:
+    # capture sender name strictly as letters and spaces only,
+    # and match phone number including digits and stars, ignoring case
+    sender_match = re.search(r'from ([A-Za-z\s]+) \(([*\d]+)\)', body, re.IGNORECASE)
+    if sender_match:
+        users.append({
+            'Name': sender_match.group(1).strip(),
+            'PhoneNumber': sender_match.group(2).strip(),
+            'UserType': 'sender'
+        })
+    # Improve receiver regex to:
+    # non-greedy matching to avoid trailing extra words,
+    # with optional space, and parentheses around phone number included
+    receiver_match = re.search(r'to ([A-Za-z\s]+?) ?\(?(\d+)\)?', body, re.IGNORECASE)
+    if receiver_match:
+        users.append({
+            'Name': receiver_match.group(1).strip(),
+            'PhoneNumber': receiver_match.group(2).strip(),
+            'UserType': 'receiver'
+        })
+    else:
+        receiver_match2 = re.search(r'to ([\w\s]+) \(([\d]+)\)', body)
+        if receiver_match2:
+            users.append({
+                'Name': receiver_match2.group(1).strip(),
+                'PhoneNumber': receiver_match2.group(2).strip(),
+                'UserType': 'receiver'
+            })
+    return users
+
+def build_corpus(source_xml, target_path, messages):
+    """
+    Writes an XML file with `messages` <sms> elements by repeating the
+    sample export. Returns the number of messages written.
+    """
+    records = [(body, date_ms) for body, date_ms in parse_xml.iter_sms_attributes(source_xml) if body]
+    written = 0
+    with open(target_path, 'w', encoding='utf-8') as f:
+        f.write("<?xml version='1.0' encoding='utf-8'?>\n<smses>\n")
+        while written < messages:
+            body, date_ms = records[written % len(records)]
+            sms = parse_xml.ET.Element('sms', body=body, date=date_ms or '')
+            f.write(parse_xml.ET.tostring(sms, encoding='unicode'))
+            f.write('\n')
+            written += 1
+        f.write('</smses>\n')
+    return written
+
+def run_once(xml_path, workers, batch_size):
+    """
+    Consumes the transaction generator and returns (seconds, count, digest).
+    The digest covers the serialized output so runs can be compared.
+    """
+    digest = hashlib.sha256()
+    count = 0
+    start = time.perf_counter()
+    for tx in parse_xml.iter_transactions(xml_path, workers=workers, batch_size=batch_size):
+        digest.update(json.dumps(tx, sort_keys=True).encode())
+        count += 1
+    return time.perf_counter() - start, count, digest.hexdigest()
+
+def bench_classifier(source_xml, repeat):
+    """
+    Times legacy vs precompiled extraction over every message in the
+    export, `repeat` times, after checking both give identical output.
+    Returns True when outputs match.
+    """
+    bodies = [body for body, _ in parse_xml.iter_sms_attributes(source_xml) if body is not None]
+    mismatches = sum(
+        1 for body in bodies
+        if (legacy_extract_transaction_info(body), legacy_extract_users(body))
+        != (parse_xml.extract_transaction_info(body), parse_xml.extract_users(body))
+    )
+    print(f"Corpus: {len(bodies)} messages x {repeat} repeats, mismatches: {mismatches}")
+
+    def legacy(body):
+        return legacy_extract_transaction_info(body), legacy_extract_users(body)
+
+    def precompiled(body):
+        lowered = body.lower()
+        return parse_xml.extract_transaction_info(body, lowered), parse_xml.extract_users(body, lowered)
+
+    print(f"{'extractor':>12} {'seconds':>10} {'msgs/sec':>12}")
+    timings = {}
+    for name, extract in (('legacy', legacy), ('precompiled', precompiled)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for body in bodies:
+                extract(body)
+        timings[name] = time.perf_counter() - start
+        print(f"{name:>12} {timings[name]:>10.3f} {len(bodies) * repeat / timings[name]:>12.0f}")
+    print(f"Speedup: {timings['legacy'] / timings['precompiled']:.2f}x")
+    return mismatches == 0
+
+def bench_parallel(source_xml, messages, worker_counts, batch_size):
+    """
+    Times the serial pipeline against each worker count on a scaled corpus.
+    Returns True when every parallel run matches the serial output.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xml_path = os.path.join(tmp_dir, 'bench_sms.xml')
+        total = build_corpus(source_xml, xml_path, messages)
+        print(f"Corpus: {total} messages, {os.path.getsize(xml_path) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+
+        baseline_time, baseline_count, baseline_digest = run_once(xml_path, 1, batch_size)
+        print(f"{'workers':>8} {'seconds':>10} {'msgs/sec':>12} {'speedup':>8} {'identical':>10}")
+        print(f"{1:>8} {baseline_time:>10.3f} {baseline_count / baseline_time:>12.0f} {1.0:>8.2f} {'yes':>10}")
+
+        identical = True
+        for workers in sorted(set(worker_counts)):
+            if workers <= 1:
+                continue
+            seconds, count, digest = run_once(xml_path, workers, batch_size)
+            same = digest == baseline_digest and count == baseline_count
+            identical = identical and same
+            print(f"{workers:>8} {seconds:>10.3f} {count / seconds:>12.0f} "
+                  f"{baseline_time / seconds:>8.2f} {'yes' if same else 'NO':>10}")
+    return identical
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark SMS extraction throughput.')
+    arg_parser.add_argument('mode', nargs='?', choices=['parallel', 'classifier'], default='parallel')
+    arg_parser.add_argument('--source', default='../data/raw/modified_sms_v2.xml')
+    arg_parser.add_argument('--messages', type=int, default=200000)
+    arg_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    arg_parser.add_argument('--batch-size', type=int, default=parse_xml.DEFAULT_BATCH_SIZE)
+    arg_parser.add_argument('--repeat', type=int, default=20,
+                            help='passes over the corpus in classifier mode')
+    args = arg_parser.parse_args()
+
+    if args.mode == 'classifier':
+        identical = bench_classifier(args.source, args.repeat)
+    else:
+        identical = bench_parallel(args.source, args.messages, args.workers, args.batch_size)
+
+    if not identical:
+        print("Outputs differ from the baseline run.")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
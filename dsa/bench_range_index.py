@@ -0,0 +1,88 @@
+#--------------------------------------------------------------------------------
+# Script Name: bench_range_index.py
+# Description: Benchmarks range queries through the sorted index in
+#              range_index.py against the linear filter, on synthetic
+#              transactions spread over a year. Reports build time, query
+#              time for date and amount ranges of different widths, and the
+#              cost of keeping the index up to date on insert and delete.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 bench_range_index.py [--sizes 10000 100000 1000000] [--queries N]
+#--------------------------------------------------------------------------------
+
+from datetime import datetime, timedelta
+import argparse
+import random
+import time
+
+import range_index
+
+START = datetime(2024, 1, 1)
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# (label, field, low, high); DateTime bounds are epoch seconds from START
+QUERIES = (
+    ('1 day', 'DateTime', 86400 * 100, 86400 * 101 - 1),
+    ('30 days', 'DateTime', 86400 * 100, 86400 * 130 - 1),
+    ('20,001-50,000', 'Amount', 20001.0, 50000.0),
+)
+
+def synthetic_transactions(count):
+    """Transactions with a DateTime within 2024 and a log-uniform Amount"""
+    for tid in range(1, count + 1):
+        when = START + timedelta(seconds=random.randrange(366 * 86400))
+        yield {'TransactionID': tid, 'Amount': float(round(10 ** random.uniform(2, 6))),
+               'DateTime': when.strftime(DATETIME_FORMAT)}
+
+def best_of(repeats, func, *args):
+    """Fastest of `repeats` calls in seconds, and the last result"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def bench_size(count, queries):
+    transactions = list(synthetic_transactions(count))
+    offset = range_index.datetime_key(START.strftime(DATETIME_FORMAT))
+    start = time.perf_counter()
+    indexes = {field: range_index.SortedIndex((key(tx[field]), tx['TransactionID']) for tx in transactions)
+               for field, key in range_index.KEY_FUNCTIONS.items()}
+    build_seconds = time.perf_counter() - start
+    print(f"\n{count} transactions, indexes built in {build_seconds:.2f}s")
+    print(f"{'query':>15} {'matches':>8} {'linear ms':>10} {'index ms':>9} {'speedup':>8}")
+
+    for label, field, low, high in QUERIES:
+        if field == 'DateTime':
+            low, high = low + offset, high + offset
+        linear_seconds, expected = best_of(3, range_index.linear_filter, transactions, field, low, high)
+        index_seconds, found = best_of(queries, lambda: list(indexes[field].range(low, high)))
+        assert sorted(found) == expected, f"{label}: index and linear filter disagree"
+        print(f"{label:>15} {len(found):>8} {linear_seconds * 1000:>10.2f} {index_seconds * 1000:>9.3f} "
+              f"{linear_seconds / index_seconds:>7.0f}x")
+
+    # Incremental maintenance: move random transactions to a new amount
+    index = indexes['Amount']
+    moved = random.sample(transactions, min(queries * 10, count))
+    start = time.perf_counter()
+    for tx in moved:
+        index.remove(tx['Amount'], tx['TransactionID'])
+        tx['Amount'] += 1.0
+        index.add(tx['Amount'], tx['TransactionID'])
+    update_seconds = (time.perf_counter() - start) / len(moved)
+    print(f"{'update':>15} {len(moved):>8} {'':>10} {update_seconds * 1000:>9.3f}")
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark the sorted range index against a linear filter.')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    arg_parser.add_argument('--queries', type=int, default=20,
+                            help='repeats per indexed query (update count is 10x this)')
+    args = arg_parser.parse_args()
+    random.seed(0)
+    for count in args.sizes:
+        bench_size(count, args.queries)
+
+if __name__ == '__main__':
+    main()
@@ -7,14 +7,19 @@
 # Usage:  python3 compare_dsa_search.py
 #--------------------------------------------------------------------------------
 
-import json
 import time
 import random
 
+try:
+    from dsa import range_index
+    from dsa import transaction_io
+except ImportError:  # run as a script from dsa/
+    import range_index
+    import transaction_io
+
 def load_transactions(json_path='../data/processed/transactions.json'):
-    # load transactions from JSON file & return list of transaction dictionaries
-    with open(json_path, 'r') as f:
-        return json.load(f)
+    # load transactions from JSON or NDJSON file & return list of transaction dictionaries
+    return transaction_io.load_transactions_file(json_path)
 
 def linear_search(transactions, transaction_id):
     # do linear search for a transaction by ID
@@ -57,6 +62,30 @@ def compare_search_performance(transactions, ids_to_search):
 
     return linear_duration, dict_duration
 
+def compare_range_performance(transactions, field, low, high):
+    # measure & compare a range query by linear filter and by the sorted index
+    # bounds are index keys (epoch seconds for DateTime)
+    # return tuple: (linear_filter_time, index_range_time) in seconds
+    key = range_index.KEY_FUNCTIONS[field]
+    index = range_index.SortedIndex((key(i.get(field)), i['TransactionID']) for i in transactions
+                                    if key(i.get(field)) is not None)
+
+    # linear filter time
+    start_linear = time.perf_counter()
+    linear_matches = range_index.linear_filter(transactions, field, low, high)
+    linear_duration = time.perf_counter() - start_linear
+
+    # sorted index time: O(log n + k)
+    start_index = time.perf_counter()
+    index_matches = list(index.range(low, high))
+    index_duration = time.perf_counter() - start_index
+
+    print(f"{field} range: {len(index_matches)} matches "
+          f"(same as linear filter: {sorted(index_matches) == sorted(linear_matches)})")
+    print(f"Linear Filter took: {linear_duration:.6f} seconds.")
+    print(f"Sorted Index took: {index_duration:.6f} seconds.")
+    return linear_duration, index_duration
+
 def main():
     # load transactions from JSON file
     transactions = load_transactions()
@@ -74,14 +103,24 @@ def main():
     # compare search performance
     compare_search_performance(transactions, ids_to_search)
 
+    # compare range queries: one week of transactions, and amounts of 20,001-50,000
+    print()
+    compare_range_performance(transactions, 'DateTime', range_index.datetime_key('2024-06-01'),
+                              range_index.datetime_key('2024-06-07 23:59:59'))
+    print()
+    compare_range_performance(transactions, 'Amount', 20001, 50000)
+
     # reflections
     print("\nReflection:")
     print("Dictionary lookup is significantly faster than linear search because dictionaries")
     print("use hash tables providing average O(1) time complexity, whereas linear search")
     print("requires O(n) time scanning the entire list.")
     print("For larger datasets, using efficient data structures like dictionaries greatly")
-    print("improves performance. Further improvements could include balanced trees or")
-    print("database indexing for huge datasets where sorted access is beneficial.")
+    print("improves performance. Range queries need sorted access instead: the sorted index")
+    print("finds the first match by binary search and reads the k matches in O(log n + k),")
+    print("while the linear filter still checks every transaction.")
+    print("\nFor synthetic datasets of 1K-10M records, more structures and repeated runs")
+    print("with JSON results, see bench_lookup.py.")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,128 @@
+#--------------------------------------------------------------------------------
+# Script Name: etl_metrics.py
+# Description: Opt-in stage timers and counters for the ETL scripts
+#              (parse_xml.py: parse, extract, write; load_db.py: read,
+#              resolve, insert, commit). Time is charged to the innermost
+#              running stage, so when the writer pulls records through
+#              extraction, which pulls messages from the XML parser, each
+#              stage's seconds exclude the stages it waited on and the stages
+#              add up to the run's wall time. Results are appended to
+#              data/logs/etl.log and can also be written to the SystemLog table.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  from dsa import etl_metrics
+#         timer = etl_metrics.StageTimer('parse_xml')
+#         for msg in etl_metrics.timed(timer, 'parse', messages): ...
+#         with etl_metrics.stage(timer, 'write'): ...
+#         timer.write_log()
+#--------------------------------------------------------------------------------
+
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+import os
+import time
+
+LOG_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'logs', 'etl.log'))
+LOG_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+class StageTimer:
+    """
+    Wall seconds and item counts per named stage of one ETL run, reported
+    in the order of `stages` and then of first use.
+    Not thread-safe: stages must be entered and left on one thread.
+    """
+
+    def __init__(self, job, stages=()):
+        self.job = job
+        self.seconds = dict.fromkeys(stages, 0.0)
+        self.items = dict.fromkeys(stages, 0)
+        self.started = time.perf_counter()
+        self._stack = []
+        self._mark = self.started
+
+    def _charge(self):
+        # Adds the time since the last switch to the running stage
+        now = time.perf_counter()
+        if self._stack:
+            self.seconds[self._stack[-1]] += now - self._mark
+        self._mark = now
+
+    def enter(self, name):
+        self._charge()
+        self._stack.append(name)
+        self.seconds.setdefault(name, 0.0)
+        self.items.setdefault(name, 0)
+
+    def leave(self):
+        self._charge()
+        self._stack.pop()
+
+    @contextmanager
+    def stage(self, name, items=0):
+        """Times the with-block as stage name, counting items for it"""
+        self.enter(name)
+        try:
+            yield
+        finally:
+            self.leave()
+            self.items[name] += items
+
+    def count(self, name, items=1):
+        self.items[name] = self.items.get(name, 0) + items
+
+    def timed(self, name, iterable, size=None):
+        """
+        Yields iterable's items, timing each step of it as stage name and
+        counting one per item, or size(item) when an item is a batch
+        """
+        iterator = iter(iterable)
+        while True:
+            self.enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.leave()
+            self.items[name] += 1 if size is None else size(item)
+            yield item
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def messages(self):
+        """One 'job stage=... seconds=... items=... per_second=...' line per stage, then the total"""
+        lines = []
+        for name, seconds in self.seconds.items():
+            items = self.items.get(name, 0)
+            rate = round(items / seconds) if seconds else 0
+            lines.append(f"{self.job} stage={name} seconds={seconds:.3f} items={items} per_second={rate}")
+        elapsed = self.elapsed()
+        untimed = elapsed - sum(self.seconds.values())
+        lines.append(f"{self.job} stage=total seconds={elapsed:.3f} untimed={max(untimed, 0):.3f}")
+        return lines
+
+    def write_log(self, path=LOG_PATH):
+        """Appends messages() to the ETL log, each line stamped with the time and 'info'"""
+        stamp = datetime.now().strftime(LOG_TIMESTAMP_FORMAT)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for message in self.messages():
+                f.write(f"{stamp} info {message}\n")
+
+    def write_system_log(self, conn):
+        """Inserts messages() into the SystemLog table through a database connection and commits"""
+        stamp = datetime.now().strftime(LOG_TIMESTAMP_FORMAT)
+        cursor = conn.cursor()
+        cursor.executemany("INSERT INTO SystemLog (Timestamp, LogLevel, Message) VALUES (%s, %s, %s)",
+                           [(stamp, 'info', message) for message in self.messages()])
+        conn.commit()
+        cursor.close()
+
+def stage(timer, name, items=0):
+    """timer.stage(name, items), or a no-op context when instrumentation is off (timer is None)"""
+    return nullcontext() if timer is None else timer.stage(name, items)
+
+def timed(timer, name, iterable, size=None):
+    """timer.timed(name, iterable, size), or iterable unchanged when instrumentation is off"""
+    return iterable if timer is None else timer.timed(name, iterable, size)
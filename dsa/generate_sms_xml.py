@@ -0,0 +1,249 @@
+#--------------------------------------------------------------------------------
+# Script Name: generate_sms_xml.py
+# Description: Writes a synthetic SMS backup export of any size (1M-50M
+#              messages and beyond) in the format of modified_sms_v2.xml,
+#              for benchmarking the ETL pipeline at scale. Message bodies
+#              follow the real MoMo templates (received, payments, bank
+#              deposits, transfers, withdrawals, merchant and token payments,
+#              bundles, OTPs) in roughly the sample's proportions, with a
+#              running balance and unique TxIds. Output depends only on the
+#              seed and the message count, and is written as it is generated,
+#              so memory stays flat whatever the size.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 generate_sms_xml.py output.xml [--messages 1000000] [--seed 0] [--users N]
+#--------------------------------------------------------------------------------
+
+from datetime import datetime, timedelta, timezone
+from bisect import bisect_right
+from itertools import accumulate
+from xml.sax.saxutils import escape
+import argparse
+import random
+import uuid
+
+DEFAULT_MESSAGES = 1000000
+DEFAULT_SEED = 0
+# Counterparties per message when --users is not given
+MESSAGES_PER_USER = 100
+# Messages formatted per write() call
+WRITE_BATCH_SIZE = 5000
+
+# The sample export starts here; SMS bodies are in Kigali time (UTC+2)
+START = datetime(2024, 5, 10, 14, 30, 51, tzinfo=timezone.utc)
+LOCAL_OFFSET = timedelta(hours=2)
+SERVICE_CENTER = '+250788110381'
+# Account number shown in transfer and withdrawal messages
+ACCOUNT = '36521838'
+OWNER = 'Abebe Chala CHEBUDIE'
+
+FIRST_NAMES = ('Jane', 'Alex', 'Samuel', 'Robert', 'Linda', 'Sophia', 'Eric', 'Grace',
+               'Patrick', 'Aline', 'Jean', 'Claudine', 'Emmanuel', 'Diane', 'Olivier', 'Ange')
+LAST_NAMES = ('Smith', 'Doe', 'Carter', 'Brown', 'Green', 'Mugisha', 'Uwase', 'Niyonzima',
+              'Habimana', 'Ishimwe', 'Mukamana', 'Nkurunziza', 'Keza', 'Gatete', 'Iradukunda', 'Umutoni')
+MERCHANTS = ('DIRECT PAYMENT LTD', 'Data Bundle MTN', 'ESICIA LTD',
+             'INFORMATION TECHNOLOGY ENGINEERING CONSTRUCTION ITEC Ltd')
+BUNDLES = (('500FRW(800MB)', 500), ('2000Rwf(1GB)/30days', 2000), ('3000Frw=2500Mins+100SMS', 3000))
+# Amounts seen in the sample, smallest first
+AMOUNTS = (50, 100, 200, 500, 600, 1000, 1500, 1800, 2000, 2500, 2800, 3000, 3500,
+           4000, 5000, 10000, 12000, 20000, 25000, 30000, 40000, 50000)
+DEPOSIT_AMOUNTS = (5000, 10000, 20000, 30000, 40000, 50000)
+# Largest fee charged (withdrawals); spending keeps this much in the balance
+MAX_FEE = 350
+
+# Financial Transaction Ids / TxIds are 11 digits. Stepping through them by a
+# stride coprime to their count makes them look random but never repeat.
+TXID_BASE = 10000000000
+TXID_SPAN = 90000000000
+TXID_STRIDE = 7368787201
+
+class Account:
+    """Running state of the generated account: clock, balance, counterparties and TxIds"""
+
+    def __init__(self, rng, users):
+        self.rng = rng
+        self.when = START
+        self.balance = 0
+        self.users = [self.make_user(rank) for rank in range(users)]
+        # A few counterparties get most of the traffic, popularity falling off as 1 / rank
+        self.cum_weights = list(accumulate(1 / rank for rank in range(1, users + 1)))
+        self.txid_position = rng.randrange(TXID_SPAN)
+
+    @staticmethod
+    def make_user(rank):
+        """(name, phone, merchant code) of the counterparty with this popularity rank"""
+        name = f"{FIRST_NAMES[rank % len(FIRST_NAMES)]} {LAST_NAMES[rank // len(FIRST_NAMES) % len(LAST_NAMES)]}"
+        return name, f"25078{8000000 + rank % 2000000:07d}", f"{10000 + rank % 90000}"
+
+    def counterparty(self):
+        return self.rng.choices(self.users, cum_weights=self.cum_weights)[0]
+
+    def next_txid(self):
+        self.txid_position = (self.txid_position + TXID_STRIDE) % TXID_SPAN
+        return TXID_BASE + self.txid_position
+
+    def spend_amount(self):
+        """An amount the balance covers with room for a fee, or None if it covers none"""
+        affordable = bisect_right(AMOUNTS, self.balance - MAX_FEE)
+        return self.rng.choice(AMOUNTS[:affordable]) if affordable else None
+
+def received(account, at):
+    name, phone, _ = account.counterparty()
+    amount = account.rng.choice(AMOUNTS)
+    account.balance += amount
+    return (f"You have received {amount} RWF from {name} (*********{phone[-3:]}) on your mobile money account "
+            f"at {at}. Message from sender: . Your new balance:{account.balance} RWF. "
+            f"Financial Transaction Id: {account.next_txid()}.")
+
+def bank_deposit(account, at):
+    amount = account.rng.choice(DEPOSIT_AMOUNTS)
+    account.balance += amount
+    return (f"*113*R*A bank deposit of {amount} RWF has been added to your mobile money account at {at}. "
+            f"Your NEW BALANCE :{account.balance} RWF. Cash Deposit::CASH::::0::250795963036."
+            f"Thank you for using MTN MobileMoney.*EN#")
+
+def payment(account, at, amount):
+    name, _, code = account.counterparty()
+    account.balance -= amount
+    return (f"TxId: {account.next_txid()}. Your payment of {amount:,} RWF to {name} {code} has been completed "
+            f"at {at}. Your new balance: {account.balance:,} RWF. Fee was 0 RWF.Kanda*182*16# wiyandikishe "
+            f"muri poromosiyo ya BivaMoMotima, ugire amahirwe yo gutsindira ibihembo bishimishije.")
+
+def transfer(account, at, amount):
+    name, phone, _ = account.counterparty()
+    account.balance -= amount + 100
+    return (f"*165*S*{amount} RWF transferred to {name} ({phone}) from {ACCOUNT} at {at} . Fee was: 100 RWF. "
+            f"New balance: {account.balance} RWF. Kugura ama inite cg interineti kuri MoMo, "
+            f"Kanda *182*2*1# .*EN#")
+
+def token_payment(account, at, amount):
+    rng = account.rng
+    biller = rng.choice(('Airtime', 'Bundles and Packs', 'MTN Cash Power'))
+    token = '-'.join(f"{rng.randrange(100000):05d}" for _ in range(4)) if biller == 'MTN Cash Power' else ''
+    account.balance -= amount
+    return (f"*162*TxId:{account.next_txid()}*S*Your payment of {amount} RWF to {biller} with token "
+            f"{token + ' ' if token else ''}has been completed at {at}. Fee was 0 RWF. "
+            f"Your new balance: {account.balance} RWF . Message: - -. *EN#")
+
+def merchant_payment(account, at, amount):
+    merchant = account.rng.choice(MERCHANTS)
+    account.balance -= amount
+    return (f"*164*S*Y'ello,A transaction of {amount} RWF by {merchant} on your MOMO account was "
+            f"successfully completed at {at}. Message from debit receiver: . Your new balance:{account.balance} "
+            f"RWF. Fee was 0 RWF. Financial Transaction Id: {account.next_txid()}. "
+            f"External Transaction Id: {account.rng.randrange(10000000, 100000000)}.*EN#")
+
+def withdrawal(account, at, amount):
+    name, phone, _ = account.counterparty()
+    account.balance -= amount + 350
+    return (f"You {OWNER} (*********036) have via agent: Agent {name.split()[0]} ({phone}), withdrawn {amount} "
+            f"RWF from your mobile money account: {ACCOUNT} at {at} and you can now collect your money in cash. "
+            f"Your new balance: {account.balance} RWF. Fee paid: 350 RWF. Message from agent: 1. "
+            f"Financial Transaction Id: {account.next_txid()}.")
+
+def bundle(account, at, amount):
+    # Bundle purchases carry no date or reference; only the sms date identifies them
+    affordable = [(label, price) for label, price in BUNDLES if price <= amount]
+    if not affordable:
+        return None
+    label, price = account.rng.choice(affordable)
+    account.balance -= price
+    return f"Yello!Umaze kugura {label} igura {price:,} RWF"
+
+def one_time_password(account, at):
+    rng = account.rng
+    return (f"<#> Dear Customer, your MTN MoMo application one-time password is :{rng.randrange(1000, 10000)}."
+            f"MTN MoMo does not recommend that you share or expose your one-time password with anyone. "
+            f"Be Vigilant. RdbS6eMOXvx N/RywfrtIZL>.")
+
+# (template, relative frequency in the sample export, spends from the balance)
+TEMPLATES = (
+    (payment, 660, True),
+    (transfer, 590, True),
+    (bank_deposit, 250, False),
+    (received, 65, False),
+    (token_payment, 55, True),
+    (merchant_payment, 35, True),
+    (bundle, 20, True),
+    (one_time_password, 8, False),
+    (withdrawal, 5, True),
+)
+TEMPLATE_CUM_WEIGHTS = list(accumulate(weight for _, weight, _ in TEMPLATES))
+
+def iter_messages(count, seed=DEFAULT_SEED, users=None):
+    """
+    Yields (date_ms, date_sent_ms, body) for `count` messages in date order.
+    A spending template falls back to a bank deposit when the balance
+    cannot cover it, so every balance in the output is non-negative and
+    follows from the amounts and fees before it.
+    """
+    rng = random.Random(seed)
+    account = Account(rng, users or max(count // MESSAGES_PER_USER, 5))
+    delivered = 0
+    for _ in range(count):
+        # At least a second apart, so no two messages share a body timestamp
+        account.when += timedelta(seconds=rng.randint(1, 10))
+        at = (account.when + LOCAL_OFFSET).strftime('%Y-%m-%d %H:%M:%S')
+        template, _, spends = rng.choices(TEMPLATES, cum_weights=TEMPLATE_CUM_WEIGHTS)[0]
+        if spends:
+            amount = account.spend_amount()
+            body = template(account, at, amount) if amount is not None else None
+        else:
+            body = template(account, at)
+        if body is None:
+            body = bank_deposit(account, at)
+        date_sent = int(account.when.timestamp()) * 1000
+        # Delivered a few seconds after it was sent, and never before the previous message
+        delivered = max(date_sent + rng.randrange(2000, 10000), delivered + 1)
+        yield delivered, date_sent, body
+
+def readable_date(date_ms):
+    """'10 May 2024 4:30:58 PM' in Kigali time, as in the export's readable_date"""
+    when = datetime.fromtimestamp(date_ms / 1000, timezone.utc) + LOCAL_OFFSET
+    hour = when.hour % 12 or 12
+    return f"{when.day} {when:%b %Y} {hour}:{when:%M:%S} {'PM' if when.hour >= 12 else 'AM'}"
+
+def sms_element(date_ms, date_sent_ms, body):
+    """One <sms> line with the export's attributes, the body escaped for a double-quoted attribute"""
+    return (f'<sms protocol="0" address="M-Money" date="{date_ms}" type="1" subject="null" '
+            f'body="{escape(body, {chr(34): "&quot;"})}" toa="null" sc_toa="null" '
+            f'service_center="{SERVICE_CENTER}" read="1" status="-1" locked="0" date_sent="{date_sent_ms}" '
+            f'sub_id="6" readable_date="{readable_date(date_ms)}" contact_name="(Unknown)" />\n')
+
+def write_sms_xml(output_path, count=DEFAULT_MESSAGES, seed=DEFAULT_SEED, users=None):
+    """
+    Writes `count` generated messages to output_path as an SMS backup
+    export. The same arguments always produce the same file.
+    Returns the number of messages written.
+    """
+    backup_set = uuid.UUID(int=random.Random(seed).getrandbits(128), version=4)
+    written = 0
+    with open(output_path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        f.write(f'<smses count="{count}" backup_set="{backup_set}" '
+                f'backup_date="{int(START.timestamp()) * 1000}" type="full">\n')
+        lines = []
+        for message in iter_messages(count, seed, users):
+            lines.append(sms_element(*message))
+            if len(lines) == WRITE_BATCH_SIZE:
+                f.write(''.join(lines))
+                written += len(lines)
+                lines = []
+        f.write(''.join(lines))
+        written += len(lines)
+        f.write('</smses>\n')
+    return written
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Generate a synthetic SMS backup XML export.')
+    arg_parser.add_argument('output_xml')
+    arg_parser.add_argument('--messages', type=int, default=DEFAULT_MESSAGES)
+    arg_parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    arg_parser.add_argument('--users', type=int,
+                            help=f'distinct counterparties (default: one per {MESSAGES_PER_USER} messages)')
+    args = arg_parser.parse_args()
+    written = write_sms_xml(args.output_xml, args.messages, args.seed, args.users)
+    print(f"Wrote {written} messages to {args.output_xml}")
+
+if __name__ == '__main__':
+    main()
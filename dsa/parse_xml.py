@@ -3,9 +3,12 @@
 # Description: Parses the modified_sms_v2.xml file in Python
 #              Converts SMS records into JSON objects (list of dictionaries)
 #              Saves the parsed JSON to a file for use in API
+#              (NDJSON when the output path ends in .ndjson or .jsonl)
 # Author: Monica Dhieu
 # Date:   2025-09-27
-# Usage:  python3 parse_xml.py [input_xml_path] [output_json_path]
+# Usage:  python3 parse_xml.py [input_xml_path] [output_json_path] [--stream] [--workers N] [--incremental]
+#         [--snapshot [--snapshot-path PATH]]
+#         [--metrics [--metrics-log PATH] [--metrics-db [--metrics-backend mysql|sqlite] [--sqlite-path PATH]]]
 #--------------------------------------------------------------------------------
 
 from lxml import etree as ET
@@ -13,9 +16,51 @@ from datetime import datetime
 import re
 import json
 import sys
+import argparse
+import textwrap
+import multiprocessing
+import hashlib
 import os
+from collections import deque
 from pathlib import Path
 
+try:
+    from dsa import transaction_io
+    from dsa import snapshot
+    from dsa import etl_metrics
+except ImportError:  # run as a script from dsa/
+    import transaction_io
+    import snapshot
+    import etl_metrics
+
+# Messages sent to a worker process per task in parallel mode
+DEFAULT_BATCH_SIZE = 2000
+# Batches submitted or finished but not yet consumed, per worker process
+PENDING_BATCHES_PER_WORKER = 2
+# Stages timed with --metrics
+ETL_STAGES = ('parse', 'extract', 'write')
+
+# SMS patterns, compiled once at module load
+# Amount with commas and currency (e.g., "1,000 RWF")
+AMOUNT_PATTERN = re.compile(r'([\d,]+) (\w{3})')
+DATETIME_PATTERN = re.compile(r'at (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+REFERENCE_PATTERN = re.compile(r'(Financial Transaction Id:|TxId:)\s*([\d]+)')
+# Matched against the lowercased body
+BALANCE_PATTERN = re.compile(r'new balance:?([\d,]+) (\w{3})')
+# Sender name strictly as letters and spaces, phone number with digits and stars
+SENDER_PATTERN = re.compile(r'from ([A-Za-z\s]+) \(([*\d]+)\)', re.IGNORECASE)
+# Receiver name non-greedy to avoid trailing extra words,
+# with optional space and parentheses around the phone number
+RECEIVER_PATTERN = re.compile(r'to ([A-Za-z\s]+?) ?\(?(\d+)\)?', re.IGNORECASE)
+RECEIVER_FALLBACK_PATTERN = re.compile(r'to ([\w\s]+) \(([\d]+)\)')
+# (keyword in lowercased body, TransactionType), checked in this order
+TRANSACTION_TYPE_KEYWORDS = (
+    ('received', 'deposit'),
+    ('payment', 'payment'),
+    ('transferred', 'transfer'),
+    ('withdrawal', 'withdrawal'),
+)
+
 def parse_sms_date(ms_timestamp):
     """
     Converts milliseconds to a formatted datetime string: '%Y-%m-%d %H:%M:%S'.
@@ -23,16 +68,17 @@ def parse_sms_date(ms_timestamp):
     ts = int(ms_timestamp) / 1000
     return datetime.utcfromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
 
-def extract_transaction_info(body):
+def extract_transaction_info(body, lowered=None):
     """
     Parses SMS text and extracts transaction details:
     amount, currency, transaction type, datetime, reference ID,
     balance after transaction, status, and full message text.
+    `lowered` is body.lower() when the caller has already computed it.
     """
+    if lowered is None:
+        lowered = body.lower()
     transaction = {}
-    # Improve regex to:
-    # match amount with commas and currency (e.g., "1,000 RWF")
-    amount_match = re.search(r'([\d,]+) (\w{3})', body)
+    amount_match = AMOUNT_PATTERN.search(body)
     if amount_match:
         # Remove commas before float conversion
         # Check for empty string to prevent ValueError
@@ -42,81 +88,336 @@ def extract_transaction_info(body):
         else:
             transaction['Amount'] = None
         transaction['Currency'] = amount_match.group(2)
-    if 'received' in body.lower():
-        transaction['TransactionType'] = 'deposit'
-    elif 'payment' in body.lower():
-        transaction['TransactionType'] = 'payment'
-    elif 'transferred' in body.lower():
-        transaction['TransactionType'] = 'transfer'
-    elif 'withdrawal' in body.lower():
-        transaction['TransactionType'] = 'withdrawal'
+    # First keyword found (in priority order) decides the type
+    for keyword, transaction_type in TRANSACTION_TYPE_KEYWORDS:
+        if keyword in lowered:
+            transaction['TransactionType'] = transaction_type
+            break
     else:
         transaction['TransactionType'] = 'other'
     # Extract datetime from SMS body text
-    dt_match = re.search(r'at (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})', body)
+    dt_match = DATETIME_PATTERN.search(body)
     transaction['DateTime'] = dt_match.group(1) if dt_match else None
     # Extract reference number from SMS body text
-    ref_match = re.search(r'(Financial Transaction Id:|TxId:)\s*([\d]+)', body)
+    ref_match = REFERENCE_PATTERN.search(body)
     transaction['ReferenceNumber'] = ref_match.group(2) if ref_match else None
     # Extract balance after transaction and converting to float safely
-    bal_match = re.search(r'new balance:?([\d,]+) (\w{3})', body.lower())
+    bal_match = BALANCE_PATTERN.search(lowered) if 'new balance' in lowered else None
     transaction['BalanceAfterTransaction'] = float(bal_match.group(1).replace(',', '')) if bal_match else None
     transaction['Status'] = 'confirmed'  # Default
     transaction['MessageText'] = body.replace("'", "''") if body else ''
     return transaction
 
-def extract_users(body):
+def extract_users(body, lowered=None):
     """
     Extracts user details from SMS text (sender and receiver info).
+    `lowered` is body.lower() when the caller has already computed it.
     """
+    if lowered is None:
+        lowered = body.lower()
     users = []
 
-    # Improve regex to:
-    # capture sender name strictly as letters and spaces only,
-    # and match phone number including digits and stars, ignoring case
-    sender_match = re.search(r'from ([A-Za-z\s]+) \(([*\d]+)\)', body, re.IGNORECASE)
+    # Both patterns need their keyword, so skip the regex scan when it is absent
+    sender_match = SENDER_PATTERN.search(body) if 'from ' in lowered else None
     if sender_match:
         users.append({
             'Name': sender_match.group(1).strip(),
             'PhoneNumber': sender_match.group(2).strip(),
             'UserType': 'sender'
         })
-    # Improve receiver regex to:
-    # non-greedy matching to avoid trailing extra words,
-    # with optional space, and parentheses around phone number included
-    receiver_match = re.search(r'to ([A-Za-z\s]+?) ?\(?(\d+)\)?', body, re.IGNORECASE)
+    if 'to ' not in lowered:
+        return users
+    receiver_match = RECEIVER_PATTERN.search(body) or RECEIVER_FALLBACK_PATTERN.search(body)
     if receiver_match:
         users.append({
             'Name': receiver_match.group(1).strip(),
             'PhoneNumber': receiver_match.group(2).strip(),
             'UserType': 'receiver'
         })
-    else:
-        receiver_match2 = re.search(r'to ([\w\s]+) \(([\d]+)\)', body)
-        if receiver_match2:
-            users.append({
-                'Name': receiver_match2.group(1).strip(),
-                'PhoneNumber': receiver_match2.group(2).strip(),
-                'UserType': 'receiver'
-            })
     return users
 
-def load_transactions(file_path):
+def extract_sms(body, date_ms):
+    """
+    Runs the regex extraction for one SMS and returns (transaction_info, users).
+    Pure function of its inputs, so it is safe to run in worker processes.
+    """
+    sms_datetime = parse_sms_date(date_ms) if date_ms else None
+
+    # Lowercase once and share it between both extractors
+    lowered = body.lower()
+    transaction_info = extract_transaction_info(body, lowered)
+    if not transaction_info.get('DateTime'):
+        transaction_info['DateTime'] = sms_datetime
+
+    return transaction_info, extract_users(body, lowered)
+
+def extract_sms_batch(batch):
+    """
+    Extracts a batch of (body, date) pairs. Used as the worker task in parallel mode.
+    """
+    return [extract_sms(body, date_ms) for body, date_ms in batch]
+
+def assign_ids(transaction_info, users, transaction_id, user_id_map):
+    """
+    Builds the transaction dict from extracted data, assigning UserIDs
+    to new participants in user_id_map. Must be called in message order.
+    """
+    for u in users:
+        key = (u['Name'], u['PhoneNumber'], u['UserType'])
+        if key not in user_id_map:
+            # UserIDs are handed out sequentially, so the next one is size + 1
+            user_id_map[key] = len(user_id_map) + 1
+        u['UserID'] = user_id_map[key]
+
+    return {
+        'TransactionID': transaction_id,
+        'TransactionType': transaction_info.get('TransactionType'),
+        'Amount': transaction_info.get('Amount'),
+        'Currency': transaction_info.get('Currency'),
+        'DateTime': transaction_info.get('DateTime'),
+        'ReferenceNumber': transaction_info.get('ReferenceNumber'),
+        'BalanceAfterTransaction': transaction_info.get('BalanceAfterTransaction'),
+        'Status': transaction_info.get('Status'),
+        'MessageText': transaction_info.get('MessageText'),
+        'Participants': users
+    }
+
+def build_transaction(body, date_ms, transaction_id, user_id_map):
+    """
+    Builds one transaction dict from the raw SMS body and date attributes.
+    New participants are assigned the next UserID in user_id_map.
+    """
+    transaction_info, users = extract_sms(body, date_ms)
+    return assign_ids(transaction_info, users, transaction_id, user_id_map)
+
+def batched(iterable, batch_size):
+    """
+    Groups an iterable into lists of at most batch_size items.
+    """
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def imap_bounded(pool, func, iterable, max_pending):
+    """
+    Like pool.imap, but reads iterable and submits tasks only while fewer
+    than max_pending results are waiting to be consumed, so neither the
+    input nor finished results pile up in memory behind a slow consumer.
+    Results come back in submission order.
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+def iter_sms_attributes(file_path):
+    """
+    Streams (body, date) attribute pairs from the XML file with iterparse.
+    Earlier <sms> siblings are removed as we go, so memory stays flat
+    regardless of file size.
+    """
+    # Same recovery and huge_tree options as the full-tree parser.
+    # Attributes are complete on 'start'; recovered (malformed) elements
+    # only fire 'end' when the root closes, so 'start' keeps file order.
+    context = ET.iterparse(file_path, events=('start',), tag='sms', recover=True, huge_tree=True)
+    for _, sms in context:
+        yield sms.attrib.get('body'), sms.attrib.get('date')
+        # Drop already-processed siblings from the root
+        while sms.getprevious() is not None:
+            del sms.getparent()[0]
+    del context
+
+class CheckpointMismatch(Exception):
+    """Raised when the XML export no longer holds the messages a checkpoint covers"""
+
+class Checkpoint:
+    """
+    Incremental ETL state stored next to the processed output.
+    Holds the last processed SMS `date` (ms), the next TransactionID,
+    the user_id_map, a rolling content hash of the dated messages it
+    covers (in file order), and the output size it was written against.
+    """
+
+    def __init__(self, last_date=None, last_date_hashes=None, next_transaction_id=1,
+                 user_id_map=None, content_hash='', output_size=None):
+        self.last_date = last_date
+        # Hashes of messages sharing last_date, so a message arriving in the
+        # same millisecond as the previous run's last one is not skipped
+        self.last_date_hashes = set(last_date_hashes or [])
+        self.next_transaction_id = next_transaction_id
+        self.user_id_map = user_id_map if user_id_map is not None else {}
+        self.content_hash = content_hash
+        self.output_size = output_size
+        # Set once filter_new has passed over the whole export
+        self.finished = False
+
+    @staticmethod
+    def path_for(json_path):
+        """Returns the checkpoint path kept alongside json_path."""
+        return os.path.splitext(json_path)[0] + '.checkpoint.json'
+
+    @classmethod
+    def load(cls, checkpoint_path):
+        """Loads a checkpoint file, or returns None if missing or unreadable."""
+        try:
+            with open(checkpoint_path, 'r') as f:
+                data = json.load(f)
+            user_id_map = {(name, phone, user_type): user_id
+                           for name, phone, user_type, user_id in data['user_id_map']}
+            return cls(data['last_date'], data['last_date_hashes'], data['next_transaction_id'],
+                       user_id_map, data['content_hash'], data['output_size'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, checkpoint_path):
+        """Writes the checkpoint atomically (temp file + rename)."""
+        data = {
+            'last_date': self.last_date,
+            'last_date_hashes': sorted(self.last_date_hashes),
+            'next_transaction_id': self.next_transaction_id,
+            'user_id_map': [[name, phone, user_type, user_id]
+                            for (name, phone, user_type), user_id in self.user_id_map.items()],
+            'content_hash': self.content_hash,
+            'output_size': self.output_size,
+        }
+        tmp_path = checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, checkpoint_path)
+
+    @staticmethod
+    def message_hash(body, date_ms):
+        return hashlib.sha256(f"{date_ms}\x00{body}".encode()).hexdigest()
+
+    @staticmethod
+    def roll_hash(content_hash, message_hash):
+        return hashlib.sha256((content_hash + message_hash).encode()).hexdigest()
+
+    @staticmethod
+    def is_covered(date_value, message_hash, last_date, last_date_hashes):
+        # True if a dated message is at or below the watermark of a previous run
+        if date_value is None or last_date is None:
+            return False
+        return date_value < last_date or (date_value == last_date and message_hash in last_date_hashes)
+
+    def filter_new(self, sms_attributes):
+        """
+        Passes through only (body, date) pairs not covered by the checkpoint,
+        advancing the date watermark as it goes and rehashing every dated
+        message, so afterwards the content hash covers the whole export.
+        The covered messages must come first and hash, in file order, to the
+        stored content hash; otherwise CheckpointMismatch is raised before
+        any new message is passed on (or when a covered one follows them).
+        Messages without a date are always treated as new; those met before
+        that check are held back until it passes.
+        """
+        previous_date = self.last_date
+        previous_hashes = self.last_date_hashes
+        expected_hash = self.content_hash
+        covered_hash = ''
+        verified = previous_date is None
+        held = []
+        self.content_hash = ''
+        for body, date_ms in sms_attributes:
+            message_hash = self.message_hash(body, date_ms)
+            date_value = int(date_ms) if date_ms else None
+            if date_value is not None:
+                self.content_hash = self.roll_hash(self.content_hash, message_hash)
+            if self.is_covered(date_value, message_hash, previous_date, previous_hashes):
+                if verified:
+                    raise CheckpointMismatch('an already processed message follows new ones')
+                covered_hash = self.roll_hash(covered_hash, message_hash)
+                continue
+            if not verified:
+                if date_value is None:
+                    held.append((body, date_ms))
+                    continue
+                self._verify(covered_hash, expected_hash)
+                verified = True
+                yield from held
+            if date_value is not None:
+                if self.last_date is None or date_value > self.last_date:
+                    self.last_date = date_value
+                    self.last_date_hashes = set()
+                if date_value == self.last_date:
+                    self.last_date_hashes.add(message_hash)
+            yield body, date_ms
+        if not verified:
+            self._verify(covered_hash, expected_hash)
+            yield from held
+        self.finished = True
+
+    @staticmethod
+    def _verify(covered_hash, expected_hash):
+        if covered_hash != expected_hash:
+            raise CheckpointMismatch('the already processed messages changed')
+
+def iter_transactions(file_path, workers=1, batch_size=DEFAULT_BATCH_SIZE, checkpoint=None, timer=None):
+    """
+    Generator version of load_transactions that yields transaction dicts
+    one at a time while streaming through the XML file.
+    With workers > 1, regex extraction runs on a process pool in batches;
+    results come back in file order and IDs are assigned here, so the
+    output is identical to the serial run.
+    With a checkpoint, messages it already covers are skipped and IDs
+    continue from its counters; the checkpoint is updated in place.
+    With a timer (etl_metrics.StageTimer), reading the XML is timed as
+    'parse' and extraction as 'extract'; in parallel mode, 'extract' is
+    the time spent waiting for the pool.
+    """
+    if checkpoint is None:
+        checkpoint = Checkpoint()
+    user_id_map = checkpoint.user_id_map
+    transaction_counter = checkpoint.next_transaction_id
+    try:
+        sms_attributes = checkpoint.filter_new(iter_sms_attributes(file_path))
+        if workers > 1:
+            with multiprocessing.Pool(workers) as pool:
+                batches = batched(etl_metrics.timed(timer, 'parse', sms_attributes), batch_size)
+                results = imap_bounded(pool, extract_sms_batch, batches, workers * PENDING_BATCHES_PER_WORKER)
+                for extracted in etl_metrics.timed(timer, 'extract', results, len):
+                    for transaction_info, users in extracted:
+                        yield assign_ids(transaction_info, users, transaction_counter, user_id_map)
+                        transaction_counter += 1
+                        checkpoint.next_transaction_id = transaction_counter
+        else:
+            for body, date_ms in etl_metrics.timed(timer, 'parse', sms_attributes):
+                with etl_metrics.stage(timer, 'extract', 1):
+                    tx = build_transaction(body, date_ms, transaction_counter, user_id_map)
+                yield tx
+                transaction_counter += 1
+                checkpoint.next_transaction_id = transaction_counter
+    except (ET.XMLSyntaxError, OSError) as e:
+        print(f"Error reading XML file '{file_path}': {e}")
+
+def load_transactions(file_path, workers=1, timer=None):
     """
     Parses the XML file and returns a list of transaction dicts for JSON serialization.
+    With workers > 1, extraction is spread across a process pool.
+    With a timer, building the tree is timed as 'parse' and extraction as 'extract'.
     """
+    if workers > 1:
+        return list(iter_transactions(file_path, workers=workers, timer=timer))
     try:
         # Allow recovery from common XML syntax errors instead of failing
         # Enable huge_tree to handle big datasets (SMS transaction file)
-        parser = ET.XMLParser(recover=True, huge_tree=True)
-        tree = ET.parse(file_path, parser)
+        with etl_metrics.stage(timer, 'parse'):
+            parser = ET.XMLParser(recover=True, huge_tree=True)
+            tree = ET.parse(file_path, parser)
     except (ET.ParseError, FileNotFoundError) as e:
         print(f"Error reading XML file '{file_path}': {e}")
         return []
 
     root = tree.getroot()
     user_id_map = {}
-    user_counter = 1
     transaction_counter = 1
 
     transactions = []
@@ -124,65 +425,290 @@ def load_transactions(file_path):
     for sms in root.findall('sms'):
         body = sms.attrib.get('body')
         date_ms = sms.attrib.get('date')
-        sms_datetime = parse_sms_date(date_ms) if date_ms else None
-
-        transaction_info = extract_transaction_info(body)
-        if not transaction_info.get('DateTime'):
-            transaction_info['DateTime'] = sms_datetime
-
-        users = extract_users(body)
-        for u in users:
-            key = (u['Name'], u['PhoneNumber'], u['UserType'])
-            if key not in user_id_map:
-                user_id_map[key] = user_counter
-                user_counter += 1
-                u['UserID'] = user_id_map[key]
-            else:
-                u['UserID'] = user_id_map[key]
-
-        transaction = {
-            'TransactionID': transaction_counter,
-            'TransactionType': transaction_info.get('TransactionType'),
-            'Amount': transaction_info.get('Amount'),
-            'Currency': transaction_info.get('Currency'),
-            'DateTime': transaction_info.get('DateTime'),
-            'ReferenceNumber': transaction_info.get('ReferenceNumber'),
-            'BalanceAfterTransaction': transaction_info.get('BalanceAfterTransaction'),
-            'Status': transaction_info.get('Status'),
-            'MessageText': transaction_info.get('MessageText'),
-            'Participants': users
-        }
-        transactions.append(transaction)
+        with etl_metrics.stage(timer, 'extract', 1):
+            transactions.append(build_transaction(body, date_ms, transaction_counter, user_id_map))
         transaction_counter += 1
+    if timer is not None:
+        timer.count('parse', len(transactions))
 
     return transactions
 
-def save_transactions_json(transactions, json_path):
+def write_json_records(json_file, transactions, count=0):
+    """
+    Writes transactions as indent=4 array items, continuing after `count`
+    existing items. Returns the new item count.
+    """
+    for tx in transactions:
+        json_file.write(',\n' if count else '\n')
+        json_file.write(textwrap.indent(json.dumps(tx, indent=4), '    '))
+        count += 1
+    return count
+
+def save_transactions_json(transactions, json_path, strict=False):
     """
-    Saves the transactions list to a JSON file.
+    Saves the transactions to a JSON file.
+    Accepts a list or any iterable (e.g. iter_transactions), writing records
+    one at a time so a generator is never materialized in memory.
     Creates directories if they don't exist.
+    Returns the number of transactions written. Errors are printed, or
+    raised with strict=True.
     """
+    count = 0
     try:
-        os.makedirs(os.path.dirname(json_path), exist_ok=True)
+        os.makedirs(os.path.dirname(json_path) or '.', exist_ok=True)
         with open(json_path, 'w') as json_file:
-            json.dump(transactions, json_file, indent=4)
+            # Produces the same layout as json.dump(transactions, indent=4)
+            json_file.write('[')
+            count = write_json_records(json_file, transactions)
+            json_file.write('\n]' if count else ']')
         print(f"Transactions saved to JSON file: {json_path}")
     except Exception as e:
+        if strict:
+            raise
         print(f"Error saving JSON to {json_path}: {e}")
+    return count
+
+def append_transactions_json(transactions, json_path, strict=False):
+    """
+    Appends transactions to an existing JSON array file written by
+    save_transactions_json, touching only the end of the file.
+    Returns the number of transactions appended. Errors are printed, or
+    raised with strict=True.
+    """
+    count = 0
+    try:
+        with open(json_path, 'rb+') as json_file:
+            # Find the closing bracket, skipping trailing whitespace
+            size = json_file.seek(0, os.SEEK_END)
+            window_start = max(0, size - 4096)
+            json_file.seek(window_start)
+            tail = json_file.read().rstrip()
+            if not tail.endswith(b']'):
+                raise ValueError('file does not end with a JSON array')
+            # No existing items if '[' is the last character before ']'
+            body = tail[:-1].rstrip()
+            has_items = not body.endswith(b'[')
+            json_file.truncate(window_start + len(body))
+        with open(json_path, 'a') as json_file:
+            count = write_json_records(json_file, transactions, count=int(has_items)) - int(has_items)
+            json_file.write('\n]' if count or has_items else ']')
+        print(f"Appended {count} transactions to JSON file: {json_path}")
+    except Exception as e:
+        if strict:
+            raise
+        print(f"Error appending JSON to {json_path}: {e}")
+    return count
+
+def save_transactions_ndjson(transactions, ndjson_path, append=False, strict=False):
+    """
+    Saves the transactions as newline-delimited JSON, one compact record
+    per line. With append=True, records are added to the end of the file.
+    Returns the number of transactions written. Errors are printed, or
+    raised with strict=True.
+    """
+    count = 0
+    try:
+        count = transaction_io.write_ndjson(transactions, ndjson_path, mode='a' if append else 'w')
+        print(f"{'Appended' if append else 'Saved'} {count} transactions to NDJSON file: {ndjson_path}")
+    except Exception as e:
+        if strict:
+            raise
+        print(f"Error saving NDJSON to {ndjson_path}: {e}")
+    return count
+
+def save_transactions_file(transactions, output_path, append=False, strict=False):
+    """
+    Saves transactions in the format given by output_path's extension:
+    NDJSON for .ndjson/.jsonl, otherwise the indented JSON array.
+    """
+    if transaction_io.is_ndjson_path(output_path):
+        return save_transactions_ndjson(transactions, output_path, append=append, strict=strict)
+    if append:
+        return append_transactions_json(transactions, output_path, strict=strict)
+    return save_transactions_json(transactions, output_path, strict=strict)
+
+def preview(transactions, store, size=3):
+    """
+    Passes transactions through unchanged while keeping the first few in store.
+    """
+    for tx in transactions:
+        if len(store) < size:
+            store.append(tx)
+        yield tx
+
+def run_incremental(xml_path, json_path, workers=1, batch_size=DEFAULT_BATCH_SIZE, timer=None):
+    """
+    Parses only messages the checkpoint has not seen and appends them to
+    json_path. Falls back to a full rebuild when there is no usable
+    checkpoint, the output no longer matches it, or the export no longer
+    holds the messages it covers (checked during the same pass).
+    Returns the first few new transactions for preview.
+    """
+    checkpoint_path = Checkpoint.path_for(json_path)
+    checkpoint = Checkpoint.load(checkpoint_path)
+    if checkpoint is not None and (not os.path.exists(json_path)
+                                   or os.path.getsize(json_path) != checkpoint.output_size):
+        print("Processed output changed since the last checkpoint, rebuilding from scratch.")
+        checkpoint = None
+    try:
+        return write_new_transactions(xml_path, json_path, checkpoint, workers, batch_size, timer)
+    except CheckpointMismatch as e:
+        print(f"XML export differs from the one the checkpoint was written against ({e}), rebuilding from scratch.")
+        return write_new_transactions(xml_path, json_path, None, workers, batch_size, timer)
+
+def write_new_transactions(xml_path, json_path, checkpoint, workers, batch_size, timer):
+    """
+    Appends the messages checkpoint does not cover to json_path, or rewrites
+    it when checkpoint is None, and saves the advanced checkpoint only once
+    the whole export was read and the write is complete. A failed write leaves the saved checkpoint as it
+    was; if it changed the output, the next run rebuilds from scratch.
+    Returns the first few new transactions.
+    """
+    full_rebuild = checkpoint is None
+    if full_rebuild:
+        checkpoint = Checkpoint()
+    new_transactions = []
+    stream = preview(iter_transactions(xml_path, workers, batch_size, checkpoint=checkpoint, timer=timer),
+                     new_transactions)
+    try:
+        with etl_metrics.stage(timer, 'write'):
+            count = save_transactions_file(stream, json_path, append=not full_rebuild, strict=True)
+    except CheckpointMismatch:
+        raise
+    except Exception as e:
+        print(f"Error writing new transactions to {json_path}: {e}. Checkpoint not updated.")
+        return []
+    if timer is not None:
+        timer.count('write', count)
+    print(f"{count} new transactions since the last checkpoint.")
+    if not checkpoint.finished:
+        # The XML could not be read to the end (reported above)
+        print("Checkpoint not updated.")
+        return new_transactions
+    checkpoint.output_size = os.path.getsize(json_path)
+    checkpoint.save(Checkpoint.path_for(json_path))
+    return new_transactions
+
+def tee_snapshot(transactions, writer):
+    """
+    Passes transactions through unchanged while adding each one to a
+    snapshot.SnapshotWriter.
+    """
+    for tx in transactions:
+        writer.add(tx)
+        yield tx
+
+def parse_args(argv):
+    """Parses command line arguments."""
+    arg_parser = argparse.ArgumentParser(description='Parse MoMo SMS XML into transaction JSON.')
+    # Fix path to avoid file-not-found errors
+    arg_parser.add_argument('input_xml_path', nargs='?', default='../data/raw/modified_sms_v2.xml')
+    arg_parser.add_argument('output_json_path', nargs='?', default='../data/processed/transactions.json')
+    arg_parser.add_argument('--stream', action='store_true',
+                            help='stream the XML with iterparse instead of loading the whole tree')
+    arg_parser.add_argument('--workers', type=int, default=1,
+                            help='number of processes used for regex extraction (default: 1)')
+    arg_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='messages per worker task in parallel mode')
+    arg_parser.add_argument('--incremental', action='store_true',
+                            help='only parse messages newer than the checkpoint and append them')
+    arg_parser.add_argument('--snapshot', action='store_true',
+                            help='also write a columnar snapshot for fast API startup')
+    arg_parser.add_argument('--snapshot-path', default=None,
+                            help='snapshot location (default: output path with a .snapshot extension)')
+    arg_parser.add_argument('--metrics', action='store_true',
+                            help='time the parse, extract and write stages and append the results to the ETL log')
+    arg_parser.add_argument('--metrics-log', default=etl_metrics.LOG_PATH,
+                            help='ETL log the --metrics results are appended to')
+    arg_parser.add_argument('--metrics-db', action='store_true',
+                            help='with --metrics, also write the results to the SystemLog table')
+    arg_parser.add_argument('--metrics-backend', choices=('mysql', 'sqlite'), default='mysql',
+                            help='database --metrics-db writes to')
+    arg_parser.add_argument('--sqlite-path', default=None,
+                            help='database file for the sqlite metrics backend (default: data/momo.sqlite3)')
+    return arg_parser.parse_args(argv)
+
+def write_metrics_db(timer, backend_name, sqlite_path=None):
+    """
+    Writes the stage timings to the SystemLog table of the MySQL database or
+    the SQLite file load_db.py loads into. Returns a description of the
+    database, or None (after printing why) when it cannot be reached
+    """
+    # Imported here so parsing works without the database package on the path
+    root = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    from database import storage
+    options = {'path': sqlite_path} if backend_name == 'sqlite' and sqlite_path else {}
+    backend = storage.get_backend(backend_name, **options)
+    try:
+        conn = backend.connect()
+    except storage.StorageError as err:
+        print(f"Could not write stage timings to {backend.describe()}: {err}")
+        return None
+    try:
+        timer.write_system_log(conn)
+    finally:
+        conn.close()
+    return backend.describe()
 
 # Main program flow
 if __name__ == '__main__':
-    # Fix path to avoid file-not-found errors
-    input_xml_path = sys.argv[1] if len(sys.argv) > 1 else '../data/raw/modified_sms_v2.xml'
-    output_json_path = sys.argv[2] if len(sys.argv) > 2 else '../data/processed/transactions.json'
+    args = parse_args(sys.argv[1:])
+    input_xml_path = args.input_xml_path
+    output_json_path = args.output_json_path
+
+    timer = etl_metrics.StageTimer('parse_xml', ETL_STAGES) if args.metrics else None
+    snapshot_writer = None
+    if args.snapshot:
+        snapshot_writer = snapshot.SnapshotWriter(args.snapshot_path or snapshot.path_for(output_json_path))
 
     print(f"Loading XML data from {input_xml_path} ...")
-    transactions = load_transactions(input_xml_path)
+    if args.incremental:
+        transactions = run_incremental(input_xml_path, output_json_path, args.workers, args.batch_size, timer)
+        if snapshot_writer:
+            # The snapshot covers the whole store, so rebuild it from the output
+            with etl_metrics.stage(timer, 'write'):
+                for tx in transaction_io.iter_transactions_file(output_json_path):
+                    snapshot_writer.add(tx)
+    elif args.stream:
+        first_transactions = []
+        stream = iter_transactions(input_xml_path, workers=args.workers, batch_size=args.batch_size, timer=timer)
+        if snapshot_writer:
+            stream = tee_snapshot(stream, snapshot_writer)
+        with etl_metrics.stage(timer, 'write'):
+            saved = save_transactions_file(preview(stream, first_transactions), output_json_path)
+        if timer is not None:
+            timer.count('write', saved)
+        transactions = first_transactions if saved else []
+    else:
+        transactions = load_transactions(input_xml_path, workers=args.workers, timer=timer)
+        if transactions:
+            with etl_metrics.stage(timer, 'write', len(transactions)):
+                save_transactions_file(transactions, output_json_path)
+                if snapshot_writer:
+                    for tx in transactions:
+                        snapshot_writer.add(tx)
+
+    if snapshot_writer and snapshot_writer.count:
+        with etl_metrics.stage(timer, 'write'):
+            snapshot_writer.close()
+        print(f"Snapshot of {snapshot_writer.count} transactions saved to: {snapshot_writer.path}")
+
+    if timer is not None:
+        timer.write_log(args.metrics_log)
+        print(f"Stage timings appended to {args.metrics_log}:")
+        for message in timer.messages():
+            print(f"  {message}")
+        if args.metrics_db:
+            database = write_metrics_db(timer, args.metrics_backend, args.sqlite_path)
+            if database:
+                print(f"Stage timings written to the SystemLog table of {database}")
 
     if transactions:
-        save_transactions_json(transactions, output_json_path)
         print("Parsed transactions JSON preview:")
         print(json.dumps(transactions[:3], indent=4))  # Show first 3 transactions
+    elif args.incremental:
+        print("No new transactions since the last checkpoint.")
     else:
         print("No transactions parsed. Please check your XML file and path.")
-
@@ -0,0 +1,158 @@
+#--------------------------------------------------------------------------------
+# Script Name: range_index.py
+# Description: Sorted secondary index for range queries over transactions.
+#              Holds (key, TransactionID) pairs in a list of short sorted
+#              buckets, so "DateTime between two dates" or "Amount between
+#              20,001 and 50,000" is a binary search plus the k matches
+#              instead of a scan, and inserts and deletes only shift one
+#              bucket. DateTime is indexed as epoch seconds, Amount as a float.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  from dsa import range_index
+#         index = range_index.SortedIndex((tx['Amount'], tx['TransactionID']) for tx in transactions)
+#         ids = list(index.range(20001, 50000))
+#--------------------------------------------------------------------------------
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+import math
+
+# Entries per bucket; a bucket holding twice this many is split in two
+BUCKET_SIZE = 512
+EPOCH = datetime(1970, 1, 1)
+
+def datetime_key(value):
+    """
+    Epoch seconds for a 'YYYY-MM-DD HH:MM:SS' (or ISO date) string,
+    or None if the value is missing or not a date. Values with a UTC
+    offset are not dates here: stored DateTimes are naive local times.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        return None
+    return int((parsed - EPOCH).total_seconds())
+
+def amount_key(value):
+    """The amount as a float, or None if it is missing or not a number."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+        return None
+    return float(value)
+
+# Index key function per range-indexed transaction field
+KEY_FUNCTIONS = {'Amount': amount_key, 'DateTime': datetime_key}
+
+class SortedIndex:
+    """
+    (key, TransactionID) pairs in ascending order. Each bucket is a sorted
+    list and _maxes holds the last pair of every bucket, so locating a key
+    is a binary search over _maxes followed by one within the bucket.
+    """
+
+    def __init__(self, pairs=()):
+        ordered = sorted(pairs)
+        self._buckets = [ordered[i:i + BUCKET_SIZE] for i in range(0, len(ordered), BUCKET_SIZE)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._len = len(ordered)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for bucket in self._buckets:
+            yield from bucket
+
+    def add(self, key, tid):
+        """Inserts one (key, TransactionID) pair"""
+        pair = (key, tid)
+        self._len += 1
+        if not self._buckets:
+            self._buckets.append([pair])
+            self._maxes.append(pair)
+            return
+        i = bisect_left(self._maxes, pair)
+        if i == len(self._maxes):
+            # Past the largest key, typically the newest transaction: append
+            i -= 1
+            self._buckets[i].append(pair)
+            self._maxes[i] = pair
+        else:
+            insort(self._buckets[i], pair)
+        bucket = self._buckets[i]
+        if len(bucket) > 2 * BUCKET_SIZE:
+            self._buckets[i:i + 1] = [bucket[:BUCKET_SIZE], bucket[BUCKET_SIZE:]]
+            self._maxes[i:i + 1] = [bucket[BUCKET_SIZE - 1], bucket[-1]]
+
+    def remove(self, key, tid):
+        """Removes one (key, TransactionID) pair; returns False if it is not indexed"""
+        pair = (key, tid)
+        i = bisect_left(self._maxes, pair)
+        if i == len(self._maxes):
+            return False
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, pair)
+        if j == len(bucket) or bucket[j] != pair:
+            return False
+        del bucket[j]
+        self._len -= 1
+        if bucket:
+            self._maxes[i] = bucket[-1]
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+        return True
+
+    def _position(self, pair, right=False):
+        # (bucket, offset) of the first pair after (right) or at/after pair
+        search = bisect_right if right else bisect_left
+        i = search(self._maxes, pair)
+        if i == len(self._maxes):
+            return i, 0
+        return i, search(self._buckets[i], pair)
+
+    def _bounds(self, low, high):
+        # (key,) sorts before every (key, tid) and (key, inf) after them
+        start = (0, 0) if low is None else self._position((low,))
+        stop = (len(self._buckets), 0) if high is None else self._position((high, math.inf), True)
+        return start, stop
+
+    def range(self, low=None, high=None):
+        """
+        Yields the TransactionIDs whose key lies within the inclusive
+        bounds (None means unbounded), in key order.
+        """
+        (i, j), (stop_i, stop_j) = self._bounds(low, high)
+        while i < stop_i or (i == stop_i and j < stop_j):
+            bucket = self._buckets[i]
+            end = stop_j if i == stop_i else len(bucket)
+            for k in range(j, end):
+                yield bucket[k][1]
+            i, j = i + 1, 0
+
+    def count(self, low=None, high=None):
+        """Number of pairs within the inclusive bounds, without visiting them"""
+        (i, j), (stop_i, stop_j) = self._bounds(low, high)
+        if (i, j) >= (stop_i, stop_j):
+            return 0
+        if i == stop_i:
+            return stop_j - j
+        return (len(self._buckets[i]) - j + sum(len(bucket) for bucket in self._buckets[i + 1:stop_i])
+                + stop_j)
+
+def linear_filter(transactions, field, low=None, high=None):
+    """
+    The scan the index replaces: TransactionIDs whose field lies within
+    the inclusive bounds, in list order. Bounds are index keys (epoch
+    seconds for DateTime).
+    """
+    key = KEY_FUNCTIONS[field]
+    matches = []
+    for tx in transactions:
+        value = key(tx.get(field))
+        if value is not None and (low is None or value >= low) and (high is None or value <= high):
+            matches.append(tx['TransactionID'])
+    return matches
@@ -0,0 +1,312 @@
+#--------------------------------------------------------------------------------
+# Script Name: snapshot.py
+# Description: Columnar binary snapshot of the processed transaction store.
+#              Numeric columns are typed arrays, low-cardinality strings are
+#              dictionary-encoded, free text is kept in a byte heap.
+#              A record the columns cannot rebuild exactly (other fields or
+#              key order, integer amounts, non-standard values) is also kept
+#              whole as JSON, so every record reads back as it was written.
+#              Readers memory-map the file and build record dicts lazily.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  from dsa import snapshot
+#         snapshot.write_snapshot(transactions, path)
+#         table = snapshot.SnapshotTable(path)
+#--------------------------------------------------------------------------------
+
+from array import array
+from collections.abc import Sequence
+from datetime import datetime, timezone
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+
+try:
+    from dsa import range_index
+except ImportError:
+    import range_index
+
+MAGIC = b'MOMOSNP1'
+ALIGNMENT = 8
+# DateTime values that are missing are stored as this sentinel
+NULL_EPOCH = -(2 ** 63)
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+EPOCH = datetime(1970, 1, 1)
+
+# (field name, encoding) in the key order records are rebuilt with.
+#   int64    - typed integer array
+#   float64  - typed float array, NaN for None
+#   datetime - int64 epoch seconds, NULL_EPOCH for None
+#   dict     - uint32 codes into a string dictionary stored in the header
+#   heap     - utf-8 bytes addressed by uint64 offsets, plus a null byte per row
+#   json     - heap column holding compact JSON (used for Participants)
+COLUMNS = (
+    ('TransactionID', 'int64'),
+    ('TransactionType', 'dict'),
+    ('Amount', 'float64'),
+    ('Currency', 'dict'),
+    ('DateTime', 'datetime'),
+    ('ReferenceNumber', 'heap'),
+    ('BalanceAfterTransaction', 'float64'),
+    ('Status', 'dict'),
+    ('MessageText', 'heap'),
+    ('Participants', 'json'),
+)
+
+# json column holding the records the columns above cannot rebuild exactly
+# (null for the rest); their columns hold the values' index keys
+RECORD_COLUMN = '_record'
+
+# memoryview formats for the typed encodings
+TYPECODES = {'int64': 'q', 'datetime': 'q', 'float64': 'd', 'dict': 'I'}
+
+def datetime_to_epoch(value):
+    """Converts a 'YYYY-MM-DD HH:MM:SS' string to epoch seconds (UTC)."""
+    if value is None:
+        return NULL_EPOCH
+    epoch = int((datetime.fromisoformat(value) - EPOCH).total_seconds())
+    # Refuse anything that would not round-trip to the same string
+    if epoch_to_datetime(epoch) != value:
+        raise ValueError(f"DateTime {value!r} is not in '{DATETIME_FORMAT}' format")
+    return epoch
+
+def epoch_to_datetime(epoch):
+    """Converts epoch seconds back to the 'YYYY-MM-DD HH:MM:SS' string."""
+    if epoch == NULL_EPOCH:
+        return None
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(DATETIME_FORMAT)
+
+class ColumnBuilder:
+    """Accumulates one column's values in compact form while writing."""
+
+    def __init__(self, name, encoding):
+        self.name = name
+        self.encoding = encoding
+        if encoding in ('int64', 'datetime'):
+            self.values = array('q')
+        elif encoding == 'float64':
+            self.values = array('d')
+        elif encoding == 'dict':
+            self.values = array('I')
+            self.dictionary = {}
+        else:
+            self.offsets = array('Q', [0])
+            self.nulls = bytearray()
+            self.heap = bytearray()
+
+    def append(self, value):
+        """
+        Adds one row's value. Returns False if the column cannot give it
+        back exactly; it then holds the value's index key (range_index),
+        or null.
+        """
+        exact = True
+        if self.encoding == 'int64':
+            self.values.append(value)
+        elif self.encoding == 'datetime':
+            try:
+                epoch = datetime_to_epoch(value)
+            except (TypeError, ValueError):
+                key = range_index.datetime_key(value)
+                epoch, exact = NULL_EPOCH if key is None else key, False
+            self.values.append(epoch)
+        elif self.encoding == 'float64':
+            key = range_index.amount_key(value)
+            self.values.append(math.nan if key is None else key)
+            exact = value is None or (type(value) is float and key is not None)
+        elif self.encoding == 'dict':
+            exact = value is None or isinstance(value, str)
+            try:
+                code = self.dictionary.setdefault(value, len(self.dictionary))
+            except TypeError:
+                code = self.dictionary.setdefault(None, len(self.dictionary))
+            self.values.append(code)
+        else:
+            if self.encoding == 'json':
+                value = None if value is None else json.dumps(value, separators=(',', ':'))
+            elif not isinstance(value, str):
+                exact = value is None
+                value = None
+            self.nulls.append(value is None)
+            if value is not None:
+                self.heap += value.encode('utf-8')
+            self.offsets.append(len(self.heap))
+        return exact
+
+    def blocks(self):
+        """Returns the column's binary blocks as (kind, bytes) pairs."""
+        if self.encoding in ('heap', 'json'):
+            return [('offsets', self.offsets.tobytes()), ('nulls', bytes(self.nulls)),
+                    ('heap', bytes(self.heap))]
+        return [('values', self.values.tobytes())]
+
+def path_for(data_path):
+    """Returns the snapshot path kept alongside a processed data file."""
+    return os.path.splitext(data_path)[0] + '.snapshot'
+
+class SnapshotWriter:
+    """
+    Builds a snapshot one transaction at a time, so it can be fed
+    alongside another writer; close() lays the columns out on disk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._builders = [ColumnBuilder(name, encoding) for name, encoding in COLUMNS]
+        self._names = [name for name, _ in COLUMNS]
+        self._records = ColumnBuilder(RECORD_COLUMN, 'json')
+
+    def add(self, tx):
+        exact = list(tx) == self._names
+        for builder in self._builders:
+            exact = builder.append(tx.get(builder.name)) and exact
+        self._records.append(None if exact else tx)
+        self.count += 1
+
+    def close(self):
+        """Writes the snapshot file atomically and returns the record count."""
+        # Lay out every block at an aligned offset after the header
+        columns = []
+        payload = []
+        position = 0
+        for builder in self._builders + [self._records]:
+            column = {'name': builder.name, 'encoding': builder.encoding, 'blocks': {}}
+            if builder.encoding == 'dict':
+                column['dictionary'] = list(builder.dictionary)
+            for kind, data in builder.blocks():
+                column['blocks'][kind] = [position, len(data)]
+                padding = -len(data) % ALIGNMENT
+                payload.append(data + b'\0' * padding)
+                position += len(data) + padding
+            columns.append(column)
+
+        header = json.dumps({'count': self.count, 'byteorder': sys.byteorder, 'columns': columns})
+        header = header.encode('utf-8')
+        header += b' ' * (-(len(MAGIC) + 8 + len(header)) % ALIGNMENT)
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<Q', len(header)))
+            f.write(header)
+            for data in payload:
+                f.write(data)
+        os.replace(tmp_path, self.path)
+        return self.count
+
+def write_snapshot(transactions, path):
+    """
+    Writes transactions (any iterable) to a columnar snapshot file.
+    Returns the number of records written.
+    """
+    writer = SnapshotWriter(path)
+    for tx in transactions:
+        writer.add(tx)
+    return writer.close()
+
+class SnapshotTable(Sequence):
+    """
+    Read-only, memory-mapped view of a snapshot file.
+    Indexing builds the record dict for that row on demand; column()
+    exposes a typed column without building any records.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a transaction snapshot")
+            header_len = struct.unpack('<Q', f.read(8))[0]
+            header = json.loads(f.read(header_len))
+            if header['byteorder'] != sys.byteorder:
+                raise ValueError(f"{path} was written on a {header['byteorder']}-endian machine")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        base = len(MAGIC) + 8 + header_len
+        self._count = header['count']
+        # Per column: (name, encoding, values, offsets, nulls, heap, dictionary)
+        self._columns = []
+        # name -> the same tuple, for column(), dictionary() and heap_value()
+        self._by_name = {}
+        # (offsets, nulls, heap) of RECORD_COLUMN; files written before it have none
+        self._records = None
+        for column in header['columns']:
+            blocks = {kind: view[base + offset:base + offset + length]
+                      for kind, (offset, length) in column['blocks'].items()}
+            encoding = column['encoding']
+            values = offsets = None
+            if column['name'] == RECORD_COLUMN:
+                self._records = (blocks['offsets'].cast('Q'), blocks['nulls'], blocks['heap'])
+                continue
+            if encoding in ('heap', 'json'):
+                offsets = blocks['offsets'].cast('Q')
+            else:
+                values = blocks['values'].cast(TYPECODES[encoding])
+            self._columns.append((column['name'], encoding, values, offsets,
+                                  blocks.get('nulls'), blocks.get('heap'), column.get('dictionary')))
+            self._by_name[column['name']] = self._columns[-1]
+
+    def __len__(self):
+        return self._count
+
+    def column(self, name):
+        """
+        Returns the typed column for name without building records:
+        int64/float64 values, or uint32 codes for dictionary columns.
+        """
+        values = self._by_name[name][2]
+        if values is None:
+            raise KeyError(name)
+        return values
+
+    def dictionary(self, name):
+        """Returns the string dictionary of a dictionary-encoded column."""
+        _, encoding, _, _, _, _, dictionary = self._by_name[name]
+        if encoding != 'dict':
+            raise KeyError(name)
+        return dictionary
+
+    def heap_value(self, name, index):
+        """Returns one row's value of a heap or json column without building the record."""
+        _, encoding, _, offsets, nulls, heap, _ = self._by_name[name]
+        if encoding not in ('heap', 'json'):
+            raise KeyError(name)
+        if nulls[index]:
+            return None
+        value = bytes(heap[offsets[index]:offsets[index + 1]]).decode('utf-8')
+        return json.loads(value) if encoding == 'json' else value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('snapshot index out of range')
+        if self._records is not None:
+            offsets, nulls, heap = self._records
+            if not nulls[index]:
+                return json.loads(bytes(heap[offsets[index]:offsets[index + 1]]).decode('utf-8'))
+        record = {}
+        for name, encoding, values, offsets, nulls, heap, dictionary in self._columns:
+            if encoding == 'dict':
+                value = dictionary[values[index]]
+            elif encoding == 'float64':
+                value = values[index]
+                value = None if math.isnan(value) else value
+            elif encoding == 'datetime':
+                value = epoch_to_datetime(values[index])
+            elif encoding == 'int64':
+                value = values[index]
+            elif nulls[index]:
+                value = None
+            else:
+                value = bytes(heap[offsets[index]:offsets[index + 1]]).decode('utf-8')
+                if encoding == 'json':
+                    value = json.loads(value)
+            record[name] = value
+        return record
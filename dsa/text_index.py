@@ -0,0 +1,129 @@
+#--------------------------------------------------------------------------------
+# Script Name: text_index.py
+# Description: Inverted index for searching transactions by words of their
+#              SMS text and reference number. Each token (a lower-case run
+#              of letters and digits) maps to the sorted TransactionIDs of
+#              the records containing it, so a query of several terms walks
+#              the shortest posting list and binary-searches the others
+#              instead of scanning every message.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  from dsa import text_index
+#         index = text_index.InvertedIndex((tx['TransactionID'], text_index.record_tokens(tx)) for tx in transactions)
+#         ids = list(index.search(text_index.query_terms('jane 73214484437')))
+#--------------------------------------------------------------------------------
+
+from array import array
+from bisect import bisect_left, bisect_right
+import re
+
+# Transaction fields whose text is indexed
+TEXT_FIELDS = ('MessageText', 'ReferenceNumber')
+# Letters and digits; punctuation, spaces and underscores separate tokens
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+def tokenize(text):
+    """Distinct lower-case tokens of text, or an empty set if it is not a string"""
+    if not isinstance(text, str):
+        return frozenset()
+    return frozenset(TOKEN_PATTERN.findall(text.lower()))
+
+def record_tokens(tx):
+    """Tokens of a transaction's TEXT_FIELDS"""
+    tokens = set()
+    for field in TEXT_FIELDS:
+        tokens.update(tokenize(tx.get(field)))
+    return frozenset(tokens)
+
+def query_terms(query):
+    """Distinct tokens of a search query, in the order given"""
+    return list(dict.fromkeys(TOKEN_PATTERN.findall(query.lower())))
+
+class InvertedIndex:
+    """
+    token -> ascending TransactionIDs holding it, kept in compact int64
+    arrays. New transactions take the highest ID, so adding one appends to
+    each of its posting lists; removing or re-adding an older ID shifts the
+    tail of the lists involved.
+    """
+
+    def __init__(self, entries=()):
+        # entries: (TransactionID, tokens) pairs in any order
+        postings = {}
+        for tid, tokens in entries:
+            for token in tokens:
+                postings.setdefault(token, []).append(tid)
+        self._postings = {token: array('q', sorted(ids)) for token, ids in postings.items()}
+
+    def __len__(self):
+        return len(self._postings)
+
+    def count(self, token):
+        """Number of transactions holding token"""
+        ids = self._postings.get(token)
+        return 0 if ids is None else len(ids)
+
+    def add(self, tid, tokens):
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                self._postings[token] = array('q', [tid])
+            elif tid > ids[-1]:
+                ids.append(tid)
+            else:
+                i = bisect_left(ids, tid)
+                if ids[i] != tid:
+                    ids.insert(i, tid)
+
+    def remove(self, tid, tokens):
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                continue
+            i = bisect_left(ids, tid)
+            if i < len(ids) and ids[i] == tid:
+                del ids[i]
+                if not ids:
+                    del self._postings[token]
+
+    def update(self, tid, old_tokens, new_tokens):
+        """Moves tid from old_tokens to new_tokens, touching only the tokens that differ"""
+        self.remove(tid, old_tokens - new_tokens)
+        self.add(tid, new_tokens - old_tokens)
+
+    def search(self, terms, after=None):
+        """
+        Yields, in ascending order, the TransactionIDs greater than after
+        (all if None) that hold every term. The shortest posting list is
+        walked and each ID is looked up in the others by binary search,
+        starting from where the previous lookup ended.
+        """
+        if not terms:
+            return
+        lists = []
+        for term in terms:
+            ids = self._postings.get(term)
+            if ids is None:
+                return
+            lists.append(ids)
+        lists.sort(key=len)
+        shortest, others = lists[0], lists[1:]
+        positions = [0] * len(others)
+        start = 0 if after is None else bisect_right(shortest, after)
+        for i in range(start, len(shortest)):
+            tid = shortest[i]
+            for j, ids in enumerate(others):
+                positions[j] = bisect_left(ids, tid, positions[j])
+                if positions[j] == len(ids):
+                    return
+                if ids[positions[j]] != tid:
+                    break
+            else:
+                yield tid
+
+def linear_search(transactions, terms):
+    """The scan the index replaces: IDs of transactions holding every term, in list order"""
+    terms = set(terms)
+    if not terms:
+        return []
+    return [tx['TransactionID'] for tx in transactions if terms <= record_tokens(tx)]
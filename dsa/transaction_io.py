@@ -0,0 +1,86 @@
+#--------------------------------------------------------------------------------
+# Script Name: transaction_io.py
+# Description: Reads and writes processed transaction files.
+#              Supports the original pretty-printed JSON array and
+#              newline-delimited JSON (NDJSON, one compact record per line)
+#              which can be appended to and streamed record by record.
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  from dsa import transaction_io
+#--------------------------------------------------------------------------------
+
+import json
+import os
+
+# Compact separators for NDJSON records (no spaces after ',' and ':')
+NDJSON_SEPARATORS = (',', ':')
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+def is_ndjson_path(path):
+    """Returns True if the file extension marks an NDJSON file."""
+    return os.path.splitext(path)[1].lower() in NDJSON_EXTENSIONS
+
+def dumps_ndjson(transaction):
+    """Serializes one transaction as a compact NDJSON line (with newline)."""
+    return json.dumps(transaction, separators=NDJSON_SEPARATORS) + '\n'
+
+def write_ndjson(transactions, path, mode='w'):
+    """
+    Writes transactions to an NDJSON file, one per line.
+    mode='a' appends to an existing file. Accepts any iterable.
+    Returns the number of records written.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    count = 0
+    with open(path, mode) as f:
+        for tx in transactions:
+            f.write(dumps_ndjson(tx))
+            count += 1
+    return count
+
+def iter_json_array(transactions, batch_size=500):
+    """
+    Yields a JSON array of the transactions as strings of up to batch_size
+    records each; joined, they equal json.dumps(list(transactions)).
+    Lets a large array be written out without building it in memory.
+    """
+    transactions = iter(transactions)
+    separator = '['
+    while True:
+        batch = [json.dumps(tx) for _, tx in zip(range(batch_size), transactions)]
+        if not batch:
+            break
+        yield separator + ', '.join(batch)
+        separator = ', '
+    yield '[]' if separator == '[' else ']'
+
+def iter_ndjson(path):
+    """Yields transactions from an NDJSON file one line at a time."""
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_transactions_file(path):
+    """
+    Yields transactions from a processed file in either format.
+    The format is sniffed from the first non-whitespace character:
+    '[' is a JSON array (loaded whole), anything else is read as NDJSON
+    record by record.
+    """
+    with open(path, 'r') as f:
+        first = ''
+        while True:
+            ch = f.read(1)
+            if not ch or not ch.isspace():
+                first = ch
+                break
+    if first == '[':
+        with open(path, 'r') as f:
+            yield from json.load(f)
+    elif first:
+        yield from iter_ndjson(path)
+
+def load_transactions_file(path):
+    """Returns all transactions from a processed file in either format."""
+    return list(iter_transactions_file(path))
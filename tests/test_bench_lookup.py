@@ -0,0 +1,52 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_bench_lookup.py
+# Description: Test the lookup benchmark harness: strategies agree and the
+#              regression check flags slowdowns
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_bench_lookup.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import json
+import os
+import tempfile
+
+from dsa import bench_lookup
+
+class TestBenchLookup(unittest.TestCase):
+
+    def setUp(self):
+        # One pass per timed run keeps the tests quick
+        self.min_run_seconds = bench_lookup.MIN_RUN_SECONDS
+        bench_lookup.MIN_RUN_SECONDS = 0
+
+    def tearDown(self):
+        bench_lookup.MIN_RUN_SECONDS = self.min_run_seconds
+
+    def test_strategies_agree(self):
+        # run_size asserts that every strategy finds the same records and ranges
+        rows = bench_lookup.run_size(300, list(bench_lookup.STRATEGIES), repeats=2, point_queries=10, seed=1)
+        self.assertEqual([row['strategy'] for row in rows], list(bench_lookup.STRATEGIES))
+        by_name = {row['strategy']: row for row in rows}
+        self.assertNotIn('range 1 day', by_name['dict']['queries'])
+        self.assertNotIn('point', by_name['range-index']['queries'])
+        self.assertEqual(by_name['store']['queries']['range 30 days']['matches'],
+                         by_name['linear']['queries']['range 30 days']['matches'])
+
+    def test_regression_check(self):
+        def results(point_us):
+            return {'results': [{'strategy': 'dict', 'size': 100,
+                                 'queries': {'point': {'min_us': point_us, 'median_us': point_us}}}]}
+        self.assertEqual(bench_lookup.compare(results(1.2), results(1.0), 0.25), [])
+        self.assertEqual(bench_lookup.compare(results(1.3), results(1.0), 0.25),
+                         [('dict', 100, 'point', 1.0, 1.3)])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            baseline = os.path.join(tmp_dir, 'baseline.json')
+            with open(baseline, 'w') as f:
+                json.dump(results(1e-6), f)
+            self.assertEqual(bench_lookup.main(['--sizes', '100', '--strategies', 'dict', '--repeats', '2',
+                                                '--baseline', baseline]), 1)
+
+if __name__ == '__main__':
+    unittest.main()
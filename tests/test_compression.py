@@ -0,0 +1,50 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_compression.py
+# Description: Test Accept-Encoding negotiation and response compression
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_compression.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import gzip
+import zlib
+
+from api import compression
+
+class TestCompression(unittest.TestCase):
+
+    def test_negotiate(self):
+        self.assertEqual(compression.negotiate('gzip, deflate, br'), 'gzip')
+        self.assertEqual(compression.negotiate('deflate'), 'deflate')
+        self.assertEqual(compression.negotiate('gzip;q=0.5, deflate;q=0.8'), 'deflate')
+        self.assertEqual(compression.negotiate('*'), 'gzip')
+        self.assertEqual(compression.negotiate('*, gzip;q=0'), 'deflate')
+        self.assertIsNone(compression.negotiate('br'))
+        self.assertIsNone(compression.negotiate('identity'))
+        self.assertIsNone(compression.negotiate(None))
+
+    def test_compress_round_trip(self):
+        body = b'{"MessageText": "You have received 2000 RWF"}' * 100
+        self.assertEqual(gzip.decompress(compression.compress(body, 'gzip')), body)
+        self.assertEqual(zlib.decompress(compression.compress(body, 'deflate')), body)
+        # Identical bodies compress to identical bytes
+        self.assertEqual(compression.compress(body, 'gzip'), compression.compress(body, 'gzip'))
+        stats = compression.CompressionStats()
+        stats.compress(body, 'gzip')
+        summary = stats.summary()
+        self.assertEqual((summary['compressed'], summary['bytes_in']), (1, len(body)))
+        self.assertGreater(summary['ratio'], 10)
+
+    def test_stream_matches_one_shot(self):
+        body = b'{"MessageText": "You have received 2000 RWF"}' * 100
+        stats = compression.CompressionStats()
+        for encoding, decompress in (('gzip', gzip.decompress), ('deflate', zlib.decompress)):
+            stream = stats.stream(encoding)
+            data = b''.join(stream.compress(body[i:i + 500]) for i in range(0, len(body), 500)) + stream.flush()
+            self.assertEqual(decompress(data), body)
+        self.assertEqual(stats.summary()['compressed'], 2)
+        self.assertEqual(stats.summary()['bytes_in'], 2 * len(body))
+
+if __name__ == '__main__':
+    unittest.main()
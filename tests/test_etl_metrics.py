@@ -0,0 +1,131 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_etl_metrics.py
+# Description: Test the ETL stage timers: nested stages are timed
+#              exclusively, items are counted, and results reach the ETL log
+#              and the SystemLog table
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_etl_metrics.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import os
+import tempfile
+import time
+
+from dsa import etl_metrics
+from dsa import parse_xml
+from database import load_db
+from database import storage
+
+XML_SAMPLE = """<?xml version='1.0' encoding='utf-8'?>
+<smses count="2">
+<sms protocol="0" address="M-Money" date="1715351458724" type="1"
+body="You have received 2000 RWF from Jane Smith (*********013) on your mobile money account at 2024-05-10 16:30:51. Your new balance:2000 RWF. Financial Transaction Id: 76662021700." />
+<sms protocol="0" address="M-Money" date="1715351506754" type="1"
+body="TxId: 73214484437. Your payment of 1,000 RWF to Jane Smith 12845 has been completed at 2024-05-10 16:31:39. Your new balance: 1,000 RWF." />
+</smses>"""
+
+def slow_items(count, seconds):
+    for i in range(count):
+        time.sleep(seconds)
+        yield i
+
+class TestStageTimer(unittest.TestCase):
+
+    def test_nested_stages_are_exclusive(self):
+        timer = etl_metrics.StageTimer('job', ('read', 'work'))
+        with timer.stage('work', 3):
+            for _ in timer.timed('read', slow_items(3, 0.01)):
+                time.sleep(0.02)
+        self.assertEqual(timer.items, {'read': 3, 'work': 3})
+        self.assertGreaterEqual(timer.seconds['read'], 0.03)
+        self.assertGreaterEqual(timer.seconds['work'], 0.06)
+        # The time spent reading is not charged to 'work' as well
+        self.assertLess(timer.seconds['work'], 0.06 + timer.seconds['read'])
+        self.assertLessEqual(sum(timer.seconds.values()), timer.elapsed())
+
+    def test_batches_counted_by_size(self):
+        timer = etl_metrics.StageTimer('job')
+        self.assertEqual(list(timer.timed('extract', [[1, 2], [3]], len)), [[1, 2], [3]])
+        self.assertEqual(timer.items['extract'], 3)
+
+    def test_off_when_timer_is_none(self):
+        items = [1, 2]
+        self.assertIs(etl_metrics.timed(None, 'parse', items), items)
+        with etl_metrics.stage(None, 'write'):
+            pass
+
+    def test_messages_in_stage_order(self):
+        timer = etl_metrics.StageTimer('parse_xml', parse_xml.ETL_STAGES)
+        timer.count('write', 5)
+        messages = timer.messages()
+        self.assertEqual([message.split()[1] for message in messages],
+                         ['stage=parse', 'stage=extract', 'stage=write', 'stage=total'])
+        self.assertIn('items=5', messages[2])
+
+class TestEtlLogs(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmp_dir.name, 'logs', 'etl.log')
+        self.xml_path = os.path.join(self.tmp_dir.name, 'sms.xml')
+        with open(self.xml_path, 'w', encoding='utf-8') as f:
+            f.write(XML_SAMPLE)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parse_stages_logged(self):
+        for streaming in (True, False):
+            timer = etl_metrics.StageTimer('parse_xml', parse_xml.ETL_STAGES)
+            if streaming:
+                transactions = list(parse_xml.iter_transactions(self.xml_path, timer=timer))
+            else:
+                transactions = parse_xml.load_transactions(self.xml_path, timer=timer)
+            self.assertEqual(len(transactions), 2)
+            self.assertEqual(timer.items['parse'], 2)
+            self.assertEqual(timer.items['extract'], 2)
+            timer.write_log(self.log_path)
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 8)
+        self.assertTrue(all(' info parse_xml stage=' in line for line in lines))
+
+    def test_load_stages_to_system_log(self):
+        conn = storage.SQLiteBackend(':memory:').connect()
+        timer = etl_metrics.StageTimer('load_db', load_db.ETL_STAGES)
+        transactions = parse_xml.load_transactions(self.xml_path)
+        loaded, _, _ = load_db.bulk_load(conn, transactions, timer=timer)
+        self.assertEqual(loaded, 2)
+        for stage in load_db.ETL_STAGES:
+            self.assertEqual(timer.items[stage], 2)
+        timer.write_system_log(conn)
+        cursor = conn.cursor()
+        cursor.execute("SELECT LogLevel, Message FROM SystemLog ORDER BY LogID")
+        rows = cursor.fetchall()
+        self.assertEqual([level for level, _ in rows], ['info'] * 5)
+        self.assertTrue(rows[0][1].startswith('load_db stage=read '))
+        self.assertTrue(rows[-1][1].startswith('load_db stage=total '))
+        # Timestamp fits the DATETIME column and rows keep their schema IDs
+        cursor.execute("SELECT LogID, Timestamp FROM SystemLog ORDER BY LogID")
+        logged = cursor.fetchall()
+        self.assertEqual([log_id for log_id, _ in logged], list(range(1, 6)))
+        self.assertRegex(logged[0][1], r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$')
+        conn.close()
+
+    def test_parse_stages_to_system_log(self):
+        db_path = os.path.join(self.tmp_dir.name, 'momo.sqlite3')
+        timer = etl_metrics.StageTimer('parse_xml', parse_xml.ETL_STAGES)
+        parse_xml.load_transactions(self.xml_path, timer=timer)
+        self.assertEqual(parse_xml.write_metrics_db(timer, 'sqlite', db_path), f"SQLite database {db_path}")
+        conn = storage.SQLiteBackend(db_path).connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT Message FROM SystemLog ORDER BY LogID")
+        messages = [message for (message,) in cursor.fetchall()]
+        self.assertEqual([message.split()[1] for message in messages],
+                         ['stage=parse', 'stage=extract', 'stage=write', 'stage=total'])
+        conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
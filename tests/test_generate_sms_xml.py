@@ -0,0 +1,82 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_generate_sms_xml.py
+# Description: Test the synthetic SMS export generator: output is
+#              deterministic, valid and parsed by parse_xml like the real
+#              export, and the ETL benchmark runs end to end on it
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_generate_sms_xml.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import os
+import tempfile
+from collections import Counter
+
+from dsa import bench_etl
+from dsa import generate_sms_xml
+from dsa import parse_xml
+
+class TestGenerateSmsXml(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.xml_path = os.path.join(self.tmp_dir.name, 'sms.xml')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_same_seed_same_file(self):
+        other_path = os.path.join(self.tmp_dir.name, 'other.xml')
+        generate_sms_xml.write_sms_xml(self.xml_path, 500, seed=3)
+        generate_sms_xml.write_sms_xml(other_path, 500, seed=3)
+        self.assertEqual(self.read(self.xml_path), self.read(other_path))
+        generate_sms_xml.write_sms_xml(other_path, 500, seed=4)
+        self.assertNotEqual(self.read(self.xml_path), self.read(other_path))
+
+    def test_valid_export(self):
+        written = generate_sms_xml.write_sms_xml(self.xml_path, 2000, seed=1)
+        self.assertEqual(written, 2000)
+        # Strict parse: any unescaped body (e.g. the OTP's '<#>') would fail here
+        root = parse_xml.ET.parse(self.xml_path).getroot()
+        self.assertEqual(root.get('count'), '2000')
+        messages = root.findall('sms')
+        self.assertEqual(len(messages), 2000)
+        dates = [int(sms.get('date')) for sms in messages]
+        self.assertEqual(dates, sorted(dates))
+        self.assertTrue(any(sms.get('body').startswith('<#>') for sms in messages))
+
+    def test_parsed_like_real_export(self):
+        generate_sms_xml.write_sms_xml(self.xml_path, 5000, seed=2)
+        transactions = parse_xml.load_transactions(self.xml_path)
+        self.assertEqual(len(transactions), 5000)
+        types = Counter(tx['TransactionType'] for tx in transactions)
+        for transaction_type in ('payment', 'transfer', 'deposit', 'other'):
+            self.assertGreater(types[transaction_type], 0)
+        references = [tx['ReferenceNumber'] for tx in transactions if tx['ReferenceNumber']]
+        self.assertEqual(len(references), len(set(references)))
+        self.assertTrue(all(len(reference) == 11 for reference in references))
+        balances = [tx['BalanceAfterTransaction'] for tx in transactions if tx['BalanceAfterTransaction'] is not None]
+        self.assertGreaterEqual(min(balances), 0)
+        self.assertTrue(all(tx['DateTime'] for tx in transactions))
+        self.assertTrue(any(tx['Participants'] for tx in transactions))
+
+    def test_bench_etl_end_to_end(self):
+        argv = ['--messages', '300', '--format', 'ndjson', '--workdir', self.tmp_dir.name]
+        args = bench_etl.parse_args(argv)
+        paths = bench_etl.stage_paths(args, self.tmp_dir.name)
+        results = (bench_etl.run_generate(args, paths) + bench_etl.run_extract(args, paths)
+                   + bench_etl.run_load(args, paths))
+        self.assertEqual([result['stage'] for result in results], ['generate', 'parse', 'write', 'load'])
+        self.assertTrue(all(result['items'] == 300 for result in results))
+        load = results[-1]
+        # OTP messages carry no amount and are rejected, everything else is loaded once
+        self.assertEqual(load['loaded'] + load['rejected'], 300)
+        self.assertEqual(load['skipped'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
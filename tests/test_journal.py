@@ -0,0 +1,100 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_journal.py
+# Description: Test the API change journal: append, replay and rotation
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_journal.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import os
+import tempfile
+import threading
+
+from api import journal
+from api import store
+
+def ids(transactions):
+    return [tx['TransactionID'] for tx in transactions]
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'transactions.journal')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def record(self, log, transactions, entry):
+        journal.apply_entry(transactions, entry)
+        log.wait_durable(log.append(entry))
+
+    def test_replay_rebuilds_state(self):
+        base = [{'TransactionID': 1, 'Amount': 1.0}, {'TransactionID': 2, 'Amount': 2.0}]
+        live = store.TransactionStore([dict(tx) for tx in base])
+        log = journal.Journal(self.path)
+        self.record(log, live, journal.put_entry(live.add({'Amount': 3.0})))
+        self.record(log, live, journal.put_entry({'TransactionID': 1, 'Amount': 9.0}))
+        self.record(log, live, journal.delete_entry(2))
+
+        restored = store.TransactionStore([dict(tx) for tx in base])
+        self.assertEqual(journal.replay(restored, self.path), 3)
+        self.assertEqual(list(restored), list(live))
+        self.assertEqual(restored.max_id, 3)
+        # Replaying again on the result changes nothing
+        journal.replay(restored, self.path)
+        self.assertEqual(list(restored), list(live))
+
+    def test_append_many(self):
+        live = store.TransactionStore()
+        log = journal.Journal(self.path)
+        entries = [journal.put_entry(live.add({'Amount': float(i)})) for i in range(3)]
+        entries.append(journal.delete_entry(2))
+        for entry in entries[3:]:
+            journal.apply_entry(live, entry)
+        log.wait_durable(log.append_many(entries))
+        self.assertEqual(log.entries, 4)
+
+        restored = store.TransactionStore()
+        self.assertEqual(journal.replay(restored, self.path), 4)
+        self.assertEqual(list(restored), list(live))
+        self.assertEqual(ids(restored), [1, 3])
+
+    def test_partial_last_line_is_ignored(self):
+        log = journal.Journal(self.path)
+        log.append(journal.put_entry({'TransactionID': 1}))
+        with open(self.path, 'ab') as f:
+            f.write(b'{"op":"put","tx":{"Transac')
+        transactions = store.TransactionStore()
+        self.assertEqual(journal.replay(transactions, self.path), 1)
+        self.assertEqual(ids(transactions), [1])
+
+    def test_group_commit(self):
+        log = journal.Journal(self.path, sync='group', group_window=0.01)
+        threads = [threading.Thread(target=lambda i=i: log.wait_durable(
+            log.append(journal.put_entry({'TransactionID': i})))) for i in range(1, 21)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(len(list(journal.read_entries(self.path))), 20)
+
+    def test_rotation_keeps_unfinished_compactions(self):
+        log = journal.Journal(self.path)
+        log.append(journal.put_entry({'TransactionID': 1}))
+        log.rotate()
+        log.append(journal.put_entry({'TransactionID': 2}))
+        # A second rotation before the first compaction finished keeps both
+        log.rotate()
+        log.append(journal.put_entry({'TransactionID': 3}))
+        self.assertEqual(journal.Journal(self.path).entries, 3)
+        transactions = store.TransactionStore()
+        journal.replay(transactions, self.path)
+        self.assertEqual(ids(transactions), [1, 2, 3])
+        log.finish_compaction()
+        self.assertFalse(os.path.exists(journal.rotated_path(self.path)))
+
+if __name__ == '__main__':
+    unittest.main()
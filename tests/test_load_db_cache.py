@@ -0,0 +1,57 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_load_db_cache.py
+# Description: Test the LRU lookup caches used by load_db.py
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_load_db_cache.py
+#--------------------------------------------------------------------------------
+
+import unittest
+
+from database import load_db
+
+class FakeCursor:
+    """Answers the user lookup SELECT from a dict and records queries"""
+
+    def __init__(self, users):
+        self.users = users
+        self.queries = 0
+        self.result = None
+
+    def execute(self, query, params=()):
+        self.queries += 1
+        self.result = self.users.get(params[0])
+
+    def fetchone(self):
+        return None if self.result is None else (self.result,)
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = load_db.LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        # 'b' was least recently used once 'a' was read
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_warm_stops_when_full(self):
+        cache = load_db.LRUCache(2)
+        cache.warm([('a', 1), ('b', 2), ('c', 3)])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+    def test_cache_hit_skips_select(self):
+        cursor = FakeCursor({'250788000001': 7})
+        cache = load_db.LRUCache(10)
+        user = {'PhoneNumber': '250788000001', 'UserType': 'sender'}
+        self.assertEqual(load_db.get_or_create_user(cursor, user, cache), 7)
+        self.assertEqual(load_db.get_or_create_user(cursor, user, cache), 7)
+        self.assertEqual(cursor.queries, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
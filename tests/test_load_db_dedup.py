@@ -0,0 +1,101 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_load_db_dedup.py
+# Description: Test the unique keys load_db.py deduplicates transactions on
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_load_db_dedup.py
+#--------------------------------------------------------------------------------
+
+import unittest
+from unittest import mock
+
+from database import load_db
+from database import storage
+
+PAYMENT = {'TransactionType': 'payment', 'Amount': 1000.0, 'Currency': 'RWF',
+           'DateTime': '2024-05-10 16:31:39', 'ReferenceNumber': '73214484437',
+           'BalanceAfterTransaction': 1000.0, 'Status': 'confirmed', 'MessageText': 'TxId: 73214484437.'}
+FEE = dict(PAYMENT, TransactionType='fee', ReferenceNumber=None, MessageText='Fee of 100 RWF')
+JANE = {'PhoneNumber': '250788000001', 'Name': 'Jane', 'UserType': 'sender'}
+SHOP = {'PhoneNumber': '12845', 'Name': 'Shop', 'UserType': 'receiver'}
+
+class FakeCursor:
+    """Answers 'SELECT <column> ... IN (...)' from a set of stored keys"""
+
+    def __init__(self, stored):
+        self.stored = stored
+        self.rows = []
+
+    def execute(self, query, params=()):
+        column = query.split()[1]
+        self.rows = [(key,) for key in params if (column, key) in self.stored]
+
+    def fetchall(self):
+        return self.rows
+
+class TestDedupKey(unittest.TestCase):
+
+    def test_reference_number_is_the_key(self):
+        self.assertEqual(load_db.dedup_key(PAYMENT), ('ReferenceNumber', '73214484437'))
+        # ContentHash column is only set when there is no reference
+        self.assertIsNone(load_db.transaction_row(PAYMENT, 2)[-1])
+
+    def test_content_hash_without_reference(self):
+        column, key = load_db.dedup_key(FEE)
+        self.assertEqual(column, 'ContentHash')
+        self.assertEqual(len(key), 64)
+        self.assertEqual(load_db.transaction_row(FEE, 5)[-1], key)
+        self.assertNotEqual(key, load_db.content_hash(dict(FEE, Amount=200.0)))
+
+    def test_filter_new_skips_stored_and_repeated(self):
+        cursor = FakeCursor({load_db.dedup_key(PAYMENT)})
+        self.assertEqual(load_db.filter_new(cursor, [PAYMENT, FEE, dict(FEE)]), [FEE])
+
+class TestStoredMeanwhile(unittest.TestCase):
+    # Transactions another session stores after filter_new() looked, simulated
+    # by letting filter_new() pass everything
+
+    def setUp(self):
+        self.conn = storage.SQLiteBackend(':memory:').connect()
+        self.addCleanup(self.conn.close)
+        patcher = mock.patch.object(load_db, 'filter_new', lambda cursor, transactions: list(transactions))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stored(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT t.ReferenceNumber, t.MessageText, u.PhoneNumber FROM TransactionParticipant p "
+                       "JOIN Transaction t ON t.TransactionID = p.TransactionID "
+                       "JOIN User u ON u.UserID = p.UserID ORDER BY p.ParticipantID")
+        return cursor.fetchall()
+
+    def test_bulk_load_skips_them(self):
+        payment = dict(PAYMENT, Participants=[JANE])
+        self.assertEqual(load_db.bulk_load(self.conn, [payment]), (1, 1, 0))
+        # Stored already: the multi-row INSERT ignores it, and the rest of
+        # the batch is inserted row by row with their own participants
+        fee = dict(FEE, Participants=[SHOP])
+        other = dict(PAYMENT, ReferenceNumber='555', MessageText='TxId: 555.', Participants=[SHOP, JANE])
+        self.assertEqual(load_db.bulk_load(self.conn, [fee, dict(payment, Participants=[SHOP]), other]),
+                         (2, 3, 1))
+        self.assertEqual(self.stored(), [
+            ('73214484437', 'TxId: 73214484437.', '250788000001'),
+            (None, 'Fee of 100 RWF', '12845'),
+            ('555', 'TxId: 555.', '12845'),
+            ('555', 'TxId: 555.', '250788000001'),
+        ])
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Transaction")
+        self.assertEqual(cursor.fetchone()[0], 3)
+
+    def test_insert_transaction_returns_none(self):
+        cursor = self.conn.cursor()
+        category_id = load_db.get_or_create_category(cursor, 'fee')
+        self.assertEqual(load_db.insert_transaction(cursor, FEE, category_id), 1)
+        self.assertIsNone(load_db.insert_transaction(cursor, dict(FEE), category_id))
+        transaction_id = load_db.insert_transaction(cursor, dict(PAYMENT, TransactionType='fee'), category_id)
+        cursor.execute("SELECT ReferenceNumber FROM Transaction WHERE TransactionID = %s", (transaction_id,))
+        self.assertEqual(cursor.fetchone(), ('73214484437',))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_metrics.py
+# Description: Test the API request metrics: route templates, histogram
+#              buckets and the Prometheus text rendering
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_metrics.py
+#--------------------------------------------------------------------------------
+
+import unittest
+
+from api import metrics
+
+class TestRouteLabel(unittest.TestCase):
+
+    def test_ids_and_phones_share_a_route(self):
+        self.assertEqual(metrics.route_label(['transactions']), '/transactions')
+        self.assertEqual(metrics.route_label(['transactions', 'search']), '/transactions/search')
+        self.assertEqual(metrics.route_label(['transactions', 'batch']), '/transactions/batch')
+        self.assertEqual(metrics.route_label(['transactions', '17']), '/transactions/{id}')
+        self.assertEqual(metrics.route_label(['transactions', 'abc']), '/transactions/{id}')
+        self.assertEqual(metrics.route_label(['users', '250788000001', 'transactions']),
+                         '/users/{phone}/transactions')
+        self.assertEqual(metrics.route_label(['stats', 'daily-volume']), '/stats/{name}')
+        self.assertEqual(metrics.route_label(['metrics']), '/metrics')
+        self.assertEqual(metrics.route_label(['favicon.ico']), 'other')
+
+class TestHistogram(unittest.TestCase):
+
+    def test_bucket_bounds_are_inclusive(self):
+        histogram = metrics.Histogram((1, 10))
+        for value in (0.5, 1, 2, 10, 11):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 2, 1])
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.sum, 24.5)
+
+    def test_lines_are_cumulative(self):
+        histogram = metrics.Histogram((1, 10))
+        for value in (0.5, 2, 20):
+            histogram.observe(value)
+        lines = histogram.lines('size', {'route': '/x'})
+        self.assertEqual(lines, [
+            'size_bucket{route="/x",le="1"} 1',
+            'size_bucket{route="/x",le="10"} 2',
+            'size_bucket{route="/x",le="+Inf"} 3',
+            'size_sum{route="/x"} 22.5',
+            'size_count{route="/x"} 3',
+        ])
+
+class TestRequestMetrics(unittest.TestCase):
+
+    def test_in_flight_and_finished_requests(self):
+        collector = metrics.RequestMetrics()
+        collector.start('GET', '/transactions')
+        collector.start('GET', '/transactions')
+        collector.finish('GET', '/transactions', 200, 0.003, 0, 2048)
+        text = collector.render()
+        self.assertIn('momo_http_requests_in_flight{method="GET",route="/transactions"} 1', text)
+        self.assertIn('momo_http_responses_total{method="GET",route="/transactions",status="200"} 1', text)
+        self.assertIn('momo_http_request_duration_seconds_bucket{method="GET",route="/transactions",le="0.0025"} 0',
+                      text)
+        self.assertIn('momo_http_request_duration_seconds_bucket{method="GET",route="/transactions",le="0.005"} 1',
+                      text)
+        self.assertIn('momo_http_response_size_bytes_sum{method="GET",route="/transactions"} 2048', text)
+        self.assertIn('# TYPE momo_http_request_duration_seconds histogram', text)
+
+    def test_render_gauges_and_escaping(self):
+        collector = metrics.RequestMetrics()
+        collector.start('GET', 'other')
+        collector.finish('GET', 'other', None, 0.001, 0, 0)
+        text = collector.render([('transactions', 'gauge', 'Transactions in the store.', 42)])
+        self.assertIn('status="none"', text)
+        self.assertIn('# TYPE momo_transactions gauge\nmomo_transactions 42\n', text)
+        self.assertEqual(metrics.labels(name='a"b\\c'), '{name="a\\"b\\\\c"}')
+        self.assertTrue(text.endswith('\n'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_parse_xml_corpus.py
+# Description: Regression test of parse_xml.py extraction over the full sample export
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_parse_xml_corpus.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import os
+import json
+
+from dsa import parse_xml
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+XML_PATH = os.path.join(BASE_DIR, '..', 'data', 'raw', 'modified_sms_v2.xml')
+JSON_PATH = os.path.join(BASE_DIR, '..', 'data', 'processed', 'transactions.json')
+
+class TestParseXMLCorpus(unittest.TestCase):
+
+    def test_corpus_matches_processed_json(self):
+        # transactions.json was produced by the original uncompiled extractors
+        with open(JSON_PATH, 'r') as f:
+            expected = json.load(f)
+        self.assertEqual(parse_xml.load_transactions(XML_PATH), expected)
+
+    def test_lowered_argument_is_optional(self):
+        body = "TxId: 73214484437. Your payment of 1,000 RWF to Jane Smith 12845 has been completed."
+        self.assertEqual(parse_xml.extract_transaction_info(body),
+                         parse_xml.extract_transaction_info(body, body.lower()))
+        self.assertEqual(parse_xml.extract_users(body), parse_xml.extract_users(body, body.lower()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_parse_xml_streaming.py
+# Description: Test streaming (iterparse) and incremental modes of parse_xml.py
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_parse_xml_streaming.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import os
+import json
+import tempfile
+from multiprocessing.pool import ThreadPool
+from unittest import mock
+
+from dsa import parse_xml
+
+XML_SAMPLE = """<?xml version='1.0' encoding='utf-8'?>
+<smses count="3">
+<sms protocol="0" address="M-Money" date="1715351458724" type="1"
+body="You have received 2000 RWF from Jane Smith (*********013) on your mobile money account at 2024-05-10 16:30:51. Your new balance:2000 RWF. Financial Transaction Id: 76662021700." />
+<sms protocol="0" address="M-Money" date="1715351506754" type="1"
+body="TxId: 73214484437. Your payment of 1,000 RWF to Jane Smith 12845 has been completed at 2024-05-10 16:31:39. Your new balance: 1,000 RWF." />
+<sms protocol="0" address="M-Money" date="1715369560245" type="1"
+body="You have received 500 RWF from Jane Smith (*********013) on your mobile money account." />
+</smses>"""
+
+class TestParseXMLStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.xml_path = os.path.join(self.tmp_dir.name, 'sms.xml')
+        with open(self.xml_path, 'w', encoding='utf-8') as f:
+            f.write(XML_SAMPLE)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_iter_transactions_matches_load_transactions(self):
+        # Streaming output must be identical to the full-tree parser, IDs included
+        streamed = list(parse_xml.iter_transactions(self.xml_path))
+        self.assertEqual(streamed, parse_xml.load_transactions(self.xml_path))
+        self.assertEqual([tx['TransactionID'] for tx in streamed], [1, 2, 3])
+        # Same sender seen twice keeps the same UserID
+        self.assertEqual(streamed[0]['Participants'][0]['UserID'],
+                         streamed[2]['Participants'][0]['UserID'])
+
+    def test_parallel_matches_serial(self):
+        # Small batches force results from several worker tasks to be merged
+        serial = list(parse_xml.iter_transactions(self.xml_path))
+        parallel = list(parse_xml.iter_transactions(self.xml_path, workers=2, batch_size=1))
+        self.assertEqual(parallel, serial)
+        self.assertEqual(parse_xml.load_transactions(self.xml_path, workers=2), serial)
+
+    def test_imap_bounded_limits_pending_batches(self):
+        read = []
+
+        def source():
+            for i in range(20):
+                read.append(i)
+                yield i
+        with ThreadPool(2) as pool:
+            results = parse_xml.imap_bounded(pool, abs, source(), 3)
+            self.assertEqual(next(results), 0)
+            # Only max_pending items were read before the first result was taken
+            self.assertEqual(len(read), 3)
+            self.assertEqual(list(results), list(range(1, 20)))
+
+    def test_iter_transactions_missing_file(self):
+        self.assertEqual(list(parse_xml.iter_transactions(os.path.join(self.tmp_dir.name, 'missing.xml'))), [])
+
+    def test_save_transactions_json_consumes_generator(self):
+        json_path = os.path.join(self.tmp_dir.name, 'out', 'transactions.json')
+        count = parse_xml.save_transactions_json(parse_xml.iter_transactions(self.xml_path), json_path)
+        self.assertEqual(count, 3)
+        with open(json_path, 'r') as f:
+            content = f.read()
+        # Layout is unchanged from json.dump(..., indent=4)
+        transactions = parse_xml.load_transactions(self.xml_path)
+        self.assertEqual(content, json.dumps(transactions, indent=4))
+
+    def test_save_transactions_json_empty(self):
+        json_path = os.path.join(self.tmp_dir.name, 'empty.json')
+        self.assertEqual(parse_xml.save_transactions_json(iter([]), json_path), 0)
+        with open(json_path, 'r') as f:
+            self.assertEqual(json.load(f), [])
+
+class TestIncrementalETL(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.tmp_dir.name, 'transactions.json')
+        messages = XML_SAMPLE.split('<sms ')
+        self.header, self.sms = messages[0], ['<sms ' + m.replace('</smses>', '') for m in messages[1:]]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_xml(self, sms_elements):
+        xml_path = os.path.join(self.tmp_dir.name, 'sms.xml')
+        with open(xml_path, 'w', encoding='utf-8') as f:
+            f.write(self.header + ''.join(sms_elements) + '</smses>')
+        return xml_path
+
+    def load_output(self):
+        with open(self.json_path, 'r') as f:
+            return json.load(f)
+
+    def test_incremental_appends_only_new_messages(self):
+        parse_xml.run_incremental(self.write_xml(self.sms[:2]), self.json_path)
+        self.assertEqual(len(self.load_output()), 2)
+
+        # Re-running on the same export adds nothing
+        new = parse_xml.run_incremental(self.write_xml(self.sms[:2]), self.json_path)
+        self.assertEqual(new, [])
+        self.assertEqual(len(self.load_output()), 2)
+
+        # A newer export only contributes its new message, with continuing IDs
+        xml_path = self.write_xml(self.sms)
+        new = parse_xml.run_incremental(xml_path, self.json_path)
+        self.assertEqual([tx['TransactionID'] for tx in new], [3])
+        with open(self.json_path, 'r') as f:
+            content = f.read()
+        self.assertEqual(content, json.dumps(parse_xml.load_transactions(xml_path), indent=4))
+
+        checkpoint = parse_xml.Checkpoint.load(parse_xml.Checkpoint.path_for(self.json_path))
+        self.assertEqual(checkpoint.next_transaction_id, 4)
+        self.assertEqual(checkpoint.last_date, 1715369560245)
+
+    def test_changed_output_triggers_rebuild(self):
+        xml_path = self.write_xml(self.sms)
+        parse_xml.run_incremental(xml_path, self.json_path)
+        with open(self.json_path, 'w') as f:
+            f.write('[]')
+        new = parse_xml.run_incremental(xml_path, self.json_path)
+        self.assertEqual(len(new), 3)
+        self.assertEqual(self.load_output(), parse_xml.load_transactions(xml_path))
+
+    def test_replaced_export_triggers_rebuild(self):
+        parse_xml.run_incremental(self.write_xml(self.sms[1:]), self.json_path)
+        # Same messages plus an older one the first run never saw
+        xml_path = self.write_xml(self.sms)
+        new = parse_xml.run_incremental(xml_path, self.json_path)
+        self.assertEqual(len(new), 3)
+        self.assertEqual(self.load_output(), parse_xml.load_transactions(xml_path))
+        # The rebuilt checkpoint matches the export, so the next run resumes
+        self.assertEqual(parse_xml.run_incremental(xml_path, self.json_path), [])
+
+    def test_failed_write_keeps_checkpoint(self):
+        parse_xml.run_incremental(self.write_xml(self.sms[:2]), self.json_path)
+        checkpoint_path = parse_xml.Checkpoint.path_for(self.json_path)
+        with open(checkpoint_path, 'r') as f:
+            saved = f.read()
+        xml_path = self.write_xml(self.sms)
+        with mock.patch.object(parse_xml, 'write_json_records', side_effect=OSError('disk full')):
+            self.assertEqual(parse_xml.run_incremental(xml_path, self.json_path), [])
+        with open(checkpoint_path, 'r') as f:
+            self.assertEqual(f.read(), saved)
+        # The message that was not written is picked up by the next run
+        parse_xml.run_incremental(xml_path, self.json_path)
+        self.assertEqual(self.load_output(), parse_xml.load_transactions(xml_path))
+
+    def test_resume_reads_export_once(self):
+        parse_xml.run_incremental(self.write_xml(self.sms[:2]), self.json_path)
+        xml_path = self.write_xml(self.sms)
+        with mock.patch.object(parse_xml, 'iter_sms_attributes', wraps=parse_xml.iter_sms_attributes) as reader:
+            new = parse_xml.run_incremental(xml_path, self.json_path)
+        self.assertEqual(reader.call_count, 1)
+        self.assertEqual([tx['TransactionID'] for tx in new], [3])
+
+    def test_filter_new_checks_covered_messages(self):
+        attributes = [('a', '1'), ('b', '2'), ('c', '3')]
+        checkpoint = parse_xml.Checkpoint()
+        self.assertEqual(list(checkpoint.filter_new(attributes[:2])), attributes[:2])
+        resumed = parse_xml.Checkpoint(checkpoint.last_date, checkpoint.last_date_hashes, 3, {},
+                                       checkpoint.content_hash)
+        self.assertEqual(list(resumed.filter_new(attributes)), attributes[2:])
+        # A replaced message under the watermark is caught before anything new is passed on
+        replaced = parse_xml.Checkpoint(checkpoint.last_date, checkpoint.last_date_hashes, 3, {},
+                                        checkpoint.content_hash)
+        with self.assertRaises(parse_xml.CheckpointMismatch):
+            next(replaced.filter_new([('x', '1'), ('b', '2'), ('c', '3')]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_range_index.py
+# Description: Test the sorted range index against the linear filter
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_range_index.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import random
+
+from dsa import range_index
+
+class TestSortedIndex(unittest.TestCase):
+
+    def test_matches_linear_filter_through_changes(self):
+        random.seed(7)
+        # Few distinct keys, so equal keys span several buckets
+        pairs = [(random.randint(0, 300), tid) for tid in range(3000)]
+        index = range_index.SortedIndex(pairs[:1000])
+        for key, tid in pairs[1000:]:
+            index.add(key, tid)
+        for pair in random.sample(pairs, 1200):
+            self.assertTrue(index.remove(*pair))
+            pairs.remove(pair)
+        self.assertFalse(index.remove(-1, 0))
+        pairs.sort()
+        self.assertEqual(list(index), pairs)
+        self.assertEqual(len(index), len(pairs))
+        for _ in range(200):
+            low, high = random.randint(-5, 305), random.randint(-5, 305)
+            expected = [tid for key, tid in pairs if low <= key <= high]
+            self.assertEqual(list(index.range(low, high)), expected)
+            self.assertEqual(index.count(low, high), len(expected))
+        self.assertEqual(list(index.range(high=10)), [tid for key, tid in pairs if key <= 10])
+        self.assertEqual(index.count(), len(pairs))
+
+    def test_keys(self):
+        self.assertEqual(range_index.datetime_key('1970-01-02 00:00:01'), 86401)
+        self.assertIsNone(range_index.datetime_key('not a date'))
+        self.assertIsNone(range_index.datetime_key(None))
+        # An offset-aware value cannot be compared with the naive epoch
+        self.assertIsNone(range_index.datetime_key('2024-05-10T10:00:00+02:00'))
+        self.assertEqual(range_index.amount_key(5), 5.0)
+        self.assertIsNone(range_index.amount_key('5'))
+        self.assertIsNone(range_index.amount_key(float('nan')))
+        transactions = [{'TransactionID': 1, 'Amount': 10.0}, {'TransactionID': 2, 'Amount': None},
+                        {'TransactionID': 3, 'Amount': 30.0}]
+        self.assertEqual(range_index.linear_filter(transactions, 'Amount', 5, 20), [1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_response_cache.py
+# Description: Test the versioned response cache and ETag matching
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_response_cache.py
+#--------------------------------------------------------------------------------
+
+import unittest
+
+from api import response_cache
+from api import store
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_entries_expire_with_the_store_version(self):
+        transactions = store.TransactionStore([{'TransactionID': 1}])
+        cache = response_cache.ResponseCache()
+        version = transactions.version
+        cache.put('/transactions', version, b'[]', {'X-Next-Cursor': '1'})
+        entry = cache.get('/transactions', transactions.version)
+        self.assertEqual((entry.body, entry.headers), (b'[]', {'X-Next-Cursor': '1'}))
+        self.assertEqual(entry.etag, cache.etag(version))
+        transactions.add({})
+        self.assertIsNone(cache.get('/transactions', transactions.version))
+        transactions.delete(2)
+        self.assertIsNone(cache.get('/transactions', transactions.version))
+        # A body built at an older version does not replace a newer one
+        cache.put('/transactions', transactions.version, b'[1]')
+        cache.put('/transactions', version, b'[]')
+        self.assertEqual(cache.get('/transactions', transactions.version).body, b'[1]')
+        self.assertEqual(cache.summary()['hits'], 2)
+        self.assertEqual(cache.summary()['misses'], 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = response_cache.ResponseCache(max_entries=2)
+        cache.put('/a', 0, b'a')
+        cache.put('/b', 0, b'b')
+        cache.get('/a', 0)
+        cache.put('/c', 0, b'c')
+        self.assertIsNone(cache.get('/b', 0))
+        self.assertIsNotNone(cache.get('/a', 0))
+        self.assertEqual(cache.summary()['entries'], 2)
+
+    def test_etag_matches(self):
+        etag = response_cache.ResponseCache().etag(3)
+        self.assertTrue(response_cache.etag_matches(etag, etag))
+        self.assertTrue(response_cache.etag_matches(f'"x", {etag}', etag))
+        # Weak comparison: the strong form matches too
+        self.assertTrue(response_cache.etag_matches(etag[2:], etag))
+        self.assertTrue(response_cache.etag_matches('*', etag))
+        self.assertFalse(response_cache.etag_matches(None, etag))
+        # Another process numbers its versions from 0 again
+        self.assertFalse(response_cache.etag_matches(response_cache.ResponseCache().etag(3), etag))
+
+    def test_encoded_bodies_are_made_once(self):
+        entry = response_cache.ResponseCache().put('/transactions', 0, b'body')
+        calls = []
+
+        def compress(body, encoding):
+            calls.append(encoding)
+            return body.upper()
+        self.assertEqual(entry.encoded('gzip', compress), (b'BODY', False))
+        self.assertEqual(entry.encoded('gzip', compress), (b'BODY', True))
+        self.assertEqual(calls, ['gzip'])
+
+if __name__ == '__main__':
+    unittest.main()
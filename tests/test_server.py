@@ -0,0 +1,282 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_server.py
+# Description: Test the REST API handlers over HTTP, against a server on an
+#              ephemeral port backed by temporary data and journal files
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_server.py
+#--------------------------------------------------------------------------------
+
+import unittest
+from unittest import mock
+import base64
+import gzip
+import http.client
+import json
+import os
+import tempfile
+import threading
+import zlib
+
+from api import server
+from api import journal
+from api import response_cache
+from api import compression
+from dsa import snapshot
+
+def make_transactions(count):
+    # Transactions with enough MessageText for their list to be compressed
+    return [{'TransactionID': tid, 'TransactionType': 'payment', 'Currency': 'RWF', 'Amount': float(tid),
+             'DateTime': '2024-05-10 16:30:51', 'MessageText': f'You have received {tid} RWF from Jane Smith'}
+            for tid in range(1, count + 1)]
+
+AUTH = {'Authorization': 'Basic ' + base64.b64encode(f'{server.USERNAME}:{server.PASSWORD}'.encode()).decode()}
+
+TRANSACTIONS = [
+    {'TransactionID': 1, 'TransactionType': 'payment', 'Currency': 'RWF', 'Amount': 500.0,
+     'DateTime': '2024-05-10 16:30:51', 'MessageText': 'Payment to Jane Smith'},
+    {'TransactionID': 2, 'TransactionType': 'deposit', 'Currency': 'RWF', 'Amount': 2000.0,
+     'DateTime': '2024-05-11 09:00:00', 'MessageText': 'Deposit'},
+    {'TransactionID': 3, 'TransactionType': 'payment', 'Currency': 'USD', 'Amount': 20.0,
+     'DateTime': '2024-05-12 10:15:00', 'MessageText': 'Payment to John'},
+    {'TransactionID': 4, 'TransactionType': 'payment', 'Currency': 'RWF', 'Amount': 750.0,
+     'DateTime': '2024-05-13 12:00:00', 'MessageText': 'Payment to Jane Doe'},
+]
+
+class ServerTestCase(unittest.TestCase):
+    # Serves RECORDS from a temporary data file, with its own journal,
+    # response cache and compression totals, as server.run() would.
+    RECORDS = TRANSACTIONS
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        data_file = os.path.join(tmp_dir.name, 'transactions.json')
+        with open(data_file, 'w') as f:
+            json.dump(self.RECORDS, f)
+        self.patch(DATA_FILE=data_file, SNAPSHOT_FILE=snapshot.path_for(data_file),
+                   JOURNAL_FILE=os.path.splitext(data_file)[0] + '.journal')
+        self.start_server()
+
+    def patch(self, **values):
+        for name, value in values.items():
+            patcher = mock.patch.object(server, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def start_server(self):
+        # Loads the store from the data file and journal, then serves it
+        self.patch(transactions=server.load_transactions(),
+                   transaction_journal=journal.Journal(server.JOURNAL_FILE),
+                   cached_responses=response_cache.ResponseCache(),
+                   compression_stats=compression.CompressionStats())
+        self.httpd = server.ThreadingHTTPServer(('127.0.0.1', 0), server.TransactionHandler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.addCleanup(self.httpd.server_close)
+        self.addCleanup(self.httpd.shutdown)
+
+    def stop_server(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def request(self, method, path, body=None, headers=None):
+        # Returns the response and its body, with any chunked encoding removed
+        conn = http.client.HTTPConnection('127.0.0.1', self.httpd.server_address[1], timeout=10)
+        try:
+            conn.request(method, path, None if body is None else json.dumps(body), dict(AUTH, **(headers or {})))
+            response = conn.getresponse()
+            return response, response.read()
+        finally:
+            conn.close()
+
+    def get_json(self, path, headers=None):
+        return self.request_json('GET', path, headers=headers)
+
+    def request_json(self, method, path, body=None, headers=None):
+        response, data = self.request(method, path, body, headers)
+        return response, json.loads(data)
+
+class TestTransactionQueries(ServerTestCase):
+
+    def test_full_list_is_unchanged(self):
+        # Without a query the body is the whole list, serialized as before
+        response, body = self.request('GET', '/transactions')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, json.dumps(TRANSACTIONS).encode())
+        self.assertIsNone(response.getheader('X-Next-Cursor'))
+
+    def test_filters(self):
+        response, page = self.get_json('/transactions?type=payment&currency=RWF')
+        self.assertEqual([tx['TransactionID'] for tx in page], [1, 4])
+        response, page = self.get_json('/transactions?min_amount=100&max_amount=1000&start=2024-05-11')
+        self.assertEqual([tx['TransactionID'] for tx in page], [4])
+        response, page = self.get_json('/transactions?type=refund')
+        self.assertEqual(page, [])
+
+    def test_cursor_paging(self):
+        response, page = self.get_json('/transactions?type=payment&limit=2')
+        self.assertEqual([tx['TransactionID'] for tx in page], [1, 3])
+        self.assertEqual(response.getheader('X-Next-Cursor'), '3')
+        self.assertIn('X-Next-Cursor', response.getheader('Access-Control-Expose-Headers'))
+        response, page = self.get_json('/transactions?type=payment&limit=2&after=3')
+        self.assertEqual([tx['TransactionID'] for tx in page], [4])
+        self.assertIsNone(response.getheader('X-Next-Cursor'))
+        response, page = self.get_json('/transactions?limit=1&offset=2')
+        self.assertEqual([tx['TransactionID'] for tx in page], [3])
+
+    def test_projection(self):
+        response, page = self.get_json('/transactions?currency=USD&fields=TransactionID,Amount,Missing')
+        self.assertEqual(page, [{'TransactionID': 3, 'Amount': 20.0}])
+
+    def test_invalid_parameters(self):
+        for query in ('min_amount=abc', 'max_amount=1e', 'limit=0', 'limit=ten', 'offset=-1',
+                      'after=-1', 'after=x', 'start=yesterday', 'fields=,'):
+            with self.subTest(query=query):
+                response, body = self.get_json('/transactions?' + query)
+                self.assertEqual(response.status, 400)
+                self.assertEqual(body['error'], 'Invalid query parameter')
+
+class TestConditionalRequests(ServerTestCase):
+
+    def test_not_modified(self):
+        for path in ('/transactions', '/transactions?type=payment', '/stats/types'):
+            with self.subTest(path=path):
+                response, body = self.request('GET', path)
+                etag = response.getheader('ETag')
+                self.assertTrue(etag.startswith('W/"'))
+                self.assertEqual(response.getheader('Vary'), 'Accept-Encoding')
+                response, body = self.request('GET', path, headers={'If-None-Match': etag})
+                self.assertEqual(response.status, 304)
+                self.assertEqual(body, b'')
+                self.assertEqual(response.getheader('ETag'), etag)
+                self.assertEqual(response.getheader('Vary'), 'Accept-Encoding')
+                # The strong form of the tag matches too
+                response, body = self.request('GET', path, headers={'If-None-Match': etag[2:]})
+                self.assertEqual(response.status, 304)
+
+    def test_writes_invalidate_cached_responses(self):
+        changes = (
+            ('POST', '/transactions', {'TransactionType': 'payment', 'Amount': 5.0}, 201),
+            ('PUT', '/transactions/5', {'TransactionType': 'deposit', 'Amount': 6.0}, 200),
+            ('DELETE', '/transactions/5', None, 200),
+        )
+        response, cached = self.get_json('/transactions?type=payment')
+        for method, path, body, status in changes:
+            with self.subTest(method=method):
+                etag = response.getheader('ETag')
+                self.assertEqual(self.request(method, path, body)[0].status, status)
+                response, page = self.get_json('/transactions?type=payment', {'If-None-Match': etag})
+                self.assertEqual(response.status, 200)
+                self.assertNotEqual(response.getheader('ETag'), etag)
+                self.assertEqual([tx['TransactionID'] for tx in page],
+                                 [1, 3, 4, 5] if method == 'POST' else [1, 3, 4])
+        # Unchanged, the same page is served from the cache
+        hits = server.cached_responses.hits
+        self.assertEqual(self.get_json('/transactions?type=payment')[1], cached)
+        self.assertEqual(server.cached_responses.hits, hits + 1)
+
+class TestCompression(ServerTestCase):
+    RECORDS = make_transactions(40)
+
+    def test_content_encoding(self):
+        expected = json.dumps(self.RECORDS).encode()
+        decoders = {'gzip': gzip.decompress, 'deflate': zlib.decompress}
+        for accept, encoding in (('gzip', 'gzip'), ('deflate', 'deflate'), ('gzip;q=0.5, deflate', 'deflate'),
+                                 ('br', None), ('gzip;q=0', None), (None, None)):
+            with self.subTest(accept=accept):
+                response, body = self.request('GET', '/transactions',
+                                              headers=None if accept is None else {'Accept-Encoding': accept})
+                self.assertEqual(response.getheader('Content-Encoding'), encoding)
+                self.assertEqual(response.getheader('Vary'), 'Accept-Encoding')
+                self.assertEqual(int(response.getheader('Content-Length')), len(body))
+                self.assertEqual(body if encoding is None else decoders[encoding](body), expected)
+        # Each encoding was compressed once for this store version
+        self.assertEqual(server.compression_stats.compressed, 2)
+        self.assertEqual(server.compression_stats.reused, 1)
+
+    def test_small_responses_are_not_compressed(self):
+        response, body = self.request('GET', '/transactions/1', headers={'Accept-Encoding': 'gzip'})
+        self.assertIsNone(response.getheader('Content-Encoding'))
+        self.assertEqual(json.loads(body), self.RECORDS[0])
+
+class TestStreamedCollection(ServerTestCase):
+    RECORDS = make_transactions(50)
+
+    def setUp(self):
+        self.patch(STREAM_MIN_RECORDS=20, STREAM_BATCH_SIZE=7)
+        super().setUp()
+
+    def test_chunked_body(self):
+        response, body = self.request('GET', '/transactions')
+        self.assertEqual(response.getheader('Transfer-Encoding'), 'chunked')
+        self.assertIsNone(response.getheader('Content-Length'))
+        self.assertEqual(response.getheader('Vary'), 'Accept-Encoding')
+        self.assertEqual(body, json.dumps(self.RECORDS).encode())
+        etag = response.getheader('ETag')
+        response, body = self.request('GET', '/transactions', headers={'If-None-Match': etag})
+        self.assertEqual(response.status, 304)
+
+    def test_compressed_once_per_version(self):
+        expected = json.dumps(self.RECORDS).encode()
+        for _ in range(2):
+            response, body = self.request('GET', '/transactions', headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(response.getheader('Content-Encoding'), 'gzip')
+            self.assertEqual(response.getheader('Transfer-Encoding'), 'chunked')
+            self.assertEqual(gzip.decompress(body), expected)
+        self.assertEqual((server.compression_stats.compressed, server.compression_stats.reused), (1, 1))
+        # A write starts a new version, compressed afresh
+        self.request('DELETE', '/transactions/50')
+        response, body = self.request('GET', '/transactions', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(gzip.decompress(body), json.dumps(self.RECORDS[:-1]).encode())
+        self.assertEqual((server.compression_stats.compressed, server.compression_stats.reused), (2, 1))
+
+class TestBatchEndpoints(ServerTestCase):
+
+    def test_partial_failures(self):
+        response, body = self.request_json('POST', '/transactions/batch', [
+            {'TransactionType': 'payment', 'Amount': 10.0}, 'not an object',
+            {'TransactionType': ['unhashable']}, {'TransactionType': 'deposit', 'Amount': 20.0}])
+        self.assertEqual(response.status, 207)
+        self.assertEqual((body['succeeded'], body['failed']), (2, 2))
+        self.assertEqual([(result['index'], result['status']) for result in body['results']],
+                         [(0, 201), (1, 400), (2, 400), (3, 201)])
+        self.assertEqual(body['results'][1]['error'], 'Expected a JSON object')
+        # Created items take consecutive new IDs
+        self.assertEqual([body['results'][i]['transaction']['TransactionID'] for i in (0, 3)], [5, 6])
+        response, body = self.request_json('DELETE', '/transactions/batch', [5, 99, 'x', True, 6])
+        self.assertEqual(response.status, 207)
+        self.assertEqual([(result['index'], result['status']) for result in body['results']],
+                         [(0, 200), (1, 404), (2, 400), (3, 400), (4, 200)])
+        self.assertEqual(body['results'][1]['id'], 99)
+        # None succeeding is a 400, all succeeding the plain status
+        self.assertEqual(self.request('DELETE', '/transactions/batch', [99])[0].status, 400)
+        self.assertEqual(self.request('DELETE', '/transactions/batch', [1, 2])[0].status, 200)
+
+    def test_rejected_batches(self):
+        self.patch(MAX_BATCH_SIZE=3)
+        response, body = self.request_json('POST', '/transactions/batch', [{}] * 4)
+        self.assertEqual(response.status, 413)
+        self.assertEqual(body['error'], 'At most 3 items per batch')
+        self.assertEqual(self.request('POST', '/transactions/batch', {'not': 'a list'})[0].status, 400)
+        self.assertEqual(self.request('DELETE', '/transactions/batch', [1, 2, 3, 4])[0].status, 413)
+        # Nothing was applied
+        self.assertEqual(len(self.get_json('/transactions')[1]), len(TRANSACTIONS))
+
+    def test_batch_is_journaled_once_and_replayed(self):
+        items = [{'TransactionType': 'payment', 'Amount': float(i)} for i in range(5)]
+        with mock.patch.object(server.transaction_journal, 'append_many',
+                               wraps=server.transaction_journal.append_many) as append_many:
+            self.assertEqual(self.request('POST', '/transactions/batch', items)[0].status, 201)
+            self.assertEqual(self.request('DELETE', '/transactions/batch', [1, 2])[0].status, 200)
+        self.assertEqual([len(call.args[0]) for call in append_many.call_args_list], [5, 2])
+        with open(server.JOURNAL_FILE) as f:
+            self.assertEqual(len(f.readlines()), 7)
+        expected = self.get_json('/transactions')[1]
+        # A restart loads the unchanged data file and replays the journal
+        self.stop_server()
+        self.start_server()
+        self.assertEqual(self.get_json('/transactions')[1], expected)
+        self.assertEqual([tx['TransactionID'] for tx in expected], [3, 4, 5, 6, 7, 8, 9])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_snapshot.py
+# Description: Test snapshot.py columnar snapshot writing and lazy reading
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_snapshot.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import os
+import tempfile
+
+from dsa import snapshot
+
+TRANSACTIONS = [
+    {
+        'TransactionID': 1, 'TransactionType': 'deposit', 'Amount': 2000.0, 'Currency': 'RWF',
+        'DateTime': '2024-05-10 16:30:51', 'ReferenceNumber': '76662021700',
+        'BalanceAfterTransaction': 2000.0, 'Status': 'confirmed',
+        'MessageText': 'You have received 2000 RWF from Jane Smith (*********013).',
+        'Participants': [{'Name': 'Jane Smith', 'PhoneNumber': '*********013',
+                          'UserType': 'sender', 'UserID': 1}]
+    },
+    {
+        'TransactionID': 2, 'TransactionType': 'other', 'Amount': None, 'Currency': None,
+        'DateTime': None, 'ReferenceNumber': None, 'BalanceAfterTransaction': None,
+        'Status': 'confirmed', 'MessageText': 'Muraho été', 'Participants': []
+    },
+]
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'transactions.snapshot')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        self.assertEqual(snapshot.write_snapshot(iter(TRANSACTIONS), self.path), 2)
+        table = snapshot.SnapshotTable(self.path)
+        self.assertEqual(len(table), 2)
+        self.assertEqual(list(table), TRANSACTIONS)
+        # Key order matches the ETL output
+        self.assertEqual(list(table[0]), list(TRANSACTIONS[0]))
+        self.assertEqual(table[-1], TRANSACTIONS[1])
+
+    def test_typed_columns(self):
+        snapshot.write_snapshot(TRANSACTIONS, self.path)
+        table = snapshot.SnapshotTable(self.path)
+        self.assertEqual(list(table.column('TransactionID')), [1, 2])
+        self.assertEqual(table.column('DateTime')[0], 1715358651)
+        codes = table.column('TransactionType')
+        self.assertEqual([table.dictionary('TransactionType')[c] for c in codes], ['deposit', 'other'])
+
+    def test_empty_snapshot(self):
+        snapshot.write_snapshot([], self.path)
+        self.assertEqual(list(snapshot.SnapshotTable(self.path)), [])
+
+    def test_records_outside_the_columns_round_trip(self):
+        # As created through the API: extra and missing fields, an integer
+        # amount, an ISO DateTime and a non-string reference number
+        records = [
+            {'TransactionType': 'payment', 'Amount': 5, 'Note': 'rent', 'TransactionID': 3},
+            dict(TRANSACTIONS[0], DateTime='2024-05-10T16:30:51', ReferenceNumber=7321,
+                 BalanceAfterTransaction=float('nan')),
+            TRANSACTIONS[1],
+        ]
+        snapshot.write_snapshot(records, self.path)
+        table = snapshot.SnapshotTable(self.path)
+        self.assertEqual(table[0], records[0])
+        self.assertEqual(list(table[0]), list(records[0]))
+        self.assertIs(type(table[0]['Amount']), int)
+        self.assertEqual(table[1]['DateTime'], '2024-05-10T16:30:51')
+        self.assertEqual(table[1]['ReferenceNumber'], 7321)
+        self.assertEqual(table[2], TRANSACTIONS[1])
+        # The typed columns still hold the index keys
+        self.assertEqual(list(table.column('Amount'))[0], 5.0)
+        self.assertEqual(table.column('DateTime')[1], 1715358651)
+        self.assertIsNone(table.heap_value('ReferenceNumber', 1))
+
+if __name__ == '__main__':
+    unittest.main()
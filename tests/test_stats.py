@@ -0,0 +1,70 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_stats.py
+# Description: Test the incrementally maintained /stats aggregates
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_stats.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import os
+import tempfile
+
+from api import stats
+from api import store
+from dsa import snapshot
+
+TRANSACTIONS = [
+    {'TransactionID': 1, 'TransactionType': 'payment', 'Amount': 500.0, 'DateTime': '2024-05-10 16:30:51'},
+    {'TransactionID': 2, 'TransactionType': 'deposit', 'Amount': 20000.0, 'DateTime': '2024-05-10 18:00:00'},
+    {'TransactionID': 3, 'TransactionType': 'payment', 'Amount': 60000.0, 'DateTime': '2024-05-12 10:15:00'},
+    {'TransactionID': 4, 'TransactionType': 'other', 'Amount': None, 'DateTime': '2024-05-12 12:00:00'},
+]
+
+def recomputed(transactions, start=None, end=None):
+    # The aggregates built from scratch, to compare the running ones against
+    totals = stats.TransactionStats()
+    for tx in transactions:
+        totals.add(*stats.record_keys(tx))
+    return totals.daily_volume(start, end), totals.amount_buckets(start, end), totals.types(start, end)
+
+def current(transactions, start=None, end=None):
+    totals = transactions.stats
+    return totals.daily_volume(start, end), totals.amount_buckets(start, end), totals.types(start, end)
+
+class TestTransactionStats(unittest.TestCase):
+
+    def test_aggregates(self):
+        transactions = store.TransactionStore([dict(tx) for tx in TRANSACTIONS])
+        daily, buckets, types = current(transactions)
+        self.assertEqual(daily, [{'date': '2024-05-10', 'count': 2, 'amount': 20500.0},
+                                 {'date': '2024-05-12', 'count': 2, 'amount': 60000.0}])
+        # The transaction without an amount is left out of the buckets
+        self.assertEqual([bucket['count'] for bucket in buckets], [1, 0, 1, 0, 1])
+        self.assertEqual(types[0], {'type': 'payment', 'count': 2})
+        self.assertEqual(current(transactions, '2024-05-11')[2],
+                         [{'type': 'other', 'count': 1}, {'type': 'payment', 'count': 1}])
+
+    def test_follows_changes(self):
+        transactions = store.TransactionStore([dict(tx) for tx in TRANSACTIONS])
+        transactions.add({'TransactionType': 'payment', 'Amount': 7000.0, 'DateTime': '2024-05-11 09:00:00'})
+        transactions.replace(1, {'TransactionType': 'deposit', 'Amount': 12000.0, 'DateTime': '2024-05-12 09:00:00'})
+        transactions.delete(2)
+        transactions.add({'TransactionType': 'payment', 'Amount': 'n/a'})
+        self.assertEqual(current(transactions), recomputed(transactions))
+        self.assertEqual(current(transactions, '2024-05-11', '2024-05-11'),
+                         recomputed(transactions, '2024-05-11', '2024-05-11'))
+        # Days left without transactions disappear
+        self.assertNotIn('2024-05-10', [day['date'] for day in current(transactions)[0]])
+
+    def test_from_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'transactions.snapshot')
+            snapshot.write_snapshot(TRANSACTIONS, path)
+            transactions = store.TransactionStore.from_snapshot(snapshot.SnapshotTable(path))
+            self.assertEqual(current(transactions), recomputed(TRANSACTIONS))
+            transactions.delete(3)
+            self.assertEqual(current(transactions), recomputed(TRANSACTIONS[:2] + TRANSACTIONS[3:]))
+
+if __name__ == '__main__':
+    unittest.main()
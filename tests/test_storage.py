@@ -0,0 +1,104 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_storage.py
+# Description: Test the embedded SQLite storage backend with load_db.py
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_storage.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import os
+import tempfile
+
+from database import load_db
+from database import storage
+
+TRANSACTIONS = [
+    {'TransactionID': 1, 'TransactionType': 'deposit', 'Amount': 2000.0, 'Currency': 'RWF',
+     'DateTime': '2024-05-10 16:30:51', 'ReferenceNumber': '76662021700', 'BalanceAfterTransaction': 2000.0,
+     'Status': 'confirmed', 'MessageText': "You have received 2000 RWF from Jane Smith",
+     'Participants': [{'Name': 'Jane Smith', 'PhoneNumber': '*********013', 'UserType': 'sender', 'UserID': 1}]},
+    {'TransactionID': 2, 'TransactionType': 'payment', 'Amount': 1000.0, 'Currency': 'RWF',
+     'DateTime': '2024-05-10 16:31:39', 'ReferenceNumber': None, 'BalanceAfterTransaction': None,
+     'Status': 'confirmed', 'MessageText': "Your payment of 1,000 RWF to Jane's shop",
+     'Participants': [{'Name': 'Jane Smith', 'PhoneNumber': '*********013', 'UserType': 'receiver', 'UserID': 1},
+                      {'Name': 'Shop', 'PhoneNumber': '12845', 'UserType': 'receiver', 'UserID': 2}]},
+]
+
+class TestSQLiteBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.backend = storage.SQLiteBackend(os.path.join(self.tmp_dir.name, 'momo.sqlite3'))
+        self.conn = self.backend.connect()
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp_dir.cleanup()
+
+    def test_schema_includes_indexes(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name NOT LIKE 'sqlite_%'")
+        indexes = {name for (name,) in cursor.fetchall()}
+        self.assertTrue({'idx_transaction_datetime', 'uq_transaction_reference',
+                         'uq_transaction_contenthash', 'idx_participant_transaction',
+                         'idx_participant_user'} <= indexes)
+        # Sample rows from database_setup.sql are left out by default
+        cursor.execute("SELECT COUNT(*) FROM Transaction")
+        self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_bulk_load_round_trip(self):
+        self.assertEqual(load_db.bulk_load(self.conn, TRANSACTIONS), (2, 3, 0))
+        self.assertEqual(storage.fetch_transactions(self.conn), TRANSACTIONS)
+        self.assertEqual(storage.fetch_transaction(self.conn, 2), TRANSACTIONS[1])
+        self.assertIsInstance(storage.fetch_transaction(self.conn, 1)['Amount'], float)
+        self.assertIsNone(storage.fetch_transaction(self.conn, 3))
+        # Reloading is a no-op
+        self.assertEqual(load_db.bulk_load(self.conn, TRANSACTIONS), (0, 0, 2))
+
+    def test_select_transactions(self):
+        load_db.bulk_load(self.conn, TRANSACTIONS)
+        select = lambda **kwargs: [tx['TransactionID'] for tx in storage.select_transactions(self.conn, **kwargs)]
+        self.assertEqual(select(equals={'TransactionType': 'payment'}), [2])
+        self.assertEqual(select(ranges={'Amount': (1500.0, None)}), [1])
+        self.assertEqual(select(ranges={'DateTime': (None, '2024-05-10 16:31:00')}), [1])
+        self.assertEqual(select(after=1), [2])
+        self.assertEqual(select(limit=1, offset=1), [2])
+        self.assertEqual(select(offset=1), [2])
+        self.assertEqual(select(terms=['jane']), [1, 2])
+        self.assertEqual(select(terms=['jane', 'received']), [1])
+        self.assertEqual(select(terms=['76662021700']), [1])
+        # Terms match whole tokens, as in the in-memory inverted index
+        self.assertEqual(select(terms=['ceive']), [])
+        self.assertEqual(select(terms=['7666']), [])
+        self.assertEqual(select(terms=['shop']), [2])
+        self.assertEqual(select(terms=['rwf'], limit=1, offset=1), [2])
+        load_db.bulk_load(self.conn, [dict(TRANSACTIONS[1], TransactionID=3, MessageText='Murakoze ÉTÉ',
+                                           Participants=[])])
+        self.assertEqual(select(terms=['été']), [3])
+        self.assertEqual(storage.select_transactions(self.conn, limit=1), TRANSACTIONS[:1])
+
+    def test_user_transactions(self):
+        load_db.bulk_load(self.conn, TRANSACTIONS)
+        self.assertEqual([tx['TransactionID'] for tx in storage.user_transactions(self.conn, '*********013')], [1, 2])
+        self.assertEqual([tx['TransactionID'] for tx in storage.user_transactions(self.conn, '12845')], [2])
+        self.assertEqual(storage.user_transactions(self.conn, '000'), [])
+        # Oldest DateTime first, whatever the TransactionID
+        load_db.bulk_load(self.conn, [dict(TRANSACTIONS[0], TransactionID=3, ReferenceNumber='1',
+                                           DateTime='2024-05-09 08:00:00')])
+        self.assertEqual([tx['TransactionID'] for tx in storage.user_transactions(self.conn, '*********013')],
+                         [3, 1, 2])
+
+    def test_group_transactions(self):
+        load_db.bulk_load(self.conn, TRANSACTIONS)
+        rows = storage.group_transactions(self.conn, [5000, None])
+        self.assertEqual(sorted(rows), [('2024-05-10', 'deposit', 0, 1, 2000.0),
+                                        ('2024-05-10', 'payment', 0, 1, 1000.0)])
+        self.assertEqual(storage.group_transactions(self.conn, [5000, None], start='2024-05-11'), [])
+
+    def test_translate_keeps_string_literals(self):
+        self.assertEqual(storage.translate_sqlite("SELECT 'Transaction %s' FROM Transaction WHERE a = %s"),
+                         """SELECT 'Transaction %s' FROM "Transaction" WHERE a = ?""")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,318 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_store.py
+# Description: Test the ID-indexed TransactionStore used by api/server.py
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_store.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import os
+import tempfile
+import threading
+
+from api import store
+from dsa import snapshot
+
+def make_transactions(ids):
+    return [{'TransactionID': tid, 'TransactionType': 'payment', 'Amount': float(tid)} for tid in ids]
+
+class TestTransactionStore(unittest.TestCase):
+
+    def test_lookup_update_delete(self):
+        transactions = store.TransactionStore(make_transactions([1, 2, 3]))
+        self.assertEqual(transactions.get(2)['Amount'], 2.0)
+        self.assertIsNone(transactions.get(9))
+        updated = transactions.replace(2, {'TransactionID': 7, 'Amount': 5.0})
+        # PUT keeps the ID and the record's position
+        self.assertEqual(updated['TransactionID'], 2)
+        self.assertEqual([tx['TransactionID'] for tx in transactions], [1, 2, 3])
+        self.assertIsNone(transactions.replace(9, {}))
+        self.assertEqual(transactions.delete(1)['Amount'], 1.0)
+        self.assertIsNone(transactions.delete(1))
+        self.assertEqual(len(transactions), 2)
+
+    def test_new_ids_follow_running_max(self):
+        transactions = store.TransactionStore(make_transactions([1, 5, 3]))
+        self.assertEqual(transactions.add({'Amount': 1.0})['TransactionID'], 6)
+        # Deleting the newest transaction frees its ID, as max(...) + 1 did
+        transactions.delete(6)
+        transactions.delete(5)
+        self.assertEqual(transactions.max_id, 3)
+        self.assertEqual(transactions.add({})['TransactionID'], 4)
+        # A wide gap below the deleted maximum is found too
+        transactions = store.TransactionStore(make_transactions([2, 1000]))
+        transactions.delete(1000)
+        self.assertEqual(transactions.max_id, 2)
+        transactions.delete(2)
+        self.assertEqual(transactions.add({})['TransactionID'], 1)
+
+    def test_detach(self):
+        transactions = store.TransactionStore(make_transactions([1, 2]))
+        detached = transactions.detach()
+        # Changes after detaching do not affect the iterator
+        transactions.add({})
+        transactions.delete(1)
+        self.assertEqual([tx['TransactionID'] for tx in detached], [1, 2])
+
+    def test_from_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'transactions.snapshot')
+            snapshot.write_snapshot(make_transactions([4, 8]), path)
+            transactions = store.TransactionStore.from_snapshot(snapshot.SnapshotTable(path))
+            self.assertEqual(transactions.get(8)['Amount'], 8.0)
+            self.assertEqual(transactions.add({})['TransactionID'], 9)
+            self.assertEqual([tx['TransactionID'] for tx in transactions], [4, 8, 9])
+
+    def test_from_snapshot_keeps_api_records(self):
+        records = make_transactions([1]) + [{'TransactionID': 2, 'TransactionType': 'payment', 'Amount': 5,
+                                            'DateTime': '2024-05-10 10:00:00', 'Note': 'rent'}]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'transactions.snapshot')
+            snapshot.write_snapshot(records, path)
+            transactions = store.TransactionStore.from_snapshot(snapshot.SnapshotTable(path))
+            self.assertEqual(list(transactions), records)
+            self.assertEqual(list(transactions.range_ids('Amount', 2.0, 5.0)), [2])
+            self.assertEqual(transactions.stats.daily_volume(), [{'date': '2024-05-10', 'count': 1, 'amount': 5.0}])
+            self.assertEqual(transactions.delete(2), records[1])
+
+class TestSelect(unittest.TestCase):
+
+    def setUp(self):
+        self.transactions = store.TransactionStore([
+            {'TransactionID': 1, 'TransactionType': 'payment', 'Currency': 'RWF', 'Amount': 500.0,
+             'DateTime': '2024-05-10 16:30:51'},
+            {'TransactionID': 2, 'TransactionType': 'deposit', 'Currency': 'RWF', 'Amount': 2000.0,
+             'DateTime': '2024-05-11 09:00:00'},
+            {'TransactionID': 3, 'TransactionType': 'payment', 'Currency': 'USD', 'Amount': 20.0,
+             'DateTime': '2024-05-12 10:15:00'},
+            {'TransactionID': 4, 'TransactionType': 'payment', 'Currency': 'RWF', 'Amount': None,
+             'DateTime': '2024-05-13 12:00:00'},
+        ])
+
+    def ids(self, **kwargs):
+        return [tx['TransactionID'] for tx in self.transactions.select(**kwargs)]
+
+    def test_filters_and_cursor(self):
+        self.assertEqual(self.ids(), [1, 2, 3, 4])
+        self.assertEqual(self.ids(equals={'TransactionType': 'payment'}), [1, 3, 4])
+        self.assertEqual(self.ids(equals={'TransactionType': 'payment', 'Currency': 'RWF'}), [1, 4])
+        self.assertEqual(self.ids(equals={'TransactionType': 'refund'}), [])
+        # A missing Amount never matches an Amount range
+        self.assertEqual(self.ids(ranges={'Amount': (100.0, None)}), [1, 2])
+        self.assertEqual(self.ids(ranges={'DateTime': ('2024-05-11 00:00:00', '2024-05-12 23:59:59')}), [2, 3])
+        self.assertEqual(self.ids(equals={'TransactionType': 'payment'}, after=1), [3, 4])
+
+    def test_range_index(self):
+        self.assertEqual(list(self.transactions.range_ids('Amount', 20.0, 600.0)), [3, 1])
+        # A narrow range is walked through the sorted index, still in ID order
+        self.assertEqual(self.ids(ranges={'DateTime': ('2024-05-12', None)}, after=3), [4])
+        self.assertEqual(self.ids(equals={'Currency': 'RWF'}, ranges={'Amount': (0.0, 1000.0)}), [1])
+        self.transactions.replace(1, {'Amount': 5000.0, 'DateTime': '2024-05-14 08:00:00'})
+        self.transactions.delete(2)
+        self.assertEqual(list(self.transactions.range_ids('Amount', 1000.0)), [1])
+        self.assertEqual(list(self.transactions.range_ids('DateTime', '2024-05-13')), [4, 1])
+        with self.assertRaises(ValueError):
+            self.ids(ranges={'DateTime': ('yesterday', None)})
+
+    def test_indexes_follow_changes(self):
+        self.transactions.replace(3, {'TransactionType': 'deposit', 'Currency': 'USD'})
+        self.transactions.delete(1)
+        self.transactions.add({'TransactionType': 'payment', 'Currency': 'RWF'})
+        self.assertEqual(self.ids(equals={'TransactionType': 'payment'}), [4, 5])
+        self.assertEqual(self.ids(equals={'TransactionType': 'deposit'}), [2, 3])
+        # A freed ID that is handed out again is found once
+        self.transactions.delete(5)
+        self.transactions.add({'TransactionType': 'payment'})
+        self.assertEqual(self.ids(equals={'TransactionType': 'payment'}), [4, 5])
+        with self.assertRaises(TypeError):
+            self.transactions.add({'TransactionType': ['not', 'hashable']})
+        self.assertEqual(len(self.transactions), 4)
+
+    def test_unindexable_record_leaves_store_unchanged(self):
+        version, max_id = self.transactions.version, self.transactions.max_id
+        with self.assertRaises(TypeError):
+            self.transactions.replace(2, {'TransactionType': ['not', 'hashable'], 'MessageText': 'new words'})
+        self.assertEqual(self.transactions.get(2)['TransactionType'], 'deposit')
+        self.assertEqual((self.transactions.version, self.transactions.max_id), (version, max_id))
+        self.assertEqual(self.ids(equals={'TransactionType': 'deposit'}), [2])
+        self.assertEqual(list(self.transactions.select(terms=['new'])), [])
+
+    def test_offset_datetime(self):
+        tx = self.transactions.add({'TransactionType': 'payment', 'DateTime': '2024-05-10T10:00:00+02:00',
+                                    'Participants': [{'PhoneNumber': '250788000001'}]})
+        tid = tx['TransactionID']
+        # Stored and served, but left out of the date index like any other non-date
+        self.assertIn(tid, self.ids(equals={'TransactionType': 'payment'}))
+        self.assertNotIn(tid, list(self.transactions.range_ids('DateTime', '2024-01-01')))
+        self.assertEqual(self.transactions.participant_transactions('PhoneNumber', '250788000001'), [tx])
+        self.assertIs(self.transactions.delete(tid), tx)
+        self.assertNotIn(tid, self.transactions)
+        self.assertEqual(self.transactions.participant_transactions('PhoneNumber', '250788000001'), [])
+
+    def test_snapshot_indexes(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'transactions.snapshot')
+            snapshot.write_snapshot(list(self.transactions), path)
+            transactions = store.TransactionStore.from_snapshot(snapshot.SnapshotTable(path))
+            self.assertEqual([tx['TransactionID'] for tx in transactions.select(equals={'Currency': 'USD'})], [3])
+            self.assertEqual(list(transactions.range_ids('Amount', 100.0)), [1, 2])
+            # Replacing a snapshot row moves it to its new index entries
+            transactions.replace(3, {'TransactionType': 'payment', 'Currency': 'RWF', 'Amount': 900.0})
+            self.assertEqual(list(transactions.select(equals={'Currency': 'USD'})), [])
+            self.assertEqual(list(transactions.range_ids('Amount', 100.0)), [1, 3, 2])
+
+    def test_build_indexes(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'transactions.snapshot')
+            snapshot.write_snapshot(list(self.transactions), path)
+            transactions = store.TransactionStore.from_snapshot(snapshot.SnapshotTable(path))
+            # Written before the build, and while each group is built from its copy
+            transactions.replace(1, {'TransactionType': 'deposit', 'Currency': 'USD', 'Amount': 50.0,
+                                     'MessageText': 'Refund'})
+            build_index = transactions._build_index
+            def build_during_write(group, items):
+                index = build_index(group, items)
+                if group == 'range':
+                    transactions.delete(2)
+                    transactions.add({'TransactionType': 'payment', 'Currency': 'USD', 'Amount': 70.0,
+                                      'DateTime': '2024-05-14 08:00:00', 'MessageText': 'Refund'})
+                return index
+            transactions._build_index = build_during_write
+            transactions.build_indexes()
+            expected = store.TransactionStore(list(transactions))
+            for kwargs in ({'equals': {'Currency': 'USD'}}, {'equals': {'TransactionType': 'deposit'}},
+                           {'ranges': {'Amount': (30.0, None)}}, {'terms': ['refund']}):
+                self.assertEqual(list(transactions.select(**kwargs)), list(expected.select(**kwargs)))
+            self.assertEqual([tx['TransactionID'] for tx in transactions.select(equals={'Currency': 'USD'})],
+                             [1, 3, 5])
+            self.assertEqual(list(transactions.range_ids('Amount', 30.0)), [1, 5])
+            self.assertEqual(transactions.stats.types(), expected.stats.types())
+
+    def test_text_search(self):
+        self.transactions.replace(1, {'TransactionType': 'payment', 'Amount': 500.0,
+                                      'MessageText': 'Payment to Jane Smith', 'ReferenceNumber': '7321'})
+        self.transactions.replace(3, {'TransactionType': 'payment', 'MessageText': 'Payment to John'})
+        self.assertEqual(self.ids(terms=['payment']), [1, 3])
+        self.assertEqual(self.ids(terms=['payment', 'jane']), [1])
+        self.assertEqual(self.ids(terms=['7321']), [1])
+        # Words match whole only, never as a prefix
+        self.assertEqual(self.ids(terms=['732']), [])
+        self.assertEqual(self.ids(terms=['pay']), [])
+        self.assertEqual(self.ids(terms=['payment'], ranges={'Amount': (100.0, None)}), [1])
+        self.assertEqual(self.ids(terms=['payment'], after=1), [3])
+        # Once built, the index follows adds, replaces and deletes
+        self.transactions.add({'MessageText': 'Jane sent money'})
+        self.transactions.replace(1, {'MessageText': 'Refund'})
+        self.transactions.delete(3)
+        self.assertEqual(self.ids(terms=['jane']), [5])
+        self.assertEqual(self.ids(terms=['payment']), [])
+        self.assertEqual(self.ids(terms=['refund']), [1])
+
+    def test_snapshot_text_search(self):
+        self.transactions.replace(2, {'MessageText': 'Received from Jane', 'ReferenceNumber': '99'})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'transactions.snapshot')
+            snapshot.write_snapshot(list(self.transactions), path)
+            transactions = store.TransactionStore.from_snapshot(snapshot.SnapshotTable(path))
+            self.assertEqual([tx['TransactionID'] for tx in transactions.select(terms=['jane', '99'])], [2])
+            transactions.replace(2, {'MessageText': 'Sent to John'})
+            self.assertEqual(list(transactions.select(terms=['jane'])), [])
+
+class TestParticipantIndex(unittest.TestCase):
+
+    def setUp(self):
+        jane = {'PhoneNumber': '250788000001', 'UserID': 1}
+        shop = {'PhoneNumber': '12845', 'UserID': 2}
+        self.transactions = store.TransactionStore([
+            {'TransactionID': 1, 'DateTime': '2024-05-12 10:00:00', 'Participants': [jane]},
+            {'TransactionID': 2, 'DateTime': '2024-05-10 09:00:00', 'Participants': [jane, shop]},
+            {'TransactionID': 3, 'DateTime': None, 'Participants': [jane]},
+            {'TransactionID': 4, 'DateTime': '2024-05-11 08:00:00', 'Participants': [shop]},
+            {'TransactionID': 5, 'DateTime': '2024-05-11 08:00:00', 'Participants': []},
+        ])
+
+    def ids(self, field, value, transactions=None):
+        transactions = transactions or self.transactions
+        return [tx['TransactionID'] for tx in transactions.participant_transactions(field, value)]
+
+    def test_date_order_and_changes(self):
+        # Oldest first; a transaction without a date comes last
+        self.assertEqual(self.ids('PhoneNumber', '250788000001'), [2, 1, 3])
+        self.assertEqual(self.ids('UserID', 2), [2, 4])
+        self.assertEqual(self.ids('PhoneNumber', 'unknown'), [])
+        self.transactions.replace(4, {'DateTime': '2024-05-09 00:00:00',
+                                      'Participants': [{'PhoneNumber': '250788000001', 'UserID': 1}]})
+        self.transactions.delete(2)
+        self.transactions.add({'DateTime': '2024-05-13 00:00:00', 'Participants': [{'PhoneNumber': '12845'}]})
+        self.assertEqual(self.ids('PhoneNumber', '250788000001'), [4, 1, 3])
+        self.assertEqual(self.ids('PhoneNumber', '12845'), [6])
+        self.assertEqual(self.ids('UserID', 2), [])
+        # Malformed participants are stored but not indexed
+        self.transactions.add({'Participants': [{'PhoneNumber': ['x']}, 'not a dict']})
+        self.assertEqual(len(self.transactions), 6)
+
+    def test_snapshot_index(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'transactions.snapshot')
+            snapshot.write_snapshot(list(self.transactions), path)
+            transactions = store.TransactionStore.from_snapshot(snapshot.SnapshotTable(path))
+            self.assertEqual(self.ids('PhoneNumber', '250788000001', transactions), [2, 1, 3])
+            transactions.delete(1)
+            self.assertEqual(self.ids('UserID', 1, transactions), [2, 3])
+
+class TestSortedIdSet(unittest.TestCase):
+
+    def test_order_and_removal(self):
+        ids = store.SortedIdSet([5, 1, 3])
+        ids.add(2)
+        ids.add(9)
+        ids.discard(3)
+        ids.discard(7)
+        self.assertEqual(list(ids.iter_from()), [1, 2, 5, 9])
+        self.assertEqual(list(ids.iter_from(2)), [5, 9])
+        ids.add(3)
+        self.assertEqual(list(ids.iter_from()), [1, 2, 3, 5, 9])
+        # Removed IDs are dropped from the sorted list once they pile up
+        for tid in range(100, 200):
+            ids.add(tid)
+            ids.discard(tid)
+        self.assertLess(len(ids._sorted), 40)
+        self.assertEqual(len(ids), 5)
+
+class TestReadWriteLock(unittest.TestCase):
+
+    def test_readers_share_writer_excludes(self):
+        lock = store.ReadWriteLock()
+        events = []
+        first_reader_in = threading.Event()
+        release_readers = threading.Event()
+
+        def reader(name):
+            with lock.read():
+                events.append(name)
+                first_reader_in.set()
+                release_readers.wait(5)
+
+        def writer():
+            with lock.write():
+                events.append('writer')
+
+        readers = [threading.Thread(target=reader, args=(f'reader{i}',)) for i in range(2)]
+        readers[0].start()
+        first_reader_in.wait(5)
+        # A second reader gets in while the first still holds the lock
+        readers[1].start()
+        while len(events) < 2:
+            threading.Event().wait(0.01)
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        writer_thread.join(0.2)
+        self.assertTrue(writer_thread.is_alive())
+        release_readers.set()
+        for thread in readers + [writer_thread]:
+            thread.join(5)
+        self.assertEqual(events[-1], 'writer')
+
+if __name__ == '__main__':
+    unittest.main()
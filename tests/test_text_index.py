@@ -0,0 +1,51 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_text_index.py
+# Description: Test the inverted text index against the linear search
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_text_index.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import random
+
+from dsa import text_index
+
+class TestInvertedIndex(unittest.TestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(text_index.tokenize("TxId: 7321. Paid 1,000 RWF to Jane_Smith"),
+                         {'txid', '7321', 'paid', '1', '000', 'rwf', 'to', 'jane', 'smith'})
+        self.assertEqual(text_index.tokenize(None), frozenset())
+        self.assertEqual(text_index.record_tokens({'MessageText': 'Hi there', 'ReferenceNumber': '42'}),
+                         {'hi', 'there', '42'})
+        self.assertEqual(text_index.query_terms('Jane  jane, 42'), ['jane', '42'])
+
+    def test_matches_linear_search_through_changes(self):
+        random.seed(3)
+        words = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta']
+        transactions = {tid: {'TransactionID': tid, 'MessageText': ' '.join(random.sample(words, 3))}
+                        for tid in range(1, 400)}
+        index = text_index.InvertedIndex((tid, text_index.record_tokens(tx)) for tid, tx in transactions.items())
+        for tid in random.sample(sorted(transactions), 100):
+            tx = transactions[tid]
+            new_tx = {'TransactionID': tid, 'MessageText': ' '.join(random.sample(words, 2))}
+            index.update(tid, text_index.record_tokens(tx), text_index.record_tokens(new_tx))
+            transactions[tid] = new_tx
+        for tid in random.sample(sorted(transactions), 50):
+            index.remove(tid, text_index.record_tokens(transactions.pop(tid)))
+        for tid in (400, 401):
+            transactions[tid] = {'TransactionID': tid, 'MessageText': 'alpha omega'}
+            index.add(tid, text_index.record_tokens(transactions[tid]))
+
+        records = [transactions[tid] for tid in sorted(transactions)]
+        for terms in (['alpha'], ['beta', 'gamma'], ['zeta', 'alpha', 'delta'], ['omega'], ['alpha', 'missing']):
+            expected = text_index.linear_search(records, terms)
+            self.assertEqual(list(index.search(terms)), expected)
+            if expected:
+                self.assertEqual(list(index.search(terms, after=expected[0])), expected[1:])
+        self.assertEqual(index.count('omega'), 2)
+        self.assertEqual(list(index.search([])), [])
+
+if __name__ == '__main__':
+    unittest.main()
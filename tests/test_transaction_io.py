@@ -0,0 +1,73 @@
+#--------------------------------------------------------------------------------
+# Script Name: test_transaction_io.py
+# Description: Test transaction_io.py JSON / NDJSON reading and writing
+# Author: Monica Dhieu
+# Date:   2026-10-16
+# Usage:  python3 -m unittest tests/test_transaction_io.py
+#--------------------------------------------------------------------------------
+
+import unittest
+import os
+import json
+import tempfile
+
+from dsa import transaction_io
+from dsa import parse_xml
+
+TRANSACTIONS = [
+    {'TransactionID': 1, 'TransactionType': 'deposit', 'Amount': 2000.0, 'MessageText': 'line one\nline two'},
+    {'TransactionID': 2, 'TransactionType': 'payment', 'Amount': 1000.0, 'MessageText': "it''s paid"},
+]
+
+class TestTransactionIO(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_ndjson_round_trip_and_append(self):
+        path = self.path('transactions.ndjson')
+        self.assertEqual(transaction_io.write_ndjson(iter(TRANSACTIONS[:1]), path), 1)
+        self.assertEqual(transaction_io.write_ndjson(TRANSACTIONS[1:], path, mode='a'), 1)
+        with open(path, 'r') as f:
+            lines = f.read().splitlines()
+        # One compact record per line, embedded newlines stay escaped
+        self.assertEqual(len(lines), 2)
+        self.assertNotIn(': ', lines[0])
+        self.assertEqual(list(transaction_io.iter_transactions_file(path)), TRANSACTIONS)
+
+    def test_reader_accepts_json_array(self):
+        path = self.path('transactions.json')
+        with open(path, 'w') as f:
+            json.dump(TRANSACTIONS, f, indent=4)
+        self.assertEqual(transaction_io.load_transactions_file(path), TRANSACTIONS)
+
+    def test_json_array_pieces(self):
+        for count in (0, 1, 2, 5):
+            transactions = (TRANSACTIONS * 3)[:count]
+            pieces = list(transaction_io.iter_json_array(iter(transactions), batch_size=2))
+            self.assertEqual(''.join(pieces), json.dumps(transactions))
+            # One piece per batch, plus the closing bracket
+            self.assertEqual(len(pieces), max(1, (count + 1) // 2 + 1))
+
+    def test_reader_empty_file(self):
+        path = self.path('empty.ndjson')
+        open(path, 'w').close()
+        self.assertEqual(transaction_io.load_transactions_file(path), [])
+
+    def test_save_transactions_file_picks_format_from_extension(self):
+        ndjson_path = self.path('out.jsonl')
+        json_path = self.path('out.json')
+        parse_xml.save_transactions_file(TRANSACTIONS, ndjson_path)
+        parse_xml.save_transactions_file(TRANSACTIONS, json_path)
+        with open(json_path, 'r') as f:
+            self.assertEqual(f.read(), json.dumps(TRANSACTIONS, indent=4))
+        self.assertEqual(list(transaction_io.iter_ndjson(ndjson_path)), TRANSACTIONS)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,27 @@
 /**
  * File Name:   chart_handler.js
- * Description: Fetches Mobile Money transactions from backend API
- *              with Basic Auth process and bucket data, and renders 
- *              interactive charts using Chart.js
+ * Description: Fetches Mobile Money transaction aggregates (daily volume,
+ *              amount buckets, type counts) from the backend API's /stats
+ *              endpoints with Basic Auth, and renders interactive charts
+ *              using Chart.js
  * Author:      Monica Dhieu             
  */
 
-// API endpoint for fetching transactions
-const API_URL = 'http://localhost:8090/transactions';
+// API endpoints serving the pre-aggregated chart data
+const STATS_URL = 'http://localhost:8090/stats';
+const STATS_ENDPOINTS = ['daily-volume', 'amount-buckets', 'types'];
+
+// optional date range from the page URL (e.g. index.html?start=2024-05-01&end=2024-05-31)
+// is passed on to every stats request
+function statsQuery() {
+    const pageParams = new URLSearchParams(window.location.search);
+    const query = new URLSearchParams();
+    ['start', 'end'].forEach(name => {
+        if (pageParams.get(name)) query.set(name, pageParams.get(name));
+    });
+    const queryString = query.toString();
+    return queryString ? `?${queryString}` : '';
+}
 
 // prompt user for credentials or retrieve if stored in locally
 // return null if missing input
@@ -35,54 +49,23 @@ function fetchWithStoredAuth(url) {
     return fetch(url, { headers });
 }
 
-// extract YYYY-MM-DD date string from a DateTime string
-function getDateOnly(dtString) {
-    return dtString.slice(0, 10);
-}
-
-// bucket transaction amounts into predefined ranges & return bucket counts
-function bucketAmounts(transactions) {
-    const buckets = {
-        '0-5,000': 0,
-        '5,001-10,000': 0,
-        '10,001-20,000': 0,
-        '20,001-50,000': 0,
-        '50,001+': 0,
-    };
-    transactions.forEach(({ Amount }) => {
-        if (Amount <= 5000) buckets['0-5,000']++;
-        else if (Amount <= 10000) buckets['5,001-10,000']++;
-        else if (Amount <= 20000) buckets['10,001-20,000']++;
-        else if (Amount <= 50000) buckets['20,001-50,000']++;
-        else buckets['50,001+']++;
-    });
-    return buckets;
-}
-
-// create & render charts visualizing transaction data 
-function createCharts(transactions) {
+// create & render charts from the /stats responses
+// dailyVolume: [{date, count, amount}] in date order
+// amountBuckets: [{bucket, count}] in bucket order
+// types: [{type, count}]
+function createCharts(dailyVolume, amountBuckets, types) {
     // prepare volume data per date
-    const volumeData = {};
-    transactions.forEach(({ DateTime }) => {
-        const date = getDateOnly(DateTime);
-        volumeData[date] = (volumeData[date] || 0) + 1;
-    });
-    const volumeLabels = Object.keys(volumeData).sort();
-    const volumeCounts = volumeLabels.map(date => volumeData[date]);
+    const volumeLabels = dailyVolume.map(day => day.date);
+    const volumeCounts = dailyVolume.map(day => day.count);
 
     // prepare amount distribution buckets
-    const amountBuckets = bucketAmounts(transactions);
-    const amountLabels = Object.keys(amountBuckets);
-    const amountCounts = amountLabels.map(label => amountBuckets[label]);
+    const amountLabels = amountBuckets.map(bucket => bucket.bucket);
+    const amountCounts = amountBuckets.map(bucket => bucket.count);
 
-    // prepare counts for transaction types
-    const typeCounts = {};
-    transactions.forEach(({ TransactionType }) => {
-        typeCounts[TransactionType] = (typeCounts[TransactionType] || 0) + 1;
-    });
-    const typeLabels = Object.keys(typeCounts);
-    const totalTypes = Object.values(typeCounts).reduce((a, b) => a + b, 0);
-    const typeDataPercent = typeLabels.map(t => (typeCounts[t] / totalTypes) * 100);
+    // prepare percentages for transaction types
+    const typeLabels = types.map(entry => entry.type);
+    const totalTypes = types.reduce((total, entry) => total + entry.count, 0);
+    const typeDataPercent = types.map(entry => (entry.count / totalTypes) * 100);
 
     // MTN brand colors
     const mtnColors = ['#ffcc00', '#6e260e', '#f47720', '#005a9c', '#009e49'];
@@ -151,23 +134,27 @@ function createCharts(transactions) {
 }
 
 // initialize & start the dashboard:
-// fetch transactions with authentication
+// fetch the three aggregates with authentication
 // create charts on successful data fetch
 // handle auth failures and errors
 function initDashboard() {
-    fetchWithStoredAuth(API_URL)
-        .then(response => {
-            if (response.status === 401) {
+    const query = statsQuery();
+    // ask for credentials once, before the parallel requests
+    if (!getStoredCredentials()) return;
+    Promise.all(STATS_ENDPOINTS.map(name => fetchWithStoredAuth(`${STATS_URL}/${name}${query}`)))
+        .then(responses => {
+            if (responses.some(response => response.status === 401)) {
                 alert("Authentication failed, please enter credentials again.");
                 localStorage.removeItem('momoAuth'); // clear saved credentials
                 initDashboard(); // retry fetching
                 return null;
             }
-            if (!response.ok) throw new Error(`API error: ${response.status}`);
-            return response.json();
+            const failed = responses.find(response => !response.ok);
+            if (failed) throw new Error(`API error: ${failed.status}`);
+            return Promise.all(responses.map(response => response.json()));
         })
         .then(data => {
-            if (data) createCharts(data);
+            if (data) createCharts(...data);
         })
         .catch(err => {
             console.error(err);